@@ -0,0 +1,124 @@
+"""
+Benchmark: IVF approximate search vs exact brute-force cosine, on the
+knowledge store's own text and embedder.
+
+The corpus is real nutrition text going through the production path:
+the seeded knowledge, the structured foods in data/nutrition_store.json,
+then learned answers (the kind UniversalRAG caches) up to each size.
+Vectors come from HashingEmbedder via NutritionVectorStore, and queries
+are user phrasings embedded the same way. Reports recall@k against exact
+cosine and queries/second for a sweep of nprobe (8 is the IVFIndex default).
+
+With HashingEmbedder the clusters are loose: nprobe=8 finds ~60% of the exact
+top-3, and reaching ~90% means scanning most lists for no speedup, which is
+why the registry's knowledge store searches exactly.
+
+Usage:
+    python benchmarks/bench_ann_recall.py
+"""
+import json
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+# Add project root to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.rag.embeddings import HashingEmbedder
+from src.rag.ivf_index import IVFIndex
+from src.rag.store import NutritionVectorStore
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+TOP_KS = (3, 10)  # 3 is what store.search returns by default
+N_QUERIES = 200
+DEFAULT_NPROBE = IVFIndex().nprobe
+
+FOODS = ["apple", "banana", "dragon fruit", "kale", "salmon", "tofu", "quinoa", "lentils", "almonds", "spinach",
+         "greek yogurt", "rolled oats", "avocado", "broccoli", "chickpeas", "mango", "sardines", "walnuts",
+         "beetroot", "kimchi", "strawberries", "blueberries", "sweet potato", "brown rice", "chicken breast",
+         "eggs", "cottage cheese", "peanut butter", "chia seeds", "flaxseed", "edamame", "tempeh", "mackerel",
+         "tuna", "turkey", "lean beef", "pumpkin seeds", "cashews", "oranges", "kiwi", "pineapple", "papaya",
+         "carrots", "bell peppers", "brussels sprouts", "cauliflower", "mushrooms", "black beans", "kidney beans",
+         "whole wheat bread", "dark chocolate", "milk", "soy milk", "cheddar cheese", "pears", "grapes",
+         "watermelon", "cucumber", "tomatoes", "garlic"]
+NUTRIENTS = ["protein", "fiber", "vitamin c", "vitamin d", "vitamin a", "vitamin b12", "folate", "iron",
+             "calcium", "potassium", "magnesium", "omega-3 fatty acids", "zinc", "antioxidants", "healthy fats"]
+BENEFITS = ["supports muscle repair", "keeps you full for longer", "helps steady blood sugar",
+            "is good for heart health", "supports the immune system", "helps with digestion",
+            "supports bone health", "helps carry oxygen in the blood", "supports healthy skin"]
+TIPS = ["Pair it with a source of vitamin C to absorb more iron.", "Watch the portion size if you are cutting calories.",
+        "Fresh or frozen both work well.", "Add it to a salad or a smoothie.", "Roasting brings out the flavour.",
+        "It keeps well for meal prep.", "Choose the unsweetened version where you can."]
+QUESTIONS = ["how much {n} is in {f}", "is {f} high in {n}", "{f} {n}", "does {f} have {n}",
+             "calories in {f}", "is {f} healthy", "what are the benefits of {f}", "good sources of {n}",
+             "{f} nutrition facts", "can i eat {f} every day"]
+
+
+def learned_answer(rng: random.Random) -> str:
+    """An LLM-style answer of the kind the RAG layer caches as knowledge."""
+    food = rng.choice(FOODS)
+    n1, n2, n3 = rng.sample(NUTRIENTS, 3)
+    return (f"{food.capitalize()} is a good source of {n1} and {n2}, and it {rng.choice(BENEFITS)}. "
+            f"A {rng.choice([50, 100, 150, 200])} g serving has about {rng.randint(20, 600)} calories "
+            f"and {rng.randint(1, 30)} g of {n3}. {rng.choice(TIPS)}")
+
+
+def user_query(rng: random.Random) -> str:
+    return rng.choice(QUESTIONS).format(f=rng.choice(FOODS), n=rng.choice(NUTRIENTS))
+
+
+def build_store(rng: random.Random, size: int) -> NutritionVectorStore:
+    """In-memory dense store with a default IVF index, grown to `size` documents."""
+    store = NutritionVectorStore(persist_directory=None, embedder=HashingEmbedder(),
+                                 ann_index=IVFIndex())
+    with open(os.path.join(ROOT, "data", "nutrition_store.json")) as f:
+        for name, info in json.load(f).get("structured_data", {}).items():
+            store._apply_structured_food(name, info)
+    while len(store.documents) < size:
+        store.add_knowledge(learned_answer(rng))
+    return store
+
+
+def recall_at(hits, truth, k: int) -> float:
+    """Share of the exact top-k found; a hit tied with the exact k-th score counts too."""
+    kth = truth[min(k, len(truth)) - 1][0]
+    exact = {row for _, row in truth[:k]}
+    return sum(1 for score, row in hits[:k] if row in exact or score >= kth - 1e-6) / k
+
+
+def main():
+    rng = random.Random(7)
+    queries = [user_query(rng) for _ in range(N_QUERIES)]
+    max_k = max(TOP_KS)
+    for size in (10_000, 50_000):
+        start = time.perf_counter()
+        store = build_store(rng, size)
+        build_s = time.perf_counter() - start
+        matrix, ann = store.dense_index.matrix, store.ann_index
+        query_vecs = store.dense_index.embedder.embed(queries)
+
+        start = time.perf_counter()
+        truth = [store.dense_index.search_vector(q, top_k=max_k) for q in query_vecs]
+        exact_qps = N_QUERIES / (time.perf_counter() - start)
+
+        print(f"\n{size} docs, {len(ann.centroids)} lists, store build {build_s:.1f}s, exact {exact_qps:,.0f} QPS")
+        header = " | ".join(f"{f'recall@{k}':>9}" for k in TOP_KS)
+        print(f"{'nprobe':>8} | {header} | {'QPS':>8} | {'speedup':>7}")
+        for nprobe in (1, 4, 8, 16, 32):
+            start = time.perf_counter()
+            hits = [ann.search(matrix, q, max_k, nprobe=nprobe) for q in query_vecs]
+            qps = N_QUERIES / (time.perf_counter() - start)
+            recalls = []
+            for k in TOP_KS:
+                recalls.append(np.mean([recall_at(h, t, k) for h, t in zip(hits, truth)]))
+            label = f"{nprobe}*" if nprobe == DEFAULT_NPROBE else str(nprobe)
+            cells = " | ".join(f"{r:>9.3f}" for r in recalls)
+            print(f"{label:>8} | {cells} | {qps:>8,.0f} | {qps / exact_qps:>6.1f}x")
+    print(f"\n* IVFIndex default (nprobe={DEFAULT_NPROBE})")
+
+
+if __name__ == "__main__":
+    main()
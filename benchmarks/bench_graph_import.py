@@ -0,0 +1,64 @@
+"""
+Benchmark: importing a user's fact graph, per-item add_node/add_edge vs upsert_subgraph.
+
+Usage:
+    python benchmarks/bench_graph_import.py
+"""
+import os
+import sys
+import tempfile
+import time
+
+# Add project root to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from src.db.database import Base, set_sqlite_pragmas
+from src.db import models  # noqa: F401  (registers tables on Base)
+from src.services.graph_db import GraphService
+
+
+def make_session(path: str):
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+    event.listen(engine, "connect", set_sqlite_pragmas)
+    Base.metadata.create_all(bind=engine)
+    return sessionmaker(bind=engine)()
+
+
+def facts(n: int):
+    return [f"Fact {i}" for i in range(n)]
+
+
+def per_item(db, n: int) -> float:
+    svc = GraphService(db)
+    start = time.perf_counter()
+    user = svc.add_node(1, "User", "USER")
+    for label in facts(n):
+        node = svc.add_node(1, label, "FACT")
+        svc.add_edge(user.id, node.id, "IS")
+    return time.perf_counter() - start
+
+
+def bulk(db, n: int) -> float:
+    svc = GraphService(db)
+    start = time.perf_counter()
+    svc.upsert_subgraph(1, [("User", "USER")] + [(label, "FACT") for label in facts(n)],
+                        [("User", label, "IS") for label in facts(n)])
+    return time.perf_counter() - start
+
+
+def main():
+    print(f"{'facts':>6} | {'per-item (ms)':>13} | {'bulk (ms)':>9} | {'bulk re-import (ms)':>19}")
+    for n in (100, 500, 2000):
+        with tempfile.TemporaryDirectory() as tmp:
+            slow = per_item(make_session(os.path.join(tmp, "a.db")), n)
+            db = make_session(os.path.join(tmp, "b.db"))
+            fast = bulk(db, n)
+            again = bulk(db, n) # Everything exists: existence checks only
+            print(f"{n:>6} | {slow * 1000:>13.1f} | {fast * 1000:>9.1f} | {again * 1000:>19.1f}")
+
+
+if __name__ == "__main__":
+    main()
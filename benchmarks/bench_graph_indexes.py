@@ -0,0 +1,106 @@
+"""
+Benchmark: graph lookups on a 1M-node database, before and after migration 1
+(graph indexes + unique constraints).
+
+Builds an old-schema personal_dietitian.db (no graph indexes), times the
+queries GraphService runs, applies migrate(), and times them again.
+
+Usage:
+    python benchmarks/bench_graph_indexes.py [total_nodes]
+"""
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+# Add project root to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import Session
+
+from src.db.migrations import migrate
+from src.db.models import GraphEdge, GraphNode
+from src.services.graph_db import GraphService
+
+NODES_PER_USER = 100
+SAMPLES = 20
+
+
+def build_old_schema(path: str, total_nodes: int) -> int:
+    """Users with one USER node linked to 99 FACT nodes each, as the pre-migration schema stored them."""
+    users = total_nodes // NODES_PER_USER
+    conn = sqlite3.connect(path)
+    conn.executescript("""
+        CREATE TABLE graph_nodes (id INTEGER PRIMARY KEY, user_id INTEGER, label VARCHAR, type VARCHAR, data TEXT);
+        CREATE TABLE graph_edges (id INTEGER PRIMARY KEY, source_id INTEGER, target_id INTEGER, relationship VARCHAR);
+    """)
+    conn.executemany("INSERT INTO graph_nodes (id, user_id, label, type) VALUES (?, ?, ?, ?)",
+                     ((u * NODES_PER_USER + i + 1, u, "User" if i == 0 else f"Fact {i}", "USER" if i == 0 else "FACT")
+                      for u in range(users) for i in range(NODES_PER_USER)))
+    conn.executemany("INSERT INTO graph_edges (source_id, target_id, relationship) VALUES (?, ?, 'IS')",
+                     ((u * NODES_PER_USER + 1, u * NODES_PER_USER + i + 1)
+                      for u in range(users) for i in range(1, NODES_PER_USER)))
+    conn.commit()
+    conn.close()
+    return users
+
+
+def timed(fn, samples: int = SAMPLES) -> float:
+    start = time.perf_counter()
+    for i in range(samples):
+        fn(i)
+    return (time.perf_counter() - start) / samples * 1000
+
+
+def run_queries(db: Session, users: int, migrated: bool) -> dict:
+    svc = GraphService(db)
+    step = max(1, users // SAMPLES)
+    user = lambda i: (i * step) % users
+    results = {"get_user_graph": timed(lambda i: svc.get_user_graph(user(i)))}
+    if migrated:
+        # add_node / add_edge on existing rows: INSERT ... ON CONFLICT DO NOTHING, then the lookup
+        results["add_node (dedup)"] = timed(lambda i: svc.add_node(user(i), "Fact 7"))
+        results["add_edge (dedup)"] = timed(lambda i: svc.add_edge(user(i) * NODES_PER_USER + 1,
+                                                                   user(i) * NODES_PER_USER + 8, "IS"))
+    else:
+        # The old add_node / add_edge existence checks
+        results["add_node (dedup)"] = timed(lambda i: db.execute(select(GraphNode).where(
+            GraphNode.user_id == user(i), GraphNode.label == "Fact 7")).first())
+        results["add_edge (dedup)"] = timed(lambda i: db.execute(select(GraphEdge).where(
+            GraphEdge.source_id == user(i) * NODES_PER_USER + 1, GraphEdge.target_id == user(i) * NODES_PER_USER + 8,
+            GraphEdge.relationship == "IS")).first())
+    # Each sample deletes a different fact node (and its edges)
+    offset = 50 if migrated else 60
+    results["delete_node"] = timed(lambda i: svc.delete_node(user(i) * NODES_PER_USER + offset), samples=5)
+    return results
+
+
+def main():
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "personal_dietitian.db")
+        start = time.perf_counter()
+        users = build_old_schema(path, total)
+        print(f"Built {users * NODES_PER_USER:,} nodes / {users * (NODES_PER_USER - 1):,} edges "
+              f"in {time.perf_counter() - start:.1f}s")
+
+        engine = create_engine(f"sqlite:///{path}")
+        with Session(engine) as db:
+            before = run_queries(db, users, migrated=False)
+
+        start = time.perf_counter()
+        migrate(engine)
+        print(f"Migration: {time.perf_counter() - start:.1f}s")
+
+        with Session(engine) as db:
+            after = run_queries(db, users, migrated=True)
+
+    print(f"{'query':>18} | {'before (ms)':>11} | {'after (ms)':>10}")
+    for name in before:
+        print(f"{name:>18} | {before[name]:>11.2f} | {after[name]:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Benchmark: fetching one user's graph, old IN (node_ids) query vs the
+JOIN / paginated / recursive-CTE queries in GraphService.
+
+Usage:
+    python benchmarks/bench_graph_query.py
+"""
+import os
+import sys
+import tempfile
+import time
+
+# Add project root to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from sqlalchemy import create_engine
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+from src.db.database import Base
+from src.db import models  # noqa: F401  (registers tables on Base)
+from src.db.models import GraphEdge, GraphNode
+from src.services.graph_db import GraphService
+
+
+def old_get_user_graph(db: Session, user_id: int):
+    """GraphService.get_user_graph before the query engine: node list, then IN (ids) twice."""
+    nodes = db.query(GraphNode).filter(GraphNode.user_id == user_id).all()
+    node_ids = [n.id for n in nodes]
+    edges = db.query(GraphEdge).filter(GraphEdge.source_id.in_(node_ids), GraphEdge.target_id.in_(node_ids)).all()
+    return nodes, edges
+
+
+def ms(fn) -> str:
+    start = time.perf_counter()
+    try:
+        fn()
+    except OperationalError as e:
+        return "error" if "too many SQL variables" in str(e) else "failed"
+    return f"{(time.perf_counter() - start) * 1000:.1f}"
+
+
+def main():
+    print(f"{'facts':>6} | {'old IN (ms)':>11} | {'full (ms)':>9} | {'page 500 (ms)':>13} | {'1-hop (ms)':>10} | {'2-hop food (ms)':>15}")
+    for facts in (1_000, 5_000, 20_000):
+        with tempfile.TemporaryDirectory() as tmp:
+            engine = create_engine(f"sqlite:///{os.path.join(tmp, 'graph.db')}")
+            Base.metadata.create_all(bind=engine)
+            with Session(engine) as db:
+                svc = GraphService(db)
+                # Fact nodes hang off the User node; every tenth fact also links to a food
+                nodes = [("User", "USER")] + [(f"Fact {i}", "FACT") for i in range(facts)] + \
+                        [(f"Food {i}", "FOOD") for i in range(facts // 10)]
+                edges = [("User", f"Fact {i}", "IS") for i in range(facts)] + \
+                        [(f"Fact {i * 10}", f"Food {i}", "LIKES") for i in range(facts // 10)]
+                ids = svc.upsert_subgraph(1, nodes, edges)["nodes"]
+                db.expunge_all()
+
+                old = ms(lambda: old_get_user_graph(db, 1))
+                full = ms(lambda: svc.get_user_graph(1))
+                paged = ms(lambda: svc.get_user_graph(1, limit=500))
+                one_hop = ms(lambda: svc.get_neighborhood(1, ids["User"], depth=1, limit=2000))
+                two_hop = ms(lambda: svc.get_neighborhood(1, ids["Fact 0"], depth=2, types=["FOOD"]))
+            print(f"{facts:>6} | {old:>11} | {full:>9} | {paged:>13} | {one_hop:>10} | {two_hop:>15}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Benchmark: event-loop stall from store file writes, inline vs io pool.
+
+Each scenario runs a burst of mutations from a coroutine (as a request
+handler would) while a LoopStallMonitor measures how late the loop wakes.
+"inline" writes on the loop like the old code did; "offloaded" uses the
+write-behind / run_io path.
+
+Usage:
+    python benchmarks/bench_loop_stall.py
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+# Add project root to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.memory.user_profile import UserProfileStore
+from src.rag.store import NutritionVectorStore
+from src.services.audio_cache import AudioCache
+from src.services.executors import run_io, shutdown_executors
+from src.services.loop_monitor import LoopStallMonitor
+
+MUTATIONS = 200
+
+
+async def measure(burst) -> dict:
+    monitor = LoopStallMonitor(interval=0.005)
+    monitor.start()
+    await asyncio.sleep(0.05)
+    monitor.reset()
+    start = time.perf_counter()
+    writes = await burst()
+    elapsed = time.perf_counter() - start
+    await asyncio.sleep(0.02)
+    await monitor.stop()
+    return dict(monitor.stats(), elapsed_ms=elapsed * 1000, writes=writes)
+
+
+def profile_scenario(tmp: str, inline: bool):
+    store = UserProfileStore(os.path.join(tmp, f"profile_{inline}.json"))
+    for i in range(20_000):
+        store.profile["history"].append({"date": "2026-01-01", "food": f"food {i}", "nutrients": {"calories": i % 700}})
+    sid = store.create_session("bench")
+    store.flush()
+
+    async def burst():
+        for i in range(MUTATIONS):
+            store.add_message(sid, "user", f"message {i}")
+            if inline:
+                store.flush() # Old behaviour: full JSON rewrite per mutation
+            await asyncio.sleep(0.001)
+        if not inline:
+            await run_io(store.flush)
+        return MUTATIONS if inline else store._writer.writes - 1
+    return burst
+
+
+def knowledge_scenario(tmp: str, inline: bool):
+    store = NutritionVectorStore(os.path.join(tmp, f"kb_{inline}"), compact_every=50)
+    for i in range(50_000):
+        store._apply_knowledge(f"Learned snippet {i}: food {i % 977} is a source of vitamin {i % 13}.", f"seed_{i}")
+    store.checkpoint()
+
+    async def burst():
+        checkpoints = 0
+        for i in range(MUTATIONS):
+            store.add_knowledge(f"Learned fact {i} about fiber and protein.", f"learned_{i}")
+            if inline:
+                if store.log.record_count >= store.compact_every: # Old save(): checkpoint on the caller
+                    store.checkpoint()
+                    checkpoints += 1
+            else:
+                store.save()
+            await asyncio.sleep(0.001)
+        if not inline:
+            await run_io(store.flush)
+            checkpoints = store._checkpointer.writes
+        return checkpoints
+    return burst
+
+
+def audio_scenario(tmp: str, inline: bool):
+    cache = AudioCache(os.path.join(tmp, f"audio_{inline}"), max_bytes=10**9)
+    clip = os.urandom(2 * 1024 * 1024)
+
+    async def burst():
+        for i in range(20):
+            key = AudioCache.key(f"clip {i}", "voice", "model", {})
+            if inline:
+                cache.put(key, clip)
+            else:
+                await run_io(cache.put, key, clip)
+            await asyncio.sleep(0.001)
+        return 20
+    return burst
+
+
+async def main():
+    print(f"{'scenario':>10} | {'mode':>9} | {'writes':>6} | {'p99 lag (ms)':>12} | {'max lag (ms)':>12} | {'stall total (ms)':>16}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, scenario in (("profile", profile_scenario), ("knowledge", knowledge_scenario), ("audio", audio_scenario)):
+            for inline in (True, False):
+                r = await measure(scenario(tmp, inline))
+                mode = "inline" if inline else "offloaded"
+                print(f"{name:>10} | {mode:>9} | {r['writes']:>6} | {r['p99_ms']:>12.1f} | {r['max_ms']:>12.1f} | {r['stall_ms']:>16.1f}")
+    shutdown_executors()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,43 @@
+"""
+Benchmark: NutritionVectorStore open time, JSON checkpoint vs memory-mapped snapshot.
+
+Usage:
+    python benchmarks/bench_store_open.py
+"""
+import os
+import sys
+import tempfile
+import time
+
+# Add project root to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.rag.store import NutritionVectorStore
+
+
+def main():
+    print(f"{'docs':>9} | {'json open (ms)':>14} | {'mmap open (ms)':>14} | {'mmap size (MB)':>14}")
+    for size in (10_000, 100_000, 1_000_000):
+        with tempfile.TemporaryDirectory() as tmp:
+            store = NutritionVectorStore(tmp, compact_every=10**9)
+            for i in range(size):
+                store.add_knowledge(f"Learned snippet {i}: food {i % 977} is a source of vitamin {i % 13}.", f"learned_{i}")
+
+            store.snapshot_format = "json"
+            store.checkpoint()
+            start = time.perf_counter()
+            NutritionVectorStore(tmp)
+            json_ms = (time.perf_counter() - start) * 1000
+
+            store.snapshot_format = "mmap"
+            store.checkpoint()
+            start = time.perf_counter()
+            NutritionVectorStore(tmp, snapshot_format="mmap")
+            mmap_ms = (time.perf_counter() - start) * 1000
+
+            mb = os.path.getsize(os.path.join(tmp, "nutrition_store.bin")) / 1e6
+            print(f"{size:>9} | {json_ms:>14.1f} | {mmap_ms:>14.2f} | {mb:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
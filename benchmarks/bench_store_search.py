@@ -0,0 +1,69 @@
+"""
+Benchmark: NutritionVectorStore.search (BM25 inverted index) vs the old linear scan.
+
+Usage:
+    python benchmarks/bench_store_search.py
+"""
+import os
+import random
+import sys
+import time
+
+# Add project root to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.rag.store import NutritionVectorStore
+
+STOP_WORDS = {"what", "is", "a", "an", "the", "in", "of", "for", "to", "and", "or", "are", "do", "does", "how", "much", "many", "good", "bad", "source", "sources"}
+
+FOODS = ["apple", "banana", "dragon fruit", "kale", "salmon", "tofu", "quinoa", "lentils", "almonds", "spinach",
+         "yogurt", "oats", "avocado", "broccoli", "chickpeas", "mango", "sardines", "walnuts", "beetroot", "kimchi"]
+NUTRIENTS = ["protein", "fiber", "vitamin c", "vitamin d", "iron", "calcium", "potassium", "magnesium", "omega-3", "zinc"]
+QUERIES = ["vitamin c in kale", "how much protein in salmon", "iron sources", "calories in avocado", "magnesium almonds"]
+
+
+def legacy_search(documents, query, n_results=3):
+    """The original per-document substring scan."""
+    keywords = set(query.lower().split()) - STOP_WORDS
+    if not keywords:
+        return []
+    scores = []
+    for doc in documents:
+        doc_lower = doc.lower()
+        score = sum(1 for kw in keywords if kw in doc_lower)
+        scores.append((score, doc))
+    scores.sort(key=lambda x: x[0], reverse=True)
+    return [doc for score, doc in scores[:n_results] if score > 0]
+
+
+def make_doc(rng: random.Random, i: int) -> str:
+    food = rng.choice(FOODS)
+    picks = rng.sample(NUTRIENTS, 3)
+    return (f"Learned snippet {i}: {food.title()} provides {picks[0]} and {picks[1]}, "
+            f"with smaller amounts of {picks[2]}. Batch {rng.randint(0, 10_000)}.")
+
+
+def timed(fn, repeats: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeats):
+        for q in QUERIES:
+            fn(q)
+    return (time.perf_counter() - start) / (repeats * len(QUERIES)) * 1000
+
+
+def main():
+    rng = random.Random(42)
+    print(f"{'docs':>8} | {'scan (ms)':>10} | {'bm25 (ms)':>10} | {'speedup':>8}")
+    for size in (1_000, 10_000, 100_000):
+        store = NutritionVectorStore(persist_directory=None)
+        for i in range(size):
+            store.add_knowledge(make_doc(rng, i))
+
+        repeats = max(1, 20_000 // size)
+        scan_ms = timed(lambda q: legacy_search(store.documents, q), repeats)
+        bm25_ms = timed(lambda q: store.search(q), repeats)
+        print(f"{size:>8} | {scan_ms:>10.3f} | {bm25_ms:>10.3f} | {scan_ms / bm25_ms:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Benchmark: time until audio can start playing, blocking TTS vs background
+sentence-streamed jobs, against the local stub TTS server.
+
+Usage:
+    python benchmarks/bench_voice_latency.py
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import threading
+import time
+
+# Add project root to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import uvicorn
+
+from benchmarks.stub_tts_server import app as stub_app
+
+PORT = 8765
+ANSWER = (
+    "Apples are a great everyday fruit. A medium apple has about 95 calories and 4 grams of fibre. "
+    "Most of the fibre is pectin, which feeds your gut bacteria. Eat the skin, since that is where "
+    "much of the vitamin C and polyphenols are. Pair one with a handful of nuts for a balanced snack."
+)
+
+
+def start_stub():
+    server = uvicorn.Server(uvicorn.Config(stub_app, host="127.0.0.1", port=PORT, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.01)
+    return server
+
+
+async def run():
+    from src.services.voice import VoiceService
+    from src.services.audio_jobs import AudioJobManager
+    from src.services.audio_cache import AudioCache
+
+    voice = VoiceService()
+    voice.cache = AudioCache(tempfile.mkdtemp())
+    jobs = AudioJobManager(voice)
+
+    start = time.perf_counter()
+    await voice.speak(ANSWER)
+    blocking = time.perf_counter() - start
+
+    voice.cache = AudioCache(tempfile.mkdtemp()) # Cold cache for the streamed run too
+    start = time.perf_counter()
+    job_id = jobs.submit(ANSWER)
+    submitted = time.perf_counter() - start
+    first_chunk = None
+    async for _ in jobs.stream(job_id):
+        if first_chunk is None:
+            first_chunk = time.perf_counter() - start
+    total = time.perf_counter() - start
+
+    print(f"{'mode':<22} | {'text returned (ms)':>18} | {'first audio (ms)':>16} | {'audio done (ms)':>15}")
+    print(f"{'blocking speak()':<22} | {blocking * 1000:>18.0f} | {blocking * 1000:>16.0f} | {blocking * 1000:>15.0f}")
+    print(f"{'background job':<22} | {submitted * 1000:>18.2f} | {first_chunk * 1000:>16.0f} | {total * 1000:>15.0f}")
+
+    start = time.perf_counter()
+    await voice.speak(ANSWER)
+    cached = time.perf_counter() - start
+    print(f"{'cached (repeat)':<22} | {cached * 1000:>18.2f} | {cached * 1000:>16.2f} | {cached * 1000:>15.2f}")
+    print(f"audio cache: {voice.cache_stats()}")
+
+
+def main():
+    os.environ["ELEVENLABS_BASE_URL"] = f"http://127.0.0.1:{PORT}"
+    os.environ.setdefault("ELEVENLABS_API_KEY", "stub")
+    server = start_stub()
+    try:
+        asyncio.run(run())
+    finally:
+        server.should_exit = True
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Offline evaluation of the local intent classifier (router fast path).
+
+Runs k-fold cross-validation over data/intent_examples.json and reports:
+- accuracy of the decisions made locally (rules / model)
+- share of requests that skip the LLM router
+- per-stage breakdown and average classify() latency
+- LOG false positives on held-out negatives (questions and "I had a ..."
+  statements that must not write to the food log)
+
+Usage:
+    python benchmarks/eval_intent_classifier.py [--folds 5] [--threshold 0.7]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from collections import Counter
+
+# Add project root to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.graph.intent_classifier import IntentClassifier
+
+# Not in the training examples: none of these may be logged locally
+LOG_NEGATIVES = [
+    "Have I had too much sugar today?",
+    "have I eaten enough fibre this week",
+    "I had a question about iron",
+    "I had a quick question regarding omega 3",
+    "I had a chat with my dietitian about sodium",
+    "I've had a look at the keto diet, is it healthy?",
+    "Did I drink enough water yesterday?",
+    "I just had a thought about my protein intake",
+    "I ate too much yesterday, how do I get back on track?",
+    "Add more fibre to my diet how?",
+]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--folds", type=int, default=5)
+    parser.add_argument("--threshold", type=float, default=0.7)
+    parser.add_argument("--examples", default="data/intent_examples.json")
+    args = parser.parse_args()
+
+    examples = IntentClassifier.load_examples(args.examples)
+    random.Random(0).shuffle(examples)
+
+    stages = Counter()
+    correct = Counter()
+    errors = []
+    elapsed = 0.0
+
+    for fold in range(args.folds):
+        test = examples[fold::args.folds]
+        train = [ex for i, ex in enumerate(examples) if i % args.folds != fold]
+
+        clf = IntentClassifier(model_path=None, examples_path=args.examples, threshold=args.threshold)
+        clf.train(train)
+
+        for text, label in test:
+            start = time.perf_counter()
+            decision = clf.classify(text)
+            elapsed += time.perf_counter() - start
+
+            stage = decision[2] if decision else "llm"
+            stages[stage] += 1
+            if decision and decision[0] == label:
+                correct[stage] += 1
+            elif decision:
+                errors.append((text, label, decision[0], stage))
+
+    total = sum(stages.values())
+    local = stages["rules"] + stages["model"]
+    print(f"Examples: {total} ({args.folds}-fold CV, threshold {args.threshold})")
+    for stage in ("rules", "model"):
+        if stages[stage]:
+            print(f"  {stage:<6} handled {stages[stage]:>4} ({stages[stage] / total:.1%}), "
+                  f"accuracy {correct[stage] / stages[stage]:.1%}")
+    print(f"  llm    escalated {stages['llm']:>4} ({stages['llm'] / total:.1%})")
+    print(f"Requests avoiding the LLM: {local / total:.1%}")
+    if local:
+        print(f"Local decision accuracy:   {(correct['rules'] + correct['model']) / local:.1%}")
+    print(f"Avg classify() latency:    {elapsed / total * 1e6:.0f} µs")
+
+    if errors:
+        print("\nMisclassified locally:")
+        for text, label, predicted, stage in errors:
+            print(f"  [{stage}] {text!r}: expected {label}, got {predicted}")
+
+    clf = IntentClassifier(model_path=None, examples_path=args.examples, threshold=args.threshold)
+    clf.train(examples)
+    logged = [text for text in LOG_NEGATIVES if (clf.classify(text) or ("",))[0] == "LOG"]
+    print(f"\nHeld-out LOG negatives logged locally: {len(logged)}/{len(LOG_NEGATIVES)}")
+    for text in logged:
+        print(f"  {text!r}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+Local stub of the ElevenLabs text-to-speech API.
+
+Synthesis is simulated at a fixed cost per character plus a first-byte
+delay, and the "audio" is the text it stands for padded with filler bytes,
+so voice latency (and chunk order, in tests) can be checked without an API
+key or network access.
+
+Usage:
+    python benchmarks/stub_tts_server.py --port 8765
+    ELEVENLABS_BASE_URL=http://127.0.0.1:8765 ELEVENLABS_API_KEY=stub uvicorn src.api.main:app
+"""
+import argparse
+import asyncio
+
+from fastapi import FastAPI, Request
+from fastapi.responses import Response, StreamingResponse
+
+FIRST_BYTE_DELAY = 0.15  # seconds before audio starts
+SECONDS_PER_CHAR = 0.004  # ~65 chars/s of speech synthesized per second of wall time
+BYTES_PER_CHAR = 200
+CHUNK_CHARS = 20
+
+app = FastAPI(title="Stub TTS")
+
+
+def _fake_audio(text: str) -> bytes:
+    body = b"\xff\xfb" + text.encode()
+    return body + b"\x00" * max(len(text) * BYTES_PER_CHAR - len(body), 0)
+
+
+@app.post("/v1/text-to-speech/{voice_id}")
+async def synthesize(voice_id: str, request: Request):
+    text = (await request.json()).get("text", "")
+    await asyncio.sleep(FIRST_BYTE_DELAY + len(text) * SECONDS_PER_CHAR)
+    return Response(_fake_audio(text or " "), media_type="audio/mpeg")
+
+
+@app.post("/v1/text-to-speech/{voice_id}/stream")
+async def synthesize_stream(voice_id: str, request: Request):
+    text = (await request.json()).get("text", "")
+
+    async def chunks():
+        await asyncio.sleep(FIRST_BYTE_DELAY)
+        for start in range(0, max(len(text), 1), CHUNK_CHARS):
+            piece = text[start:start + CHUNK_CHARS] or " "
+            await asyncio.sleep(len(piece) * SECONDS_PER_CHAR)
+            yield _fake_audio(piece)
+
+    return StreamingResponse(chunks(), media_type="audio/mpeg")
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+    uvicorn.run(app, host="127.0.0.1", port=args.port, log_level="warning")
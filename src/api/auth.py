@@ -1,14 +1,15 @@
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, HTTPException, status
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from pydantic import BaseModel, EmailStr
 from datetime import datetime
 import random
 import re
 
-from src.db.database import get_db
 from src.db.models import User, VerificationCode
 from src.auth.utils import get_password_hash, verify_password, create_access_token
+from src.services.executors import run_cpu, run_in_session
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 
@@ -39,63 +40,72 @@ def validate_password_strength(password: str):
 
 # Endpoints
 
+# DB work runs on the db pool and bcrypt (~0.2s of CPU per call) on the cpu pool,
+# so neither blocks the event loop (see services/executors.py)
+def _find_user(db: Session, email: str):
+    return db.query(User).filter(User.email == email).first()
+
 @router.post("/register")
-async def register(user: UserRegister, db: Session = Depends(get_db)):
+async def register(user: UserRegister):
     # 0. Validate Password
     validate_password_strength(user.password)
 
     # 1. Check if user exists
-    existing_user = db.query(User).filter(User.email == user.email).first()
+    existing_user = await run_in_session(_find_user, user.email)
     if existing_user:
         raise HTTPException(status_code=400, detail="Email already registered")
 
-    # 2. Create User (Unverified)
-    hashed_pw = get_password_hash(user.password)
-    new_user = User(email=user.email, hashed_password=hashed_pw, is_verified=False)
-    db.add(new_user)
-    db.commit()
-
-    # 3. Generate Verification Code
+    # 2. Create User (Unverified) + 3. Generate Verification Code
+    hashed_pw = await run_cpu(get_password_hash, user.password)
     code = f"{random.randint(100000, 999999)}"
-    db_code = VerificationCode(email=user.email, code=code, expires_at=datetime.utcnow())
-    db.add(db_code)
-    db.commit()
+
+    def create(db: Session):
+        db.add(User(email=user.email, hashed_password=hashed_pw, is_verified=False))
+        db.add(VerificationCode(email=user.email, code=code, expires_at=datetime.utcnow()))
+        try:
+            db.commit()
+        except IntegrityError:
+            db.rollback() # Same email registered concurrently
+            raise HTTPException(status_code=400, detail="Email already registered")
+    await run_in_session(create)
 
     # 4. Mock Email Send (Console Log)
     print(f"\n📨 [MOCK EMAIL] To: {user.email} | Code: {code}\n")
     
     return {"message": "User registered. Check console for verification code."}
 
-@router.post("/verify")
-async def verify(data: VerifyCode, db: Session = Depends(get_db)):
+def _verify_code(db: Session, email: str, code: str):
     # 1. Find Code
     record = db.query(VerificationCode).filter(
-        VerificationCode.email == data.email,
-        VerificationCode.code == data.code
+        VerificationCode.email == email,
+        VerificationCode.code == code
     ).first()
     
     if not record:
         raise HTTPException(status_code=400, detail="Invalid code")
         
     # 2. Verify User
-    user = db.query(User).filter(User.email == data.email).first()
+    user = _find_user(db, email)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
         
     user.is_verified = True
     db.delete(record) # Cleanup
     db.commit()
-    
+
+@router.post("/verify")
+async def verify(data: VerifyCode):
+    await run_in_session(_verify_code, data.email, data.code)
     return {"message": "Email verified successfully."}
 
 @router.post("/login", response_model=Token)
-async def login(user: UserLogin, db: Session = Depends(get_db)):
+async def login(user: UserLogin):
     # 1. Check User
-    db_user = db.query(User).filter(User.email == user.email).first()
+    db_user = await run_in_session(_find_user, user.email)
     if not db_user:
         raise HTTPException(status_code=400, detail="Incorrect email or password")
         
-    if not verify_password(user.password, db_user.hashed_password):
+    if not await run_cpu(verify_password, user.password, db_user.hashed_password):
         raise HTTPException(status_code=400, detail="Incorrect email or password")
         
     if not db_user.is_verified:
@@ -103,5 +113,6 @@ async def login(user: UserLogin, db: Session = Depends(get_db)):
         raise HTTPException(status_code=400, detail="Email not verified")
 
     # 2. Generate Token
-    access_token = create_access_token(data={"sub": db_user.email})
+    # uid keys the per-user profile store (see auth/dependencies.py)
+    access_token = create_access_token(data={"sub": db_user.email, "uid": db_user.id})
     return {"access_token": access_token, "token_type": "bearer"}
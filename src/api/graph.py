@@ -1,12 +1,13 @@
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
 from typing import List, Optional
 
-from src.db.database import get_db
+from src.auth.dependencies import get_current_user_id
 from src.db.models import User
 from src.services.graph_db import GraphService
+from src.services.executors import run_in_session
 
 router = APIRouter(prefix="/graph", tags=["graph"])
 
@@ -22,35 +23,83 @@ class EdgeCreate(BaseModel):
     to_id: int
     relationship: str
 
+class LabelEdge(BaseModel):
+    from_label: str
+    to_label: str
+    relationship: str
+
+class GraphBatch(BaseModel):
+    nodes: List[NodeCreate] = []
+    edges: List[LabelEdge] = [] # Endpoints by label; unknown labels become FACT nodes
+
+# GraphService is synchronous; each call runs with its own session on the db pool.
+# Every route acts on the caller's own graph (JWT user; no token -> local profile).
 @router.get("/")
-async def get_graph(user_id: int = 1, db: Session = Depends(get_db)):
-    svc = GraphService(db)
-    return svc.get_user_graph(user_id)
+async def get_graph(user_id: int = Depends(get_current_user_id), types: Optional[List[str]] = Query(None),
+                    limit: Optional[int] = None, cursor: Optional[str] = None):
+    """The user's graph; with `limit`, one page of nodes (plus their outgoing edges) per call."""
+    try:
+        return await run_in_session(lambda db: GraphService(db).get_user_graph(user_id, types, limit, cursor))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/node/{node_id}/neighbors")
+async def get_neighbors(node_id: int, user_id: int = Depends(get_current_user_id), depth: int = 1, types: Optional[List[str]] = Query(None),
+                        limit: int = 500, cursor: Optional[str] = None):
+    """Nodes within `depth` hops of a node (nearest first), paginated."""
+    try:
+        result = await run_in_session(
+            lambda db: GraphService(db).get_neighborhood(user_id, node_id, depth, types, limit, cursor))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if result is None:
+        raise HTTPException(status_code=404, detail="Node not found")
+    return result
 
 @router.post("/node")
-async def create_node(node: NodeCreate, user_id: int = 1, db: Session = Depends(get_db)):
-    svc = GraphService(db)
-    new_node = svc.add_node(user_id, node.label, node.type)
-    return {"id": new_node.id, "label": new_node.label}
+async def create_node(node: NodeCreate, user_id: int = Depends(get_current_user_id)):
+    def create(db: Session):
+        new_node = GraphService(db).add_node(user_id, node.label, node.type)
+        return {"id": new_node.id, "label": new_node.label}
+    return await run_in_session(create)
 
 @router.put("/node/{node_id}")
-async def update_node(node_id: int, node: NodeUpdate, db: Session = Depends(get_db)):
-    svc = GraphService(db)
-    updated = svc.update_node(node_id, node.label)
+async def update_node(node_id: int, node: NodeUpdate, user_id: int = Depends(get_current_user_id)):
+    def update(db: Session):
+        updated = GraphService(db).update_node(node_id, node.label, user_id)
+        return {"id": updated.id, "label": updated.label} if updated else None
+    try:
+        updated = await run_in_session(update)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     if not updated:
         raise HTTPException(status_code=404, detail="Node not found")
-    return {"status": "updated", "node": {"id": updated.id, "label": updated.label}}
+    return {"status": "updated", "node": updated}
 
 @router.delete("/node/{node_id}")
-async def delete_node(node_id: int, db: Session = Depends(get_db)):
-    svc = GraphService(db)
-    success = svc.delete_node(node_id)
+async def delete_node(node_id: int, user_id: int = Depends(get_current_user_id)):
+    success = await run_in_session(lambda db: GraphService(db).delete_node(node_id, user_id))
     if not success:
         raise HTTPException(status_code=404, detail="Node not found")
     return {"status": "deleted"}
 
 @router.post("/edge")
-async def create_edge(edge: EdgeCreate, db: Session = Depends(get_db)):
-    svc = GraphService(db)
-    created = svc.add_edge(edge.from_id, edge.to_id, edge.relationship)
+async def create_edge(edge: EdgeCreate, user_id: int = Depends(get_current_user_id)):
+    def create(db: Session):
+        svc = GraphService(db)
+        if not svc.owns_nodes(user_id, [edge.from_id, edge.to_id]):
+            return False
+        svc.add_edge(edge.from_id, edge.to_id, edge.relationship)
+        return True
+    if not await run_in_session(create):
+        raise HTTPException(status_code=404, detail="Node not found")
     return {"status": "ok"}
+
+@router.post("/batch")
+async def upsert_batch(batch: GraphBatch, user_id: int = Depends(get_current_user_id)):
+    """Merge many nodes/edges in one transaction; returns label -> node id."""
+    return await run_in_session(lambda db: GraphService(db).upsert_subgraph(
+        user_id,
+        [(n.label, n.type) for n in batch.nodes],
+        [(e.from_label, e.to_label, e.relationship) for e in batch.edges],
+    ))
@@ -1,27 +1,46 @@
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Depends
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, StreamingResponse
 from pydantic import BaseModel
-from typing import List, Optional, Dict
+from typing import List, Optional, Dict, Literal
+from datetime import date
+from contextlib import asynccontextmanager
 import sys
 import os
+import json
 
 # Add project root to path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../../")))
 
-from src.graph.workflow import create_nutrition_graph
-from src.memory.user_profile import UserProfileStore
+from src.graph.workflow import create_nutrition_graph, NutritionGraphNodes
+from src.services.registry import registry
 from src.db.database import engine
 from src.db import models
+from src.db.migrations import migrate
 from src.api.auth import router as auth_router
 from src.api.graph import router as graph_router
+from src.auth.dependencies import get_current_user_id, get_profile_store
+from src.services.executors import EXECUTORS, run_db
+from src.services.loop_monitor import loop_monitor
 
-# Init DB
+# Init DB: new tables from the models, then schema changes to existing ones
 models.Base.metadata.create_all(bind=engine)
+migrate(engine)
 
-app = FastAPI(title="Nutrition Dietitian API")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Load stores/services before the first request instead of during it
+    try:
+        timings = await registry.warm_up()
+        print("🔥 Warm-up: " + ", ".join(f"{k} {v * 1000:.0f}ms" for k, v in timings.items()))
+    except Exception as e:
+        print(f"⚠️ Warm-up failed: {e}")
+    yield
+    await registry.shutdown()
+
+app = FastAPI(title="Nutrition Dietitian API", lifespan=lifespan)
 
 # CORS
 app.add_middleware(
@@ -38,9 +57,9 @@ app.include_router(graph_router)
 
 # Initialize Graph & Memory
 try:
-    graph_app = create_nutrition_graph()
-    memory_store = UserProfileStore()
-    print("✅ Graph and Memory initialized.")
+    graph_nodes = NutritionGraphNodes() # Also drives the streaming endpoint
+    graph_app = create_nutrition_graph(graph_nodes)
+    print("✅ Graph initialized.") # Profile stores are resolved per request (get_profile_store)
 except Exception as e:
     print(f"❌ Failed to init components: {e}")
     graph_app = None
@@ -60,7 +79,8 @@ class ChatRequest(BaseModel):
 
 class ChatResponse(BaseModel):
     response_text: str
-    audio_path: Optional[str] = None
+    audio_path: Optional[str] = None # With background TTS this is the /audio/{id}/stream URL
+    audio_job_id: Optional[str] = None
     intent: Optional[str] = None
     session_id: Optional[str] = None
 
@@ -88,55 +108,79 @@ async def dashboard_page():
 
 # --- Session Endpoints ---
 @app.get("/sessions")
-async def get_sessions():
+async def get_sessions(memory_store = Depends(get_profile_store)):
     """Get list of past sessions."""
-    return memory_store.get_all_sessions()
+    return await run_db(memory_store.get_all_sessions)
+
+@app.get("/sessions/summary")
+async def get_session_summaries(limit: int = 20, cursor: Optional[str] = None,
+                                memory_store = Depends(get_profile_store)):
+    """Paginated sidebar list: id, title, timestamp, message count and last-message preview."""
+    try:
+        return await run_db(memory_store.get_session_summaries, limit, cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 @app.post("/sessions")
-async def create_session(session: SessionCreate):
+async def create_session(session: SessionCreate, memory_store = Depends(get_profile_store)):
     """Create new session."""
-    sid = memory_store.create_session(session.title)
+    sid = await run_db(memory_store.create_session, session.title)
     return {"id": sid, "title": session.title}
 
 @app.get("/sessions/{session_id}")
-async def get_session_messages(session_id: str):
+async def get_session_messages(session_id: str, memory_store = Depends(get_profile_store)):
     """Get messages for a session."""
-    msgs = memory_store.get_session_messages(session_id)
+    msgs = await run_db(memory_store.get_session_messages, session_id)
     return msgs
 
+@app.get("/sessions/{session_id}/messages")
+async def get_session_messages_page(session_id: str, limit: int = 50, before: Optional[str] = None,
+                                    memory_store = Depends(get_profile_store)):
+    """Latest messages of a session; pass next_cursor as `before` to page back in time."""
+    try:
+        return await run_db(memory_store.get_session_messages_page, session_id, limit, before)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
 # --- Chat Endpoint ---
 @app.post("/chat", response_model=ChatResponse)
-async def chat(request: ChatRequest):
+async def chat(request: ChatRequest, user_id: int = Depends(get_current_user_id),
+               memory_store = Depends(get_profile_store)):
     if not graph_app:
         raise HTTPException(status_code=500, detail="Graph not initialized")
     
     # 1. Ensure Session ID
     sid = request.session_id
     if not sid:
-        sid = memory_store.create_session(title=request.query[:30]) # Auto-title
+        sid = await run_db(memory_store.create_session, title=request.query[:30]) # Auto-title
     
     # 2. Log User Message
-    memory_store.add_message(sid, "user", request.query)
+    try:
+        await run_db(memory_store.add_message, sid, "user", request.query)
+    except PermissionError:
+        raise HTTPException(status_code=404, detail="Session not found")
     
     # 3. Extract Facts (Simple Heuristic for now)
     if "i am" in request.query.lower():
-         memory_store.save_fact(request.query)
+         await run_db(memory_store.save_fact, request.query)
 
     try:
         inputs = {
             "query": request.query,
-            "voice_enabled": request.voice_enabled
+            "voice_enabled": request.voice_enabled,
+            "user_id": user_id
         }
         result = await graph_app.invoke(inputs)
         
         response_text = result.get("response_text", "")
         
         # 4. Log Bot Message
-        memory_store.add_message(sid, "assistant", response_text)
+        await run_db(memory_store.add_message, sid, "assistant", response_text)
         
         return ChatResponse(
             response_text=response_text,
             audio_path=result.get("audio_path"),
+            audio_job_id=result.get("audio_job_id"),
             intent=result.get("intent"),
             session_id=sid
         )
@@ -144,17 +188,118 @@ async def chat(request: ChatRequest):
         print(f"Error processing chat: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+@app.post("/chat/stream")
+async def chat_stream(request: ChatRequest, user_id: int = Depends(get_current_user_id),
+                      memory_store = Depends(get_profile_store)):
+    """
+    Server-Sent Events variant of /chat. Emits `session`, `intent`, `rag`,
+    `token` (answer deltas) and finally `done` (same fields as ChatResponse).
+    """
+    if not graph_app:
+        raise HTTPException(status_code=500, detail="Graph not initialized")
+
+    sid = request.session_id
+    if not sid:
+        sid = await run_db(memory_store.create_session, title=request.query[:30]) # Auto-title
+    try:
+        await run_db(memory_store.add_message, sid, "user", request.query)
+    except PermissionError:
+        raise HTTPException(status_code=404, detail="Session not found")
+    if "i am" in request.query.lower():
+         await run_db(memory_store.save_fact, request.query)
+
+    async def events():
+        yield _sse("session", {"session_id": sid})
+        inputs = {
+            "query": request.query,
+            "voice_enabled": request.voice_enabled,
+            "user_id": user_id
+        }
+        try:
+            async for event, data in graph_nodes.stream(inputs):
+                if event != "done":
+                    yield _sse(event, data)
+                    continue
+                response_text = data.get("response_text", "")
+                await run_db(memory_store.add_message, sid, "assistant", response_text)
+                yield _sse("done", ChatResponse(
+                    response_text=response_text,
+                    audio_path=data.get("audio_path"),
+                    audio_job_id=data.get("audio_job_id"),
+                    intent=data.get("intent"),
+                    session_id=sid
+                ).model_dump())
+        except Exception as e:
+            print(f"Error streaming chat: {e}")
+            yield _sse("error", {"detail": str(e)})
+
+    # X-Accel-Buffering stops nginx from holding the stream back
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+# --- Audio Endpoints ---
+@app.get("/audio/{job_id}")
+async def get_audio_job(job_id: str):
+    """Status of a background TTS job; audio_path is set once the MP3 is saved."""
+    status = registry.get("audio_jobs").status(job_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail="Audio job not found")
+    return status
+
+@app.get("/audio/{job_id}/stream")
+async def stream_audio(job_id: str):
+    """MP3 stream of a TTS job, sentence by sentence while it is still being synthesized."""
+    audio_jobs = registry.get("audio_jobs")
+    if audio_jobs.get(job_id) is None:
+        raise HTTPException(status_code=404, detail="Audio job not found")
+    return StreamingResponse(audio_jobs.stream(job_id), media_type="audio/mpeg",
+                             headers={"Cache-Control": "no-cache"})
+
+@app.get("/cache/stats")
+async def cache_stats():
+    """Hit/miss counters for the LLM, Serper and TTS audio caches."""
+    return {
+        "llm": registry.get("spoon").cache_stats(),
+        "serper": registry.get("serper").cache.stats(),
+        "audio": registry.get("voice").cache_stats(),
+    }
+
+
+@app.get("/loop/stats")
+async def loop_stats():
+    """Event-loop lag (how long requests were frozen by blocking work) and executor queues."""
+    return {
+        "loop": loop_monitor.stats(),
+        "executors": {name: executor.stats() for name, executor in EXECUTORS.items()},
+    }
+
 @app.get("/history", response_model=List[HistoryItem])
-async def get_history():
+async def get_history(memory_store = Depends(get_profile_store)):
     try:
-        today_logs = memory_store.get_today_log()
+        today_logs = await run_db(memory_store.get_today_log)
         return today_logs
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/log", response_model=List[HistoryItem])
+async def get_log(start: Optional[date] = None, end: Optional[date] = None,
+                  memory_store = Depends(get_profile_store)):
+    """Food log entries between start and end (inclusive; default last 7 days)."""
+    return await run_db(memory_store.get_log, start, end)
+
+@app.get("/log/totals")
+async def get_log_totals(start: Optional[date] = None, end: Optional[date] = None,
+                         period: Literal["day", "week", "month"] = "day",
+                         memory_store = Depends(get_profile_store)):
+    """Nutrient totals per day/week/month between start and end (days without logs are omitted)."""
+    return await run_db(memory_store.get_daily_totals, start, end, period)
+
 @app.get("/favorites")
-async def get_favorites():
-    return {"favorites": memory_store.get_favorites()}
+async def get_favorites(memory_store = Depends(get_profile_store)):
+    return {"favorites": await run_db(memory_store.get_favorites)}
 
 if __name__ == "__main__":
     import uvicorn
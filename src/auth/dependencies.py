@@ -0,0 +1,41 @@
+from fastapi import Depends, Header, HTTPException, status
+from functools import lru_cache
+from typing import Optional
+
+from src.auth.utils import decode_access_token
+from src.services.registry import registry
+
+LOCAL_USER_ID = 0 # Requests without a token use the account-less local profile
+
+
+@lru_cache(maxsize=4096)
+def _user_id_for_email(email: str) -> Optional[int]:
+    # Tokens issued before "uid" was added only carry the email
+    from src.db.database import SessionLocal
+    from src.db.models import User
+    with SessionLocal() as db:
+        user = db.query(User).filter(User.email == email).first()
+        return user.id if user else None
+
+
+def get_current_user_id(authorization: Optional[str] = Header(None)) -> int:
+    """User ID from a `Bearer <jwt>` header; no header -> local profile, bad token -> 401."""
+    if not authorization:
+        return LOCAL_USER_ID
+    scheme, _, token = authorization.partition(" ")
+    claims = decode_access_token(token) if scheme.lower() == "bearer" else None
+    if claims is None:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid or expired token",
+                            headers={"WWW-Authenticate": "Bearer"})
+    user_id = claims.get("uid")
+    if user_id is None and claims.get("sub"):
+        user_id = _user_id_for_email(claims["sub"])
+    if user_id is None:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Unknown user",
+                            headers={"WWW-Authenticate": "Bearer"})
+    return int(user_id)
+
+
+def get_profile_store(user_id: int = Depends(get_current_user_id)):
+    """The calling user's profile store (hot ones come from the in-memory LRU)."""
+    return registry.get("profile_stores").for_user(user_id)
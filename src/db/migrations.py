@@ -0,0 +1,119 @@
+"""
+Schema Migrations
+
+create_all() only creates missing tables; it never adds an index or
+constraint to a table that already exists. Changes like that are
+registered here as numbered, forward-only migrations and applied at
+startup to existing personal_dietitian.db files. The last applied number
+is kept in SQLite's `PRAGMA user_version`.
+
+Each migration runs in its own transaction and must be idempotent
+(IF NOT EXISTS, dedupe-then-constrain): a fresh database already has
+everything create_all() builds from the models, and a run that dies
+half-way is simply re-applied.
+"""
+from typing import Callable, List, Tuple
+
+from sqlalchemy.engine import Connection
+
+from .database import engine
+
+MIGRATIONS: List[Tuple[int, str, Callable[[Connection], None]]] = []
+
+
+def migration(version: int, name: str):
+    def register(fn: Callable[[Connection], None]):
+        MIGRATIONS.append((version, name, fn))
+        MIGRATIONS.sort(key=lambda m: m[0])
+        return fn
+    return register
+
+
+def current_version(conn: Connection) -> int:
+    return conn.exec_driver_sql("PRAGMA user_version").scalar()
+
+
+def migrate(bind=engine) -> List[int]:
+    """Apply pending migrations in order. Returns the versions applied."""
+    applied = []
+    for version, name, fn in MIGRATIONS:
+        with bind.begin() as conn:
+            if version <= current_version(conn):
+                continue
+            fn(conn)
+            conn.exec_driver_sql(f"PRAGMA user_version = {int(version)}")
+        applied.append(version)
+        print(f"🛠️ Applied migration {version}: {name}")
+    return applied
+
+
+@migration(1, "graph indexes and unique constraints")
+def _graph_indexes(conn: Connection):
+    # Merge duplicate (user_id, label) nodes into the oldest one, repointing their edges
+    conn.exec_driver_sql("DROP TABLE IF EXISTS temp.node_dupes") # Left over on a pooled connection by a failed run
+    conn.exec_driver_sql("""
+        CREATE TEMP TABLE node_dupes AS
+        SELECT n.id AS id, k.keep AS keep
+        FROM graph_nodes n
+        JOIN (SELECT user_id, label, MIN(id) AS keep FROM graph_nodes
+              GROUP BY user_id, label HAVING COUNT(*) > 1) k
+          ON n.user_id = k.user_id AND n.label = k.label
+        WHERE n.id <> k.keep
+    """)
+    conn.exec_driver_sql("CREATE INDEX temp.ix_node_dupes ON node_dupes (id)")
+    for col in ("source_id", "target_id"):
+        conn.exec_driver_sql(f"""
+            UPDATE graph_edges SET {col} = (SELECT keep FROM node_dupes WHERE id = graph_edges.{col})
+            WHERE {col} IN (SELECT id FROM node_dupes)
+        """)
+    conn.exec_driver_sql("DELETE FROM graph_nodes WHERE id IN (SELECT id FROM node_dupes)")
+    conn.exec_driver_sql("DROP TABLE node_dupes")
+
+    # Then duplicate edges (including ones the merge just created)
+    conn.exec_driver_sql("""
+        DELETE FROM graph_edges WHERE id NOT IN
+            (SELECT MIN(id) FROM graph_edges GROUP BY source_id, target_id, relationship)
+    """)
+
+    conn.exec_driver_sql("CREATE UNIQUE INDEX IF NOT EXISTS uq_graph_nodes_user_label ON graph_nodes (user_id, label)")
+    conn.exec_driver_sql("CREATE UNIQUE INDEX IF NOT EXISTS uq_graph_edges_src_tgt_rel "
+                         "ON graph_edges (source_id, target_id, relationship)")
+    conn.exec_driver_sql("CREATE INDEX IF NOT EXISTS ix_graph_edges_target ON graph_edges (target_id)")
+
+
+@migration(2, "move local-profile graph facts from user 1 to user 0")
+def _local_graph_user(conn: Connection):
+    # The local profile used to write its facts as graph user 1; it is user 0 now.
+    # If user 1 is a real account those nodes are (or may be) its own, so leave them
+    has_users = conn.exec_driver_sql(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'users'").first()
+    if has_users and conn.exec_driver_sql("SELECT 1 FROM users WHERE id = 1").first():
+        return
+
+    # A label user 0 already has: fold user 1's node into it, repointing its edges
+    conn.exec_driver_sql("DROP TABLE IF EXISTS temp.node_moves")
+    conn.exec_driver_sql("""
+        CREATE TEMP TABLE node_moves AS
+        SELECT old.id AS id, keep.id AS keep
+        FROM graph_nodes old
+        JOIN graph_nodes keep ON keep.user_id = 0 AND keep.label = old.label
+        WHERE old.user_id = 1
+    """)
+    conn.exec_driver_sql("CREATE INDEX temp.ix_node_moves ON node_moves (id)")
+    # Repointed edges can duplicate user 0's own: lift the constraint, merge, dedupe, restore
+    conn.exec_driver_sql("DROP INDEX IF EXISTS uq_graph_edges_src_tgt_rel")
+    for col in ("source_id", "target_id"):
+        conn.exec_driver_sql(f"""
+            UPDATE graph_edges SET {col} = (SELECT keep FROM node_moves WHERE id = graph_edges.{col})
+            WHERE {col} IN (SELECT id FROM node_moves)
+        """)
+    conn.exec_driver_sql("DELETE FROM graph_nodes WHERE id IN (SELECT id FROM node_moves)")
+    conn.exec_driver_sql("DROP TABLE node_moves")
+    conn.exec_driver_sql("""
+        DELETE FROM graph_edges WHERE id NOT IN
+            (SELECT MIN(id) FROM graph_edges GROUP BY source_id, target_id, relationship)
+    """)
+    conn.exec_driver_sql("CREATE UNIQUE INDEX IF NOT EXISTS uq_graph_edges_src_tgt_rel "
+                         "ON graph_edges (source_id, target_id, relationship)")
+
+    conn.exec_driver_sql("UPDATE graph_nodes SET user_id = 0 WHERE user_id = 1")
@@ -1,5 +1,5 @@
 
-from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, DateTime, Text
+from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, DateTime, Text, Index, UniqueConstraint
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from .database import Base
@@ -26,6 +26,10 @@ class VerificationCode(Base):
 
 class GraphNode(Base):
     __tablename__ = "graph_nodes"
+    __table_args__ = (
+        # One node per label per user; also serves user_id-only lookups (leading column)
+        Index("uq_graph_nodes_user_label", "user_id", "label", unique=True),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"))
@@ -37,6 +41,11 @@ class GraphNode(Base):
 
 class GraphEdge(Base):
     __tablename__ = "graph_edges"
+    __table_args__ = (
+        # Dedup key; also serves source_id lookups
+        Index("uq_graph_edges_src_tgt_rel", "source_id", "target_id", "relationship", unique=True),
+        Index("ix_graph_edges_target", "target_id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     source_id = Column(Integer, ForeignKey("graph_nodes.id"))
@@ -45,8 +54,80 @@ class GraphEdge(Base):
 
 class ChatSession(Base):
     __tablename__ = "chat_sessions"
+    __table_args__ = (
+        Index("ix_chat_sessions_user_created", "user_id", "created_at"),
+    )
     
     id = Column(String, primary_key=True, index=True) # UUID
     user_id = Column(Integer, ForeignKey("users.id"))
     title = Column(String)
     created_at = Column(DateTime, default=datetime.utcnow)
+    # Sidebar summary, maintained by add_message so listing never touches chat_messages
+    message_count = Column(Integer, default=0)
+    last_message_at = Column(DateTime, nullable=True)
+    last_message_preview = Column(String, nullable=True)
+
+# --- User profile (see memory/sql_profile_store.py) ---
+# user_id 0 is the local single-user profile (no account)
+
+class ChatMessage(Base):
+    __tablename__ = "chat_messages"
+    __table_args__ = (
+        Index("ix_chat_messages_session", "session_id", "id"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    session_id = Column(String, ForeignKey("chat_sessions.id"), nullable=False)
+    role = Column(String) # "user" / "assistant"
+    content = Column(Text)
+    timestamp = Column(DateTime, default=datetime.now)
+
+class FoodLog(Base):
+    __tablename__ = "food_logs"
+    __table_args__ = (
+        Index("ix_food_logs_user_date", "user_id", "date"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, nullable=False, default=0)
+    date = Column(String(10), nullable=False) # ISO "YYYY-MM-DD", sorts chronologically
+    timestamp = Column(DateTime, default=datetime.now)
+    food = Column(String)
+    nutrients = Column(Text) # JSON string
+
+class DailyFoodTotal(Base):
+    """Per-user, per-day nutrient totals, updated with every food_logs insert."""
+    __tablename__ = "food_daily_totals"
+
+    user_id = Column(Integer, primary_key=True)
+    date = Column(String(10), primary_key=True) # ISO "YYYY-MM-DD"
+    entries = Column(Integer, nullable=False, default=0)
+    totals = Column(Text) # JSON {nutrient: sum}
+
+class UserFact(Base):
+    __tablename__ = "user_facts"
+    __table_args__ = (
+        UniqueConstraint("user_id", "fact", name="uq_user_facts_user_fact"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, nullable=False, default=0)
+    fact = Column(Text, nullable=False)
+    created_at = Column(DateTime, default=datetime.now)
+
+class FavoriteFood(Base):
+    __tablename__ = "favorite_foods"
+    __table_args__ = (
+        UniqueConstraint("user_id", "food", name="uq_favorite_foods_user_food"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, nullable=False, default=0)
+    food = Column(String, nullable=False)
+
+class ProfileSetting(Base):
+    __tablename__ = "profile_settings"
+
+    user_id = Column(Integer, primary_key=True)
+    key = Column(String, primary_key=True) # "name", "preferences", "migrated_from"
+    value = Column(Text) # JSON string
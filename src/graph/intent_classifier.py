@@ -0,0 +1,201 @@
+"""
+Local Intent Classifier (Router Fast Path)
+
+Decides LOG / SHOP / EAT / ASK / CHAT without an LLM round trip when it
+is confident, and returns None otherwise so the router can escalate.
+
+Two stages:
+1. Rules - unambiguous keyword patterns. Exactly one intent firing wins
+   (LOG also needs the model to agree, see below).
+2. Linear model - softmax regression over hashed character n-grams and
+   words, trained on data/intent_examples.json. Weights are persisted to
+   data/intent_model.npz and retrained automatically if missing or stale.
+   Its top intent is accepted at >= threshold when no rule fired, or when
+   several fired and it picks one of them; otherwise the query escalates.
+
+LOG writes to the user's food log, so it is only decided locally when a
+LOG rule fired on a statement (never a question) and the model's top
+intent is LOG as well; anything less goes to the LLM router.
+"""
+import json
+import os
+import re
+import zlib
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+INTENTS = ["LOG", "SHOP", "EAT", "ASK", "CHAT"]
+
+# "I had a question / a chat with ..." is not something eaten
+_NOT_FOOD = (r"(?!\s+(a\s+|an\s+|the\s+|my\s+|some\s+)?([a-z]+\s+)?(question|query|doubt|chat|talk|conversation|look|think|thought|"
+             r"problem|issue|idea|feeling|go|try|word|meeting|call|appointment|test|check|checkup|session|workout|run)s?\b)")
+
+RULES = {
+    # Anchored to the start of a statement; question forms are excluded in rule_intents()
+    "LOG": [
+        r"^(i\s+)?(just\s+)?(ate|had|drank|snacked|consumed|finished)\b" + _NOT_FOOD,
+        r"^i('ve|\s+have)?\s+(just\s+)?(eaten|drunk|had)\b" + _NOT_FOOD,
+        r"^(add|log|track|record)\b",
+    ],
+    "SHOP": [
+        r"\b(buy|purchase|groceries|grocery|supermarkets?|tesco|sainsbury'?s?|aldi|lidl|asda|waitrose|morrisons)\b",
+        r"\bwhere (can|do) (i|you|they) (buy|get|sell)\b",
+    ],
+    "EAT": [
+        r"\b(restaurants?|takeaway|brunch|cafe|diner|book a table|places to eat)\b",
+        r"\bwhere (should|can|to) (i |we )?eat\b",
+    ],
+    "ASK": [
+        r"^(how|what|is|are|does|do|should|can|which|why)\b.*\b(calories|nutrition|protein|vitamins?|minerals?|fibre|fiber|sugar|fat|carbs?|iron|calcium|zinc|healthy|good for|bad for|benefits?)\b",
+        r"\b(calories|nutrition facts|nutritional value) (in|of|for)\b",
+    ],
+    "CHAT": [
+        r"^(hi|hello|hey|hiya|sup|thanks|thank you|cheers|bye|goodbye|good (morning|evening|night))\b[\w\s!,.']{0,20}$",
+    ],
+}
+_COMPILED_RULES = {intent: [re.compile(p) for p in patterns] for intent, patterns in RULES.items()}
+
+# Trailing "?", a wh-word / auxiliary opener, or "have I ..." style inversion
+_QUESTION = re.compile(r"\?\s*$|^(how|what|when|where|which|who|why|is|are|am|was|were|do|does|did|"
+                       r"can|could|should|would|will|shall|may|might)\b|^(have|has|had)\s+(i|you|we|they|he|she)\b")
+
+
+def _normalize(text: str) -> str:
+    return " ".join(text.lower().strip().split())
+
+
+class IntentClassifier:
+    def __init__(self, model_path: Optional[str] = "data/intent_model.npz",
+                 examples_path: str = "data/intent_examples.json",
+                 threshold: float = 0.7, dim: int = 2 ** 14):
+        self.model_path = model_path
+        self.examples_path = examples_path
+        self.threshold = threshold
+        self.dim = dim
+        self.weights: Optional[np.ndarray] = None  # (dim, n_intents)
+        self.bias: Optional[np.ndarray] = None
+
+        if not self._load():
+            examples = self.load_examples(examples_path)
+            if examples:
+                self.train(examples)
+                self.save()
+
+    # --- Features ---
+    def _features(self, text: str) -> List[int]:
+        text = _normalize(text)
+        feats = [f"w:{w}" for w in re.findall(r"[a-z0-9']+", text)]
+        padded = f" {text} "
+        for n in (2, 3, 4):
+            feats.extend(f"c{n}:{padded[i:i + n]}" for i in range(len(padded) - n + 1))
+        return [zlib.crc32(f.encode("utf-8")) % self.dim for f in feats]
+
+    def _featurize(self, texts: List[str]) -> np.ndarray:
+        X = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            idx = self._features(text)
+            np.add.at(X[row], idx, 1.0)
+            X[row] /= max(np.linalg.norm(X[row]), 1.0)
+        return X
+
+    # --- Training ---
+    @staticmethod
+    def load_examples(path: str) -> List[Tuple[str, str]]:
+        """{"LOG": ["I ate an apple", ...], ...} -> [(text, intent), ...]"""
+        if not os.path.exists(path):
+            return []
+        with open(path, "r") as f:
+            data = json.load(f)
+        return [(text, intent) for intent, texts in data.items() for text in texts]
+
+    def train(self, examples: List[Tuple[str, str]], epochs: int = 300, lr: float = 2.0, l2: float = 1e-4):
+        """Full-batch softmax regression. A few hundred examples train in well under a second."""
+        X = self._featurize([text for text, _ in examples])
+        y = np.array([INTENTS.index(intent) for _, intent in examples])
+        Y = np.eye(len(INTENTS), dtype=np.float32)[y]
+
+        W = np.zeros((self.dim, len(INTENTS)), dtype=np.float32)
+        b = np.zeros(len(INTENTS), dtype=np.float32)
+        for _ in range(epochs):
+            logits = X @ W + b
+            logits -= logits.max(axis=1, keepdims=True)
+            probs = np.exp(logits)
+            probs /= probs.sum(axis=1, keepdims=True)
+            grad = (probs - Y) / len(X)
+            W -= lr * (X.T @ grad + l2 * W)
+            b -= lr * grad.sum(axis=0)
+        self.weights, self.bias = W, b
+
+    def save(self):
+        if not self.model_path or self.weights is None:
+            return
+        # Only the touched rows are stored; the rest of W is zero
+        rows = np.nonzero(np.any(self.weights != 0, axis=1))[0]
+        np.savez(self.model_path, rows=rows, weights=self.weights[rows], bias=self.bias,
+                 dim=np.int64(self.dim), intents=np.array(INTENTS), examples_mtime=np.float64(self._examples_mtime()))
+
+    def _examples_mtime(self) -> float:
+        return os.path.getmtime(self.examples_path) if os.path.exists(self.examples_path) else 0.0
+
+    def _load(self) -> bool:
+        if not self.model_path or not os.path.exists(self.model_path):
+            return False
+        try:
+            with np.load(self.model_path) as data:
+                if int(data["dim"]) != self.dim or list(data["intents"]) != INTENTS:
+                    return False
+                if float(data["examples_mtime"]) < self._examples_mtime():
+                    return False # Examples edited since training
+                W = np.zeros((self.dim, len(INTENTS)), dtype=np.float32)
+                W[data["rows"]] = data["weights"]
+                self.weights, self.bias = W, data["bias"]
+            return True
+        except Exception as e:
+            print(f"⚠️ Could not load intent model: {e}")
+            return False
+
+    # --- Inference ---
+    def rule_intents(self, query: str) -> List[str]:
+        text = _normalize(query)
+        fired = [intent for intent, patterns in _COMPILED_RULES.items() if any(p.search(text) for p in patterns)]
+        if "LOG" in fired and _QUESTION.search(text):
+            fired.remove("LOG") # "Have I had too much sugar?" asks, it doesn't log
+        return fired
+
+    def predict_proba(self, query: str) -> Dict[str, float]:
+        if self.weights is None:
+            return {}
+        # Sparse version of _featurize: only the hashed buckets this query touches
+        idx, counts = np.unique(self._features(query), return_counts=True)
+        values = counts / max(np.linalg.norm(counts), 1.0)
+        logits = values @ self.weights[idx] + self.bias
+        logits -= logits.max()
+        probs = np.exp(logits)
+        probs /= probs.sum()
+        return dict(zip(INTENTS, probs.tolist()))
+
+    def classify(self, query: str) -> Optional[Tuple[str, float, str]]:
+        """
+        Returns (intent, confidence, "rules" | "model"), or None when the
+        query is ambiguous and should go to the LLM router.
+
+        The model decides alone when no rule fired; when rules conflict it
+        can only break the tie between the intents that fired. LOG needs
+        both a LOG rule and the model's top intent.
+        """
+        fired = self.rule_intents(query)
+        if len(fired) == 1 and fired[0] != "LOG":
+            return fired[0], 1.0, "rules"
+
+        probs = self.predict_proba(query)
+        if not probs:
+            return None
+        intent = max(probs, key=probs.get)
+        if fired == ["LOG"]:
+            return ("LOG", 1.0, "rules") if intent == "LOG" else None
+        if intent == "LOG" and "LOG" not in fired:
+            return None
+        if probs[intent] >= self.threshold and (not fired or intent in fired):
+            return intent, probs[intent], "model"
+        return None
@@ -1,43 +1,65 @@
 
-from typing import Dict, TypedDict, Any
+from typing import Any, AsyncIterator, Dict, Tuple, TypedDict
 from spoon_ai.graph import StateGraph, START, END
 # Updated Tools
-from src.rag.universal_rag import UniversalNutritionRag
 from src.tools.shopping_tool import ShoppingTool
 from src.tools.restaurant_tool import RestaurantTool
-from src.memory.user_profile import UserProfileStore
-from src.services.voice import VoiceService
-# Spoon Service
-from src.services.spoon_service import SpoonService
+# Shared stores/services
+from src.services.registry import registry
+from src.services.executors import run_db
 
 import os
+import re
 import asyncio
 import json
 
+# Intents whose processing node needs an extracted entity
+ENTITY_INTENTS = ("LOG", "SHOP", "EAT")
+
+ASK_FALLBACK = "I apologize, but I'm having trouble retrieving that information right now. Could you rephrase?"
+
 # Define State
 class NutritionState(TypedDict):
     query: str
     response_text: str
     audio_path: str | None
+    audio_job_id: str | None # Background TTS job (see services/audio_jobs.py)
     error: str | None
     intent: str | None # ASK, SHOP, EAT, LOG
+    entity: str | None # Food / product / cuisine pulled out by the router (LOG, SHOP, EAT)
     voice_enabled: bool # Toggle for voice output
+    user_id: int | None # Authenticated user (None/0 -> local profile)
 
 # Define Nodes
 class NutritionGraphNodes:
     def __init__(self):
         # Universal RAG replaces Smart/Dietary tools
-        self.rag = UniversalNutritionRag()
+        self.rag = registry.get("universal_rag")
         self.shop_tool = ShoppingTool()
         self.eat_tool = RestaurantTool()
-        self.memory = UserProfileStore()
-        self.voice = VoiceService()
-        self.spoon = SpoonService.get_instance() # Singleton
+        self.profiles = registry.get("profile_stores") # Per-user stores, shared with the API
+        self.voice = registry.get("voice")
+        self.audio_jobs = registry.get("audio_jobs")
+        self.spoon = registry.get("spoon") # Singleton
+        self.intent_classifier = registry.get("intent_classifier") # Local fast path (False if disabled)
         
     async def route_query(self, state: NutritionState) -> Dict[str, Any]:
         """Node 0: Router - Decide intent"""
         query = state["query"]
+
+        # Confident local decisions skip the LLM round trip entirely
+        if self.intent_classifier:
+            local = self.intent_classifier.classify(query)
+            if local:
+                intent = local[0]
+                return {"intent": "ASK" if intent == "CHAT" else intent}
         
+        # Structured mode: intent + entity in one round trip (ROUTER_MODE=text restores the old 2-call flow)
+        if os.getenv("ROUTER_MODE", "structured") != "text":
+            routed = await self._route_structured(query)
+            if routed:
+                return routed
+
         prompt = f"""
         Classify this query: "{query}"
         Output ONLY one word:
@@ -47,7 +69,7 @@ class NutritionGraphNodes:
         - "ASK" if asking questions (e.g. "Apple calories", "Is Keto good?").
         - "CHAT" for greetings.
         """
-        response = await self.spoon.chat([{"role": "user", "content": prompt}], model="gpt-4o-mini")
+        response = await self.spoon.chat([{"role": "user", "content": prompt}], model="gpt-4o-mini", cache_tag="router")
         intent = response.strip().upper()
         
         # Cleanup
@@ -58,55 +80,156 @@ class NutritionGraphNodes:
                     return {"intent": v}
         return {"intent": "ASK"} # Default fallback
 
+    async def _route_structured(self, query: str) -> Dict[str, Any] | None:
+        """
+        Single LLM call returning {"intent": ..., "entity": ...}.
+        Returns None if the reply isn't valid JSON so the caller can fall back to the plain router.
+        """
+        prompt = f"""
+        Classify this query and extract its subject: "{query}"
+        Reply with ONLY a JSON object: {{"intent": "<INTENT>", "entity": "<ENTITY or null>"}}
+        Intents:
+        - "LOG" if user says they ate something (e.g. "I ate an apple", "Add burger"). entity = the food name.
+        - "SHOP" if user wants to buy food (e.g. "Buy noodles", "Tesco nearby"). entity = the product name.
+        - "EAT" if user wants restaurant (e.g. "Suggest dinner", "Vegan restaurants"). entity = the cuisine or restaurant type.
+        - "ASK" if asking questions (e.g. "Apple calories", "Is Keto good?"). entity = null.
+        - "CHAT" for greetings. entity = null.
+        """
+        response = await self.spoon.chat([{"role": "user", "content": prompt}], model="gpt-4o-mini", cache_tag="router_structured")
+        return self._parse_route(response)
+
+    @staticmethod
+    def _parse_route(response: str) -> Dict[str, Any] | None:
+        """Validate the structured router reply. Tolerates ```json fences and surrounding text."""
+        match = re.search(r"\{.*\}", response or "", re.DOTALL)
+        if not match:
+            return None
+        try:
+            data = json.loads(match.group(0))
+        except json.JSONDecodeError:
+            return None
+        if not isinstance(data, dict):
+            return None
+
+        intent = str(data.get("intent", "")).strip().upper()
+        if intent not in ("LOG", "SHOP", "EAT", "ASK", "CHAT"):
+            return None
+        if intent == "CHAT":
+            intent = "ASK"
+
+        entity = data.get("entity")
+        if intent not in ENTITY_INTENTS or not isinstance(entity, str):
+            entity = None
+        else:
+            entity = entity.strip().strip("\"'").strip()[:100] or None
+        return {"intent": intent, "entity": entity}
+
+    async def _entity(self, state: NutritionState, prompt: str, cache_tag: str) -> str:
+        """Entity from the structured router, or a dedicated extraction call (local-classifier / text-router path)."""
+        entity = state.get("entity")
+        if entity:
+            return entity
+        response = await self.spoon.chat([{"role": "user", "content": prompt}], cache_tag=cache_tag)
+        return response.strip()
+
     async def process_log(self, state: NutritionState) -> Dict[str, Any]:
         """Node: Log Food"""
         query = state["query"]
         prompt = f"Extract the food name from: '{query}'. Output ONLY the name."
-        food_name = await self.spoon.chat([{"role": "user", "content": prompt}])
-        food_name = food_name.strip()
+        food_name = await self._entity(state, prompt, "extract_log")
         
-        self.memory.log_food(food_name, {"source": "user_input"})
+        user_id = state.get("user_id")
+        await run_db(lambda: self.profiles.for_user(user_id).log_food(food_name, {"source": "user_input"}))
         return {"response_text": f"Tracking: I've logged **{food_name}** to your daily intake."}
 
     async def process_shop(self, state: NutritionState) -> Dict[str, Any]:
         """Node: Shopping"""
         prompt = f"Extract the product to buy from: '{state['query']}'. Output ONLY the product name."
-        product = await self.spoon.chat([{"role": "user", "content": prompt}])
+        product = await self._entity(state, prompt, "extract_shop")
         
-        response = await self.shop_tool.execute(product.strip())
+        response = await self.shop_tool.execute(product)
         return {"response_text": response}
 
     async def process_eat(self, state: NutritionState) -> Dict[str, Any]:
         """Node: Restaurant"""
         prompt = f"Extract the cuisine or restaurant type from: '{state['query']}'. Output ONLY the type."
-        cuisine = await self.spoon.chat([{"role": "user", "content": prompt}])
+        cuisine = await self._entity(state, prompt, "extract_eat")
         
-        response = await self.eat_tool.execute(cuisine.strip())
+        response = await self.eat_tool.execute(cuisine)
         return {"response_text": response}
 
-    async def process_ask(self, state: NutritionState) -> Dict[str, Any]:
-        """Node: Universal RAG (Facts + Advice)"""
-        try:
-            # 1. Get Raw Fact (Optimize latency here if possible)
-            raw_data = await self.rag.search(state["query"])
-            
-            # 2. Humanize
-            prompt = f"""
+    @staticmethod
+    def _humanize_messages(query: str, raw_data: Any) -> list:
+        # Shared by process_ask and stream() so both hit the same cache entry
+        prompt = f"""
             You are EatWise, a sophisticated, highly knowledgeable clinical nutritionist.
             
-            User Query: "{state['query']}"
+            User Query: "{query}"
             Found Information: "{raw_data}"
             
             Task: Synthesize a helpful, warm response. 
             - Use short paragraphs and markdown.
             - Be encouraging but scientific.
             """
+        return [{"role": "user", "content": prompt}]
+
+    @staticmethod
+    def _semantic_text(query: str, raw_data: Any) -> str:
+        # Only the variable part of the humanize prompt is embedded for the semantic cache tier
+        return f"{query}\n{raw_data}"
+
+    async def process_ask(self, state: NutritionState) -> Dict[str, Any]:
+        """Node: Universal RAG (Facts + Advice)"""
+        try:
+            # 1. Get Raw Fact (Optimize latency here if possible)
+            raw_data = await self.rag.search(state["query"])
             
-            response = await self.spoon.chat([{"role": "user", "content": prompt}])
+            # 2. Humanize
+            messages = self._humanize_messages(state["query"], raw_data)
+            response = await self.spoon.chat(messages, cache_tag="humanize",
+                                             semantic_text=self._semantic_text(state["query"], raw_data))
             return {"response_text": response}
             
         except Exception as e:
-            return {"response_text": "I apologize, but I'm having trouble retrieving that information right now. Could you rephrase?", "error": str(e)}
+            return {"response_text": ASK_FALLBACK, "error": str(e)}
+
+    async def stream(self, state: NutritionState) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+        """
+        Streaming counterpart of the compiled graph: yields (event, data) as each
+        stage finishes - "intent", then "rag" + "token"* for ASK, then "done"
+        with the final state. LOG/SHOP/EAT answers arrive as a single "token".
+        """
+        state = dict(state)
+        state.update(await self.route_query(state))
+        intent = state.get("intent") or "ASK"
+        yield "intent", {"intent": intent, "entity": state.get("entity")}
+
+        if intent == "ASK":
+            parts = []
+            try:
+                raw_data = await self.rag.search(state["query"])
+                yield "rag", {"result": raw_data}
+                messages = self._humanize_messages(state["query"], raw_data)
+                async for delta in self.spoon.chat_stream(messages, cache_tag="humanize",
+                                                          semantic_text=self._semantic_text(state["query"], raw_data)):
+                    parts.append(delta)
+                    yield "token", {"text": delta}
+                state["response_text"] = "".join(parts)
+            except Exception as e:
+                # Tokens already sent stay sent; the fallback only replaces an empty answer
+                state["error"] = str(e)
+                if not parts:
+                    state["response_text"] = ASK_FALLBACK
+                    yield "token", {"text": ASK_FALLBACK}
+                else:
+                    state["response_text"] = "".join(parts)
+        else:
+            node = getattr(self, f"process_{intent.lower()}")
+            state.update(await node(state))
+            yield "token", {"text": state.get("response_text", "")}
+
+        state.update(await self.generate_voice(state))
+        yield "done", state
 
     async def generate_voice(self, state: NutritionState) -> Dict[str, Any]:
         """Node: Voice"""
@@ -122,14 +245,23 @@ class NutritionGraphNodes:
             clean_text = clean_text[:1000] + "..."
             
         try:
-            audio_path = await self.voice.speak(clean_text)
-            return {"audio_path": audio_path}
+            # Synthesis runs in the background; audio_path streams it as it's generated.
+            # VOICE_ASYNC=0 waits for the finished MP3 instead
+            if os.getenv("VOICE_ASYNC", "1") == "0":
+                return {"audio_path": await self.voice.speak(clean_text)}
+            cached = self.voice.cached_audio(clean_text)
+            if cached:
+                return {"audio_path": cached}
+            job_id = self.audio_jobs.submit(clean_text)
+            if not job_id:
+                return {"audio_path": None}
+            return {"audio_path": f"/audio/{job_id}/stream", "audio_job_id": job_id}
         except Exception as e:
             return {"error": f"Voice failed: {e}"}
 
 # Build Graph
-def create_nutrition_graph():
-    nodes = NutritionGraphNodes()
+def create_nutrition_graph(nodes: NutritionGraphNodes | None = None):
+    nodes = nodes or NutritionGraphNodes()
     workflow = StateGraph(NutritionState)
     
     # Nodes
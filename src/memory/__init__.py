@@ -1,2 +1,4 @@
 
 from .user_profile import UserProfileStore
+from .sql_profile_store import SQLProfileStore
+from .profile_stores import ProfileStores
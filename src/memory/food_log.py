@@ -0,0 +1,62 @@
+"""
+Food Log Date Helpers
+
+Shared by both profile backends: per-day nutrient totals are kept up to
+date on every log_food, and range queries roll those daily rows up into
+weeks or months instead of rescanning raw history.
+"""
+from datetime import date, timedelta
+from typing import Any, Dict, Iterable, List, Tuple, Union
+
+DateLike = Union[date, str]
+PERIODS = ("day", "week", "month")
+
+
+def to_iso(value: DateLike) -> str:
+    """date or 'YYYY-MM-DD' -> 'YYYY-MM-DD' (raises ValueError on anything else)."""
+    if isinstance(value, date):
+        return value.isoformat()
+    return date.fromisoformat(value).isoformat()
+
+
+def default_range(start: DateLike = None, end: DateLike = None, days: int = 7) -> Tuple[str, str]:
+    """Fill missing bounds: end defaults to today, start to `days` days up to end."""
+    end_iso = to_iso(end) if end else date.today().isoformat()
+    start_iso = to_iso(start) if start else (date.fromisoformat(end_iso) - timedelta(days=days - 1)).isoformat()
+    return start_iso, end_iso
+
+
+def add_nutrients(totals: Dict[str, float], nutrients: Dict[str, Any]) -> Dict[str, float]:
+    """Accumulate the numeric values of `nutrients` into `totals` (labels like "source" are skipped)."""
+    for name, value in (nutrients or {}).items():
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            totals[name] = totals.get(name, 0) + value
+    return totals
+
+
+def period_start(day: str, period: str) -> str:
+    """First day of the week (Monday) or month containing `day`."""
+    d = date.fromisoformat(day)
+    if period == "week":
+        d -= timedelta(days=d.weekday())
+    elif period == "month":
+        d = d.replace(day=1)
+    return d.isoformat()
+
+
+def rollup(daily: Iterable[Dict[str, Any]], period: str = "day") -> List[Dict[str, Any]]:
+    """
+    Merge date-ordered {"date", "entries", "totals"} rows into one row per
+    period, keyed by the period's first day. Days with no entries are absent.
+    """
+    if period not in PERIODS:
+        raise ValueError(f"period must be one of {PERIODS}")
+    if period == "day":
+        return list(daily)
+    out: Dict[str, Dict[str, Any]] = {}
+    for row in daily:
+        key = period_start(row["date"], period)
+        bucket = out.setdefault(key, {"date": key, "entries": 0, "totals": {}})
+        bucket["entries"] += row["entries"]
+        add_nutrients(bucket["totals"], row["totals"])
+    return list(out.values())
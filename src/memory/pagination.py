@@ -0,0 +1,50 @@
+"""
+Opaque Keyset Cursors
+
+A cursor is the sort key of the last item on a page, JSON-encoded and
+base64url'd, so the next page is an index seek past that key rather
+than an OFFSET scan over everything before it.
+"""
+import base64
+import binascii
+import json
+from typing import Any, Dict, List, Optional
+
+MAX_PAGE_SIZE = 200
+
+
+def encode_cursor(*key: Any) -> str:
+    return base64.urlsafe_b64encode(json.dumps(list(key)).encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, *types: type) -> List[Any]:
+    """
+    Inverse of encode_cursor. Raises ValueError on a malformed cursor. With
+    `types`, the key must have exactly that many elements of those types
+    (decode_cursor(c, str, str)), so a tampered cursor is rejected here as a
+    400 instead of failing later in a comparison.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        key = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (binascii.Error, UnicodeError, json.JSONDecodeError) as e:
+        raise ValueError(f"Invalid cursor: {e}")
+    if not isinstance(key, list):
+        raise ValueError("Invalid cursor")
+    if types and (len(key) != len(types) or
+                  not all(isinstance(v, t) and not (isinstance(v, bool) and t is not bool) for v, t in zip(key, types))):
+        raise ValueError("Invalid cursor")
+    return key
+
+
+def clamp_limit(limit: int, maximum: int = MAX_PAGE_SIZE) -> int:
+    return max(1, min(int(limit), maximum))
+
+
+def page(items: List[Any], next_cursor: Optional[str]) -> Dict[str, Any]:
+    return {"items": items, "next_cursor": next_cursor}
+
+
+def preview(text: Optional[str], length: int = 80) -> str:
+    text = " ".join((text or "").split())
+    return text if len(text) <= length else text[:length - 1].rstrip() + "…"
@@ -0,0 +1,85 @@
+"""
+Per-User Profile Stores
+
+Maps an authenticated user ID to that user's profile store, so sessions,
+food logs and facts are partitioned per user and one user's write never
+touches another's rows (or, with sharding, another's database file).
+
+- user_id 0 is the account-less local profile (legacy single-user data).
+- PROFILE_SHARDS=N (SQL backend) spreads users over N SQLite files,
+  data/profiles/shard_<k>.db, so writers on different shards never share
+  a lock. With 1 shard (default) everything lives in the app database.
+- Up to `max_hot` stores are kept in an LRU; a hot store serves facts,
+  favorites and settings from memory.
+"""
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from src.db.database import SessionLocal, engine, set_sqlite_pragmas
+from .sql_profile_store import LOCAL_USER_ID, SQLProfileStore, ensure_schema
+from .user_profile import UserProfileStore
+
+
+class ProfileStores:
+    def __init__(self, backend: str = "sql", shards: int = 1, max_hot: int = 256,
+                 shard_dir: str = "data/profiles", legacy_json: str = "data/user_profile.json"):
+        self.backend = backend
+        self.shards = max(1, shards)
+        self.max_hot = max_hot
+        self.shard_dir = shard_dir
+        self.legacy_json = legacy_json
+        self._hot: "OrderedDict[int, Any]" = OrderedDict()
+        self._shard_sessions: Dict[int, Callable] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _session_factory(self, user_id: int):
+        """Session factory for the shard owning `user_id` (schema created on first use)."""
+        shard = user_id % self.shards
+        if shard not in self._shard_sessions:
+            if self.shards == 1:
+                bind, factory = engine, SessionLocal
+            else:
+                os.makedirs(self.shard_dir, exist_ok=True)
+                bind = create_engine(f"sqlite:///{os.path.join(self.shard_dir, f'shard_{shard}.db')}",
+                                     connect_args={"check_same_thread": False})
+                event.listen(bind, "connect", set_sqlite_pragmas)
+                factory = sessionmaker(autocommit=False, autoflush=False, bind=bind)
+            ensure_schema(bind)
+            self._shard_sessions[shard] = factory
+        return self._shard_sessions[shard]
+
+    def _create(self, user_id: int):
+        if self.backend == "json":
+            path = self.legacy_json if user_id == LOCAL_USER_ID else os.path.join(self.shard_dir, f"user_{user_id}.json")
+            return UserProfileStore(path, user_id=user_id)
+        # Only the local profile inherits the legacy single-user JSON file
+        return SQLProfileStore(user_id, session_factory=self._session_factory(user_id), create_schema=False,
+                               json_file=self.legacy_json if user_id == LOCAL_USER_ID else None)
+
+    def for_user(self, user_id: Optional[int] = None):
+        """The profile store for `user_id` (None -> local profile)."""
+        user_id = LOCAL_USER_ID if user_id is None else int(user_id)
+        with self._lock:
+            store = self._hot.get(user_id)
+            if store is not None:
+                self._hot.move_to_end(user_id)
+                self.hits += 1
+                return store
+            self.misses += 1
+            store = self._create(user_id)
+            self._hot[user_id] = store
+            while len(self._hot) > self.max_hot:
+                self._hot.popitem(last=False)
+            return store
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {"hot": len(self._hot), "max_hot": self.max_hot, "hits": self.hits, "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0, "shards": self.shards}
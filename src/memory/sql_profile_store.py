@@ -0,0 +1,446 @@
+"""
+SQLite-backed User Profile Store
+
+Same interface as UserProfileStore, but every write is a single-row
+INSERT into indexed tables on the app's SQLAlchemy engine (WAL mode)
+instead of rewriting the whole JSON profile, so a chat message costs
+O(1) and concurrent requests/workers don't clobber each other.
+
+The legacy data/user_profile.json is imported once on first start
+(see migrate_json_profile); the file itself is left untouched.
+"""
+import json
+import os
+import uuid
+from datetime import datetime, date
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import inspect, select, func, or_, and_, text
+from sqlalchemy.exc import IntegrityError, OperationalError
+from sqlalchemy.orm import Session
+
+from src.db.database import Base, SessionLocal, engine
+from src.db.models import ChatMessage, ChatSession, DailyFoodTotal, FavoriteFood, FoodLog, ProfileSetting, UserFact
+from .food_log import DateLike, add_nutrients, default_range, rollup
+from .pagination import clamp_limit, decode_cursor, encode_cursor, page, preview
+from .user_profile import link_fact_in_graph
+
+LOCAL_USER_ID = 0 # Single-user profile used when there is no account
+
+_PROFILE_TABLES = [ChatSession, ChatMessage, FoodLog, DailyFoodTotal, UserFact, FavoriteFood, ProfileSetting]
+
+
+def ensure_schema(bind=engine):
+    """
+    Create profile tables, plus any columns/indexes missing from tables that
+    predate them, and backfill the derived data those additions hold.
+    """
+    tables = [model.__table__ for model in _PROFILE_TABLES]
+    Base.metadata.create_all(bind=bind, tables=tables)
+    added = _add_missing_columns(bind, ChatSession.__table__)
+    for table in tables:
+        for index in table.indexes:
+            index.create(bind=bind, checkfirst=True)
+
+    with Session(bind) as db:
+        if added:
+            refresh_session_stats(db)
+        # Food logs written before daily totals existed
+        if db.scalar(select(FoodLog.id).limit(1)) is not None and db.scalar(select(DailyFoodTotal.date).limit(1)) is None:
+            rebuild_daily_totals(db)
+        db.commit()
+
+
+def _add_missing_columns(bind, table) -> List[str]:
+    """ALTER TABLE ADD COLUMN for model columns the existing table lacks (SQLite can't add them any other way)."""
+    existing = {col["name"] for col in inspect(bind).get_columns(table.name)}
+    missing = [col for col in table.columns if col.name not in existing]
+    with bind.begin() as conn:
+        for col in missing:
+            conn.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {col.name} {col.type.compile(bind.dialect)}'))
+    return [col.name for col in missing]
+
+
+def refresh_session_stats(db: Session, session_ids: Optional[List[str]] = None):
+    """Recompute message_count / last_message_* for the given sessions (default: all)."""
+    counts = select(ChatMessage.session_id, func.count(ChatMessage.id), func.max(ChatMessage.id)).group_by(ChatMessage.session_id)
+    sessions = select(ChatSession)
+    if session_ids is not None:
+        counts = counts.where(ChatMessage.session_id.in_(session_ids))
+        sessions = sessions.where(ChatSession.id.in_(session_ids))
+    stats = {sid: (n, last_id) for sid, n, last_id in db.execute(counts)}
+    last = {m.id: m for m in db.scalars(select(ChatMessage).where(ChatMessage.id.in_([v[1] for v in stats.values()])))}
+    for session in db.scalars(sessions):
+        n, last_id = stats.get(session.id, (0, None))
+        session.message_count = n
+        session.last_message_at = last[last_id].timestamp if last_id else None
+        session.last_message_preview = preview(last[last_id].content) if last_id else None
+
+
+def rebuild_daily_totals(db: Session, user_id: Optional[int] = None):
+    """Recompute food_daily_totals from food_logs (all users, or one)."""
+    query = select(FoodLog.user_id, FoodLog.date, FoodLog.nutrients)
+    delete_rows = db.query(DailyFoodTotal)
+    if user_id is not None:
+        query = query.where(FoodLog.user_id == user_id)
+        delete_rows = delete_rows.filter(DailyFoodTotal.user_id == user_id)
+    delete_rows.delete()
+
+    days: Dict[tuple, Dict[str, Any]] = {}
+    for uid, day, nutrients in db.execute(query):
+        row = days.setdefault((uid, day), {"entries": 0, "totals": {}})
+        row["entries"] += 1
+        add_nutrients(row["totals"], json.loads(nutrients) if nutrients else {})
+    for (uid, day), row in days.items():
+        db.add(DailyFoodTotal(user_id=uid, date=day, entries=row["entries"], totals=json.dumps(row["totals"])))
+
+
+def _parse_ts(value: Optional[str]) -> datetime:
+    try:
+        return datetime.fromisoformat(value) if value else datetime.now()
+    except ValueError:
+        return datetime.now()
+
+
+class SQLProfileStore:
+    """
+    One user's profile. Every query is scoped to `user_id`. Small, read-mostly
+    data (facts, favorites, settings) is cached on the instance once read, so
+    keeping a store in ProfileStores' hot LRU keeps those reads off the DB.
+    """
+    def __init__(self, user_id: int = LOCAL_USER_ID, session_factory=SessionLocal, bind=engine,
+                 json_file: Optional[str] = "data/user_profile.json", create_schema: bool = True):
+        self.user_id = user_id
+        self.SessionLocal = session_factory
+        self._facts: Optional[List[str]] = None
+        self._favorites: Optional[List[str]] = None
+        self._settings: Dict[str, Any] = {}
+        if create_schema:
+            ensure_schema(bind)
+        if json_file:
+            migrate_json_profile(json_file, self)
+
+    # --- Food Log ---
+    def log_food(self, food_name: str, nutrients: Dict[str, Any]):
+        """Log a food item eaten today and fold it into that day's totals."""
+        now = datetime.now()
+        day = now.date().isoformat()
+        with self.SessionLocal() as db:
+            db.add(FoodLog(user_id=self.user_id, date=day, timestamp=now,
+                           food=food_name, nutrients=json.dumps(nutrients)))
+            # Flushing the INSERT takes SQLite's write lock first, so the
+            # read-modify-write of the totals row can't race another writer
+            db.flush()
+            totals = db.get(DailyFoodTotal, (self.user_id, day))
+            if totals is None:
+                totals = DailyFoodTotal(user_id=self.user_id, date=day, entries=0, totals="{}")
+                db.add(totals)
+            totals.entries += 1
+            totals.totals = json.dumps(add_nutrients(json.loads(totals.totals or "{}"), nutrients))
+            db.commit()
+
+    @staticmethod
+    def _log_entry(row: FoodLog) -> Dict[str, Any]:
+        return {
+            "date": row.date,
+            "timestamp": row.timestamp.isoformat(),
+            "food": row.food,
+            "nutrients": json.loads(row.nutrients) if row.nutrients else {},
+        }
+
+    def get_today_log(self) -> List[Dict[str, Any]]:
+        """Get all food logged today (index range on (user_id, date))."""
+        with self.SessionLocal() as db:
+            rows = db.scalars(
+                select(FoodLog)
+                .where(FoodLog.user_id == self.user_id, FoodLog.date == date.today().isoformat())
+                .order_by(FoodLog.id)
+            ).all()
+            return [self._log_entry(r) for r in rows]
+
+    def get_log(self, start: DateLike = None, end: DateLike = None) -> List[Dict[str, Any]]:
+        """Entries dated start..end inclusive (default: the last 7 days), oldest first."""
+        start, end = default_range(start, end)
+        with self.SessionLocal() as db:
+            rows = db.scalars(
+                select(FoodLog)
+                .where(FoodLog.user_id == self.user_id, FoodLog.date >= start, FoodLog.date <= end)
+                .order_by(FoodLog.date, FoodLog.id)
+            ).all()
+            return [self._log_entry(r) for r in rows]
+
+    def get_daily_totals(self, start: DateLike = None, end: DateLike = None,
+                         period: str = "day") -> List[Dict[str, Any]]:
+        """
+        [{"date", "entries", "totals"}] per day/week/month in start..end, read
+        from the precomputed daily rows (one per logged day, not per entry).
+        """
+        start, end = default_range(start, end)
+        with self.SessionLocal() as db:
+            rows = db.scalars(
+                select(DailyFoodTotal)
+                .where(DailyFoodTotal.user_id == self.user_id,
+                       DailyFoodTotal.date >= start, DailyFoodTotal.date <= end)
+                .order_by(DailyFoodTotal.date)
+            ).all()
+            daily = [{"date": r.date, "entries": r.entries, "totals": json.loads(r.totals or "{}")} for r in rows]
+        return rollup(daily, period)
+
+    def get_recent_history(self, limit: int = 5) -> List[Dict[str, Any]]:
+        """Get last N items eaten."""
+        with self.SessionLocal() as db:
+            rows = db.scalars(
+                select(FoodLog).where(FoodLog.user_id == self.user_id).order_by(FoodLog.id.desc()).limit(limit)
+            ).all()
+            return [self._log_entry(r) for r in reversed(rows)]
+
+    # --- Favorites ---
+    def add_favorite(self, food_name: str):
+        """Add item to favorites if not exists."""
+        with self.SessionLocal() as db:
+            db.add(FavoriteFood(user_id=self.user_id, food=food_name))
+            try:
+                db.commit()
+            except IntegrityError:
+                db.rollback() # Already a favorite
+        self._favorites = None
+
+    def get_favorites(self) -> List[str]:
+        if self._favorites is None:
+            with self.SessionLocal() as db:
+                self._favorites = list(db.scalars(
+                    select(FavoriteFood.food).where(FavoriteFood.user_id == self.user_id).order_by(FavoriteFood.id)
+                ))
+        return list(self._favorites)
+
+    # --- Session Management ---
+    def create_session(self, title: str = "New Chat", session_id: Optional[str] = None) -> str:
+        """Create a new chat session."""
+        session_id = session_id or str(uuid.uuid4())
+        with self.SessionLocal() as db:
+            db.add(ChatSession(id=session_id, user_id=self.user_id, title=title, created_at=datetime.now(),
+                               message_count=0))
+            db.commit()
+        return session_id
+
+    def add_message(self, session_id: str, role: str, content: str):
+        """
+        Add a message to a session (an unknown session ID is restored under that ID).
+        Raises PermissionError if the session belongs to another user.
+        """
+        with self.SessionLocal() as db:
+            now = datetime.now()
+            session = db.get(ChatSession, session_id)
+            if session is None:
+                session = ChatSession(id=session_id, user_id=self.user_id, title="Restored Session",
+                                      created_at=now, message_count=0)
+                db.add(session)
+            elif session.user_id != self.user_id:
+                raise PermissionError(f"Session {session_id} belongs to another user")
+            db.add(ChatMessage(session_id=session_id, role=role, content=content, timestamp=now))
+            session.message_count = (session.message_count or 0) + 1
+            session.last_message_at = now
+            session.last_message_preview = preview(content)
+            db.commit()
+
+    @staticmethod
+    def _message(row: ChatMessage) -> Dict[str, Any]:
+        return {"role": row.role, "content": row.content, "timestamp": row.timestamp.isoformat()}
+
+    def get_all_sessions(self) -> List[Dict[str, Any]]:
+        """All sessions, newest first, each with its messages (two queries total)."""
+        with self.SessionLocal() as db:
+            sessions = db.scalars(
+                select(ChatSession).where(ChatSession.user_id == self.user_id)
+                .order_by(ChatSession.created_at.desc())
+            ).all()
+            by_id = {
+                s.id: {"id": s.id, "title": s.title, "timestamp": s.created_at.isoformat(), "messages": []}
+                for s in sessions
+            }
+            if by_id:
+                rows = db.scalars(
+                    select(ChatMessage).where(ChatMessage.session_id.in_(list(by_id))).order_by(ChatMessage.id)
+                )
+                for row in rows:
+                    by_id[row.session_id]["messages"].append(self._message(row))
+            return list(by_id.values())
+
+    def get_session_summaries(self, limit: int = 20, cursor: Optional[str] = None) -> Dict[str, Any]:
+        """
+        One page of sidebar summaries, newest first:
+        {"items": [{"id", "title", "timestamp", "message_count", "last_message_at", "preview"}], "next_cursor"}.
+        Pages are keyset seeks on (user_id, created_at), so cost doesn't grow with history.
+        """
+        limit = clamp_limit(limit)
+        query = select(ChatSession).where(ChatSession.user_id == self.user_id)
+        if cursor:
+            try:
+                created, sid = decode_cursor(cursor, str, str)
+                created = datetime.fromisoformat(created)
+            except ValueError:
+                raise ValueError("Invalid cursor")
+            query = query.where(or_(ChatSession.created_at < created,
+                                    and_(ChatSession.created_at == created, ChatSession.id < sid)))
+        query = query.order_by(ChatSession.created_at.desc(), ChatSession.id.desc()).limit(limit + 1)
+        with self.SessionLocal() as db:
+            rows = db.scalars(query).all()
+        items = [{
+            "id": s.id,
+            "title": s.title,
+            "timestamp": s.created_at.isoformat(),
+            "message_count": s.message_count or 0,
+            "last_message_at": s.last_message_at.isoformat() if s.last_message_at else None,
+            "preview": s.last_message_preview,
+        } for s in rows[:limit]]
+        last = rows[limit - 1] if len(rows) > limit else None
+        return page(items, encode_cursor(last.created_at.isoformat(), last.id) if last else None)
+
+    def get_session_messages_page(self, session_id: str, limit: int = 50,
+                                  before: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Latest `limit` messages older than the `before` cursor, in chronological
+        order; next_cursor fetches the page before this one (None at the start).
+        """
+        limit = clamp_limit(limit)
+        with self.SessionLocal() as db:
+            owner = db.scalar(select(ChatSession.user_id).where(ChatSession.id == session_id))
+            if owner != self.user_id:
+                return page([], None)
+            query = select(ChatMessage).where(ChatMessage.session_id == session_id)
+            if before:
+                before_id = decode_cursor(before, int)[0]
+                query = query.where(ChatMessage.id < before_id)
+            rows = db.scalars(query.order_by(ChatMessage.id.desc()).limit(limit + 1)).all()
+        has_more = len(rows) > limit
+        rows = rows[:limit][::-1]
+        items = [dict(self._message(r), id=r.id) for r in rows]
+        return page(items, encode_cursor(rows[0].id) if has_more else None)
+
+    def get_session_messages(self, session_id: str) -> List[Dict[str, Any]]:
+        """Get full history of a session."""
+        with self.SessionLocal() as db:
+            owner = db.scalar(select(ChatSession.user_id).where(ChatSession.id == session_id))
+            if owner != self.user_id:
+                return []
+            rows = db.scalars(
+                select(ChatMessage).where(ChatMessage.session_id == session_id).order_by(ChatMessage.id)
+            )
+            return [self._message(r) for r in rows]
+
+    # --- Long Term Facts ---
+    def save_fact(self, fact: str):
+        """Save a key user fact (Memory Graph)."""
+        if fact in self.get_facts():
+            return
+        with self.SessionLocal() as db:
+            db.add(UserFact(user_id=self.user_id, fact=fact))
+            try:
+                db.commit()
+            except IntegrityError:
+                db.rollback() # Saved meanwhile by another worker
+        self._facts = None
+
+        # SQLite Graph (Visual), owned by the same user the /graph routes resolve
+        link_fact_in_graph(fact, user_id=self.user_id)
+
+    def get_facts(self) -> List[str]:
+        if self._facts is None:
+            with self.SessionLocal() as db:
+                self._facts = list(db.scalars(
+                    select(UserFact.fact).where(UserFact.user_id == self.user_id).order_by(UserFact.id)
+                ))
+        return list(self._facts)
+
+    # --- Settings ---
+    def get_setting(self, key: str, default: Any = None) -> Any:
+        if key not in self._settings:
+            with self.SessionLocal() as db:
+                row = db.get(ProfileSetting, (self.user_id, key))
+                self._settings[key] = json.loads(row.value) if row is not None else None
+        value = self._settings[key]
+        return default if value is None else value
+
+    def set_setting(self, key: str, value: Any):
+        with self.SessionLocal() as db:
+            db.merge(ProfileSetting(user_id=self.user_id, key=key, value=json.dumps(value)))
+            db.commit()
+        self._settings[key] = value
+
+
+def migrate_json_profile(json_file: str, store: SQLProfileStore) -> bool:
+    """
+    One-shot import of a legacy UserProfileStore JSON file into `store`'s user.
+    Runs in a single transaction and records itself in profile_settings, so it
+    is skipped on every later start. Returns True if anything was imported.
+
+    The "migrated_from" marker is inserted first, inside the import transaction:
+    a second worker starting at the same time blocks on that insert until the
+    first commits, then hits the primary key and backs off. If the first is
+    still importing when busy_timeout runs out ("database is locked"), the
+    second backs off as well; the marker check runs again on the next start.
+    """
+    if not os.path.exists(json_file) or store.get_setting("migrated_from") is not None:
+        return False
+    try:
+        with open(json_file, "r") as f:
+            profile = json.load(f)
+    except Exception as e:
+        print(f"⚠️ Profile migration skipped, could not read {json_file}: {e}")
+        return False
+
+    user_id = store.user_id
+    with store.SessionLocal() as db:
+        db.add(ProfileSetting(user_id=user_id, key="migrated_from", value=json.dumps(json_file)))
+        try:
+            db.flush()
+        except IntegrityError:
+            db.rollback()
+            return False # Another worker already imported it
+        except OperationalError as e:
+            db.rollback()
+            print(f"⏳ Profile migration skipped, another process holds the database: {e.orig}")
+            return False
+
+        for entry in profile.get("history", []):
+            ts = _parse_ts(entry.get("timestamp"))
+            db.add(FoodLog(user_id=user_id, date=entry.get("date") or ts.date().isoformat(), timestamp=ts,
+                           food=entry.get("food"), nutrients=json.dumps(entry.get("nutrients", {}))))
+
+        for food in dict.fromkeys(profile.get("favorites", [])):
+            db.add(FavoriteFood(user_id=user_id, food=food))
+        for fact in dict.fromkeys(profile.get("facts", [])):
+            db.add(UserFact(user_id=user_id, fact=fact))
+
+        existing = set(db.scalars(select(ChatSession.id).where(ChatSession.id.in_(list(profile.get("sessions", {}))))))
+        for sid, session in profile.get("sessions", {}).items():
+            if sid in existing:
+                continue
+            db.add(ChatSession(id=sid, user_id=user_id, title=session.get("title"),
+                               created_at=_parse_ts(session.get("timestamp"))))
+            for msg in session.get("messages", []):
+                db.add(ChatMessage(session_id=sid, role=msg.get("role"), content=msg.get("content"),
+                                   timestamp=_parse_ts(msg.get("timestamp"))))
+
+        for key in ("name", "preferences"):
+            if key in profile:
+                db.merge(ProfileSetting(user_id=user_id, key=key, value=json.dumps(profile[key])))
+        db.flush()
+        rebuild_daily_totals(db, user_id)
+        refresh_session_stats(db, list(profile.get("sessions", {})))
+        db.commit()
+        store._facts, store._favorites, store._settings = None, None, {}
+
+        n_messages = db.scalar(select(func.count(ChatMessage.id)).join(ChatSession)
+                               .where(ChatSession.user_id == user_id))
+    print(f"📦 Migrated {json_file}: {len(profile.get('history', []))} food logs, "
+          f"{len(profile.get('sessions', {}))} sessions ({n_messages} messages)")
+    return True
+
+
+if __name__ == "__main__":
+    import sys
+    path = sys.argv[1] if len(sys.argv) > 1 else "data/user_profile.json"
+    store = SQLProfileStore(json_file=None)
+    if not migrate_json_profile(path, store):
+        print("Nothing to migrate (already migrated or file missing).")
@@ -1,18 +1,52 @@
 
+import bisect
 import json
 import os
+import threading
 from datetime import datetime, date
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
+
+from .food_log import DateLike, add_nutrients, default_range, rollup
+from .pagination import clamp_limit, decode_cursor, encode_cursor, page, preview
+from src.services.executors import WriteBehind
+
+
+def link_fact_in_graph(fact: str, user_id: int = 1):
+    """Mirror a user fact into the SQLite memory graph: User -> IS -> Fact."""
+    try:
+        from src.db.database import SessionLocal
+        from src.services.graph_db import GraphService
+        
+        # Heuristic: "I am vegan" -> Node: "Vegan"
+        label = fact.replace("I am ", "").replace("i am ", "").strip().title()
+        with SessionLocal() as db:
+            # User node (ID 1 is verified user) + fact node + link, in one transaction
+            GraphService(db).upsert_subgraph(user_id, [("User", "USER"), (label, "FACT")], [("User", label, "IS")])
+        print(f"🕸️ Added to Graph: User -> IS -> {label}")
+    except Exception as e:
+        print(f"⚠️ Graph DB Error: {e}")
 
 class UserProfileStore:
     """
     Manages user profile, history, and preferences.
     Persists data to specific JSON file.
+
+    Mutations only mark the profile dirty; the file is rewritten on the io
+    pool (write-behind), once per burst of changes. Call flush() to write
+    synchronously.
     """
-    def __init__(self, data_file: str = "data/user_profile.json"):
+    def __init__(self, data_file: str = "data/user_profile.json", user_id: int = 1):
         self.data_file = data_file
+        self.user_id = user_id # Owner in the memory graph
         self._ensure_data_dir()
         self.profile = self._load_profile()
+        self._lock = threading.RLock() # Mutators vs. the background writer's snapshot
+        self._writer = WriteBehind(self._write_profile)
+        # Date index over profile["history"], built on first use and kept current by log_food:
+        # sorted dates, date -> history positions, date -> {"entries", "totals"}
+        self._dates: Optional[List[str]] = None
+        self._by_date: Dict[str, List[int]] = {}
+        self._daily: Dict[str, Dict[str, Any]] = {}
 
     def _ensure_data_dir(self):
         os.makedirs(os.path.dirname(self.data_file), exist_ok=True)
@@ -33,12 +67,24 @@ class UserProfileStore:
             return {"name": "User", "favorites": [], "history": [], "preferences": []}
 
     def _save_profile(self):
+        self._writer.mark()
+
+    def _write_profile(self):
         try:
-            with open(self.data_file, "w") as f:
-                json.dump(self.profile, f, indent=2)
+            with self._lock:
+                # No indent: the C encoder is ~3x faster and holds the GIL (and this lock) for less time
+                data = json.dumps(self.profile)
+            tmp_file = self.data_file + ".tmp"
+            with open(tmp_file, "w") as f:
+                f.write(data)
+            os.replace(tmp_file, self.data_file)
         except Exception as e:
             print(f"Error saving profile: {e}")
 
+    def flush(self):
+        """Write pending changes to disk now."""
+        self._writer.flush()
+
     def log_food(self, food_name: str, nutrients: Dict[str, Any]):
         """Log a food item eaten today."""
         entry = {
@@ -47,7 +93,10 @@ class UserProfileStore:
             "food": food_name,
             "nutrients": nutrients
         }
-        self.profile["history"].append(entry)
+        with self._lock:
+            self.profile["history"].append(entry)
+            if self._dates is not None:
+                self._index_entry(len(self.profile["history"]) - 1, entry)
         
         # Auto-add to favorites if eaten > 3 times? 
         # For now, just manual favorites.
@@ -55,20 +104,51 @@ class UserProfileStore:
 
     def add_favorite(self, food_name: str):
         """Add item to favorites if not exists."""
-        if food_name not in self.profile["favorites"]:
+        with self._lock:
+            if food_name in self.profile["favorites"]:
+                return
             self.profile["favorites"].append(food_name)
-            self._save_profile()
+        self._save_profile()
 
     def get_favorites(self) -> List[str]:
         return self.profile["favorites"]
 
+    def _build_date_index(self):
+        self._dates, self._by_date, self._daily = [], {}, {}
+        for i, entry in enumerate(self.profile["history"]):
+            self._index_entry(i, entry)
+
+    def _index_entry(self, i: int, entry: Dict[str, Any]):
+        day = entry["date"]
+        if day not in self._by_date:
+            bisect.insort(self._dates, day)
+            self._by_date[day] = []
+            self._daily[day] = {"date": day, "entries": 0, "totals": {}}
+        self._by_date[day].append(i)
+        self._daily[day]["entries"] += 1
+        add_nutrients(self._daily[day]["totals"], entry.get("nutrients", {}))
+
+    def _days_in(self, start: str, end: str) -> List[str]:
+        if self._dates is None:
+            self._build_date_index()
+        return self._dates[bisect.bisect_left(self._dates, start):bisect.bisect_right(self._dates, end)]
+
     def get_today_log(self) -> List[Dict[str, Any]]:
         """Get all food logged today."""
         today = date.today().isoformat()
-        return [
-            entry for entry in self.profile["history"] 
-            if entry["date"] == today
-        ]
+        return self.get_log(today, today)
+
+    def get_log(self, start: DateLike = None, end: DateLike = None) -> List[Dict[str, Any]]:
+        """Entries dated start..end inclusive (default: the last 7 days), oldest first."""
+        history = self.profile["history"]
+        return [history[i] for day in self._days_in(*default_range(start, end)) for i in self._by_date[day]]
+
+    def get_daily_totals(self, start: DateLike = None, end: DateLike = None,
+                         period: str = "day") -> List[Dict[str, Any]]:
+        """[{"date", "entries", "totals"}] per day/week/month in start..end."""
+        daily = [dict(self._daily[day], totals=dict(self._daily[day]["totals"]))
+                 for day in self._days_in(*default_range(start, end))]
+        return rollup(daily, period)
 
     def get_recent_history(self, limit: int = 5) -> List[Dict[str, Any]]:
         """Get last N items eaten."""
@@ -85,28 +165,25 @@ class UserProfileStore:
             "timestamp": datetime.now().isoformat(),
             "messages": []
         }
-        if "sessions" not in self.profile:
-            self.profile["sessions"] = {}
-        
-        self.profile["sessions"][session_id] = session
+        with self._lock:
+            self.profile.setdefault("sessions", {})[session_id] = session
         self._save_profile()
         return session_id
 
     def add_message(self, session_id: str, role: str, content: str):
         """Add a message to a session."""
-        if "sessions" not in self.profile:
-             self.profile["sessions"] = {}
-             
-        if session_id not in self.profile["sessions"]:
-            # Auto-create if not exists (fallback)
-            self.create_session("Restored Session")
-            
         msg = {
             "role": role,
             "content": content,
             "timestamp": datetime.now().isoformat()
         }
-        self.profile["sessions"][session_id]["messages"].append(msg)
+        with self._lock:
+            sessions = self.profile.setdefault("sessions", {})
+            if session_id not in sessions:
+                # Auto-create if not exists (fallback)
+                sessions[session_id] = {"id": session_id, "title": "Restored Session",
+                                        "timestamp": msg["timestamp"], "messages": []}
+            sessions[session_id]["messages"].append(msg)
         self._save_profile()
 
     def get_all_sessions(self) -> List[Dict[str, Any]]:
@@ -123,39 +200,55 @@ class UserProfileStore:
             return self.profile["sessions"][session_id]["messages"]
         return []
 
+    def get_session_summaries(self, limit: int = 20, cursor: Optional[str] = None) -> Dict[str, Any]:
+        """One page of sidebar summaries, newest first (same shape as SQLProfileStore's)."""
+        limit = clamp_limit(limit)
+        sessions = sorted(self.profile.get("sessions", {}).values(),
+                          key=lambda x: (x["timestamp"], x["id"]), reverse=True)
+        if cursor:
+            key = tuple(decode_cursor(cursor, str, str)) # (timestamp, id)
+            sessions = [x for x in sessions if (x["timestamp"], x["id"]) < key]
+        items = []
+        for x in sessions[:limit]:
+            last = x["messages"][-1] if x["messages"] else None
+            items.append({
+                "id": x["id"],
+                "title": x["title"],
+                "timestamp": x["timestamp"],
+                "message_count": len(x["messages"]),
+                "last_message_at": last["timestamp"] if last else None,
+                "preview": preview(last["content"]) if last else None,
+            })
+        more = len(sessions) > limit
+        return page(items, encode_cursor(items[-1]["timestamp"], items[-1]["id"]) if more else None)
+
+    def get_session_messages_page(self, session_id: str, limit: int = 50,
+                                  before: Optional[str] = None) -> Dict[str, Any]:
+        """Latest `limit` messages before the cursor, chronological (ids are list positions)."""
+        limit = clamp_limit(limit)
+        messages = self.get_session_messages(session_id)
+        end = len(messages)
+        if before:
+            end = max(0, min(end, decode_cursor(before, int)[0]))
+        start = max(0, end - limit)
+        items = [dict(m, id=i) for i, m in enumerate(messages[start:end], start)]
+        return page(items, encode_cursor(start) if start > 0 else None)
+
     # --- Long Term Facts ---
     # --- Long Term Facts ---
     def save_fact(self, fact: str):
         """Save a key user fact (Memory Graph)."""
         # 1. JSON (Backup)
-        if "facts" not in self.profile:
-            self.profile["facts"] = []
-        
-        if fact not in self.profile["facts"]:
-            self.profile["facts"].append(fact)
+        with self._lock:
+            facts = self.profile.setdefault("facts", [])
+            added = fact not in facts
+            if added:
+                facts.append(fact)
+        if added:
             self._save_profile()
             
         # 2. SQLite Graph (Visual)
-        try:
-            from src.db.database import SessionLocal
-            from src.services.graph_db import GraphService
-            
-            db = SessionLocal()
-            svc = GraphService(db)
-            # Add node for User (if not exists)
-            user_node = svc.add_node(1, "User", "USER") # ID 1 is verified user
-            
-            # Add node for Fact
-            # Heuristic: "I am vegan" -> Node: "Vegan"
-            label = fact.replace("I am ", "").replace("i am ", "").strip().title()
-            fact_node = svc.add_node(1, label, "FACT")
-            
-            # Link
-            svc.add_edge(user_node.id, fact_node.id, "IS")
-            db.close()
-            print(f"🕸️ Added to Graph: User -> IS -> {label}")
-        except Exception as e:
-            print(f"⚠️ Graph DB Error: {e}")
+        link_fact_in_graph(fact, self.user_id)
 
     def get_facts(self) -> List[str]:
         return self.profile.get("facts", [])
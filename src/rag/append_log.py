@@ -0,0 +1,200 @@
+"""
+Append-Only Record Log
+
+JSONL write-ahead log used by NutritionVectorStore so a mutation costs
+one appended line instead of a full JSON rewrite. A periodic checkpoint
+(full snapshot + atomic rename) lets the log be truncated.
+"""
+import json
+import os
+import threading
+import uuid
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional
+
+try:
+    import fcntl  # POSIX advisory locks: several worker processes may share one data/ dir
+except ImportError:
+    fcntl = None
+
+
+class AppendLog:
+    """
+    One JSON record per line, each tagged with a monotonically increasing `seq`.
+    Records are written with a single write() call on an O_APPEND handle, so
+    concurrent writers never interleave bytes within a line. A crash can at
+    worst leave a torn final line, which replay() detects and truncates.
+
+    Several processes may share the log (e.g. uvicorn workers). Appends and
+    compaction hold an exclusive flock on `<path>.lock`, and first read any
+    records other writers added since this process last looked. Those are
+    handed to `on_foreign(records, reset)` so the owner can fold them in;
+    `reset` means another process compacted the log, so the owner must also
+    merge the checkpoint that process wrote. Each compaction writes a new
+    generation id into the lock file, which is how others notice (inode
+    numbers get reused, so they can't be trusted for this).
+    """
+
+    def __init__(self, path: str, fsync: bool = False,
+                 on_foreign: Optional[Callable[[List[dict], bool], None]] = None):
+        self.path = path
+        self.fsync = fsync
+        self.on_foreign = on_foreign
+        self.offsets: Dict[str, int] = {}  # record key -> byte offset of its latest record
+        self.last_seq = 0
+        self.record_count = 0
+        self._lock = threading.Lock()
+        self._end = 0  # Bytes of the current log generation already read by this process
+        self._gen: Optional[str] = None  # Generation those bytes belong to (None: not read yet)
+
+    @contextmanager
+    def _locked(self):
+        """Thread lock, plus an exclusive cross-process flock where available."""
+        with self._lock:
+            if fcntl is None:
+                yield
+                return
+            with open(self._lock_path, "a") as lock_file:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+    @property
+    def _lock_path(self) -> str:
+        return self.path + ".lock"
+
+    def _generation(self) -> str:
+        try:
+            with open(self._lock_path, "r") as f:
+                return f.read().strip()
+        except FileNotFoundError:
+            return ""
+
+    def _read_from(self, start: int) -> List[dict]:
+        """
+        Parse records from byte `start` to the end, updating offsets/counters.
+        A torn trailing record is cut off. Call with the lock held.
+        """
+        records = []
+        self._gen = self._generation()
+        if not os.path.exists(self.path):
+            self._end = 0
+            return records
+
+        good_end = start
+        with open(self.path, "rb") as f:
+            f.seek(start)
+            for line in f:
+                try:
+                    if not line.endswith(b"\n"):
+                        raise ValueError("incomplete record")
+                    record = json.loads(line)
+                except ValueError:
+                    print(f"⚠️ Truncating torn record at offset {good_end} in {self.path}")
+                    break
+
+                offset = good_end
+                good_end += len(line)
+                self.record_count += 1
+                if "key" in record:
+                    self.offsets[record["key"]] = offset
+                records.append(record)
+
+        if good_end < os.path.getsize(self.path):
+            with open(self.path, "r+b") as f:
+                f.truncate(good_end)
+        self._end = good_end
+        return records
+
+    def replay(self, after_seq: int = 0) -> Iterator[dict]:
+        """
+        Yield records with seq > after_seq in write order, rebuilding the
+        offset index as it goes. A torn trailing record is cut off.
+        """
+        with self._locked():
+            self.offsets = {}
+            self.record_count = 0
+            self.last_seq = max(self.last_seq, after_seq)
+            records = self._read_from(0)
+        for record in records:
+            seq = record.get("seq", 0)
+            if seq <= after_seq:
+                continue  # Already folded into the last checkpoint
+            self.last_seq = max(self.last_seq, seq)
+            yield record
+
+    def _catch_up(self):
+        """Read (and hand to on_foreign) records other processes appended. Call with the lock held."""
+        size = os.path.getsize(self.path) if os.path.exists(self.path) else 0
+        reset = self._gen is not None and (self._generation() != self._gen or size < self._end)
+        if reset:
+            self.offsets = {}
+            self.record_count = 0
+            self._end = 0
+        elif size == self._end:
+            self._gen = self._generation()
+            return
+        records = self._read_from(self._end)
+        for record in records:
+            self.last_seq = max(self.last_seq, record.get("seq", 0))
+        if (records or reset) and self.on_foreign is not None:
+            self.on_foreign(records, reset)
+
+    def append(self, record: dict, key: Optional[str] = None) -> int:
+        """Durably append one record. Returns its seq."""
+        with self._locked():
+            self._catch_up()
+            self.last_seq += 1
+            record = {"seq": self.last_seq, **record}
+            if key is not None:
+                record["key"] = key
+            line = (json.dumps(record, separators=(",", ":")) + "\n").encode("utf-8")
+
+            with open(self.path, "ab") as f:
+                offset = f.tell()
+                f.write(line)
+                f.flush()
+                if self.fsync:
+                    os.fsync(f.fileno())
+
+            if key is not None:
+                self.offsets[key] = offset
+            self.record_count += 1
+            self._end = offset + len(line)
+            return self.last_seq
+
+    def read(self, key: str) -> Optional[dict]:
+        """Random-access read of the latest record for `key` via the offset index."""
+        offset = self.offsets.get(key)
+        if offset is None:
+            return None
+        with open(self.path, "rb") as f:
+            f.seek(offset)
+            return json.loads(f.readline())
+
+    def compact(self, write_snapshot: Callable[[int], None]):
+        """
+        Checkpoint + truncate. Records from other writers are folded in first;
+        `write_snapshot(last_seq)` must then persist the full state atomically.
+        Appends (from any process) are blocked until the log has been emptied,
+        so no record can land between the snapshot and the truncate. The log
+        is replaced by a new empty file under a new generation id, which tells
+        other processes that a compaction happened.
+        """
+        with self._locked():
+            self._catch_up()
+            write_snapshot(self.last_seq)
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "wb") as f:
+                f.flush()
+                if self.fsync:
+                    os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+            self._gen = uuid.uuid4().hex
+            with open(self._lock_path, "w") as f:
+                f.write(self._gen)
+            self.offsets = {}
+            self.record_count = 0
+            self._end = 0
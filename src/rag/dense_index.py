@@ -0,0 +1,104 @@
+"""
+Dense Vector Index
+
+Keeps one contiguous float32 matrix of document embeddings and answers
+queries with a single matrix-vector product plus argpartition top-k.
+"""
+from typing import Iterable, List, Tuple
+
+import numpy as np
+
+from .embeddings import BaseEmbedder
+
+
+class DenseIndex:
+    """
+    Brute-force cosine index. Rows are L2-normalized, so cosine == dot product.
+    Capacity doubles on growth so appends stay amortized O(dim).
+    """
+
+    def __init__(self, embedder: BaseEmbedder, initial_capacity: int = 1024):
+        self.embedder = embedder
+        self.dim = embedder.dim
+        self._matrix = np.zeros((initial_capacity, self.dim), dtype=np.float32)
+        self.size = 0
+
+    def __len__(self) -> int:
+        return self.size
+
+    @property
+    def matrix(self) -> np.ndarray:
+        """View of the populated rows (no copy)."""
+        return self._matrix[:self.size]
+
+    def _reserve(self, extra: int):
+        needed = self.size + extra
+        if needed <= self._matrix.shape[0]:
+            return
+        capacity = max(needed, self._matrix.shape[0] * 2)
+        grown = np.zeros((capacity, self.dim), dtype=np.float32)
+        grown[:self.size] = self._matrix[:self.size]
+        self._matrix = grown
+
+    def attach_matrix(self, matrix: np.ndarray):
+        """
+        Adopt an existing (e.g. memory-mapped, read-only) matrix without copying.
+        The first append after this copies it into a growable private buffer.
+        """
+        self._matrix = matrix
+        self.size = len(matrix)
+
+    def add_vectors(self, vectors: np.ndarray) -> int:
+        """Append pre-computed rows. Returns the position of the first one."""
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(-1, self.dim)
+        start = self.size
+        self._reserve(len(vectors))
+        self._matrix[start:start + len(vectors)] = vectors
+        self.size += len(vectors)
+        return start
+
+    def add(self, text: str) -> int:
+        """Embed and index one document. Returns its position."""
+        return self.add_vectors(self.embedder.embed([text]))
+
+    def replace(self, row: int, text: str):
+        """Re-embed the document at `row` in place."""
+        if not self._matrix.flags.writeable:
+            self._matrix = np.array(self._matrix) # Attached (mmap) matrix: take a private copy first
+        self._matrix[row] = self.embedder.embed([text])[0]
+
+    def rebuild(self, documents: Iterable[str], batch_size: int = 1024):
+        """Re-embed every document from scratch (used after load)."""
+        documents = list(documents)
+        self.size = 0
+        self._matrix = np.zeros((max(len(documents), 1), self.dim), dtype=np.float32)
+        for i in range(0, len(documents), batch_size):
+            self.add_vectors(self.embedder.embed(documents[i:i + batch_size]))
+
+    def search_vector(self, query_vec: np.ndarray, top_k: int = 3) -> List[Tuple[float, int]]:
+        """Top-k (cosine, doc_idx) pairs for an already-embedded query, best first."""
+        if self.size == 0:
+            return []
+        scores = self.matrix @ query_vec.astype(np.float32, copy=False)
+        k = min(top_k, self.size)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [(float(scores[i]), int(i)) for i in top]
+
+    def search(self, query: str, top_k: int = 3) -> List[Tuple[float, int]]:
+        """Top-k (cosine, doc_idx) pairs for a text query, best first."""
+        return self.search_vector(self.embedder.embed([query])[0], top_k)
+
+    def search_batch(self, queries: List[str], top_k: int = 3) -> List[List[Tuple[float, int]]]:
+        """Answer several queries with one matrix-matrix product."""
+        if self.size == 0 or not queries:
+            return [[] for _ in queries]
+        scores = self.matrix @ self.embedder.embed(queries).T  # (docs, queries)
+        k = min(top_k, self.size)
+        results = []
+        for col in range(scores.shape[1]):
+            column = scores[:, col]
+            top = np.argpartition(-column, k - 1)[:k]
+            top = top[np.argsort(-column[top], kind="stable")]
+            results.append([(float(column[i]), int(i)) for i in top])
+        return results
@@ -1,25 +1,48 @@
 
 import json
 import os
-import numpy as np
-from typing import List, Dict, Any
+import re
+from typing import List, Dict, Any, Optional, Tuple, Union
+
+_UNIT_SUFFIXES = [" mg", " mcg", " g", " iu"]
+
+
+def normalize_nutrient(name: str) -> str:
+    """vitamin_c_mg / 'Vitamin C' / ' vitamin  c ' -> 'vitamin c'"""
+    name = " ".join(name.replace("_", " ").lower().split())
+    for suffix in _UNIT_SUFFIXES:
+        if name.endswith(suffix):
+            name = name[:-len(suffix)]
+    return name.strip()
+
 
 class DietaryVectorStore:
     """
     Simple Vector Store for Dietary Recommendations.
     Loads JSONs and performs keyword/similarity search.
+
+    Everything query-time is precompiled at load:
+    - by_name: nutrient name -> docs (in load order)
+    - token_index: token -> nutrient names containing it
+    - table: (age_group, gender) -> nutrient name -> doc
     """
     def __init__(self, data_dir: str = "data/recommendations"):
         self.data_dir = data_dir
         self.documents = []
+        self.by_name: Dict[str, List[Tuple[int, Dict[str, Any]]]] = {}
+        self.token_index: Dict[str, set] = {}
+        self.table: Dict[Tuple[str, str], Dict[str, Dict[str, Any]]] = {}
+        self._age_to_group: Dict[int, str] = {}
+        self._max_name_tokens = 1
         self._load_data()
+        self._build_index()
 
     def _load_data(self):
         """Load all JSON files from the data directory."""
         if not os.path.exists(self.data_dir):
             return
 
-        for filename in os.listdir(self.data_dir):
+        for filename in sorted(os.listdir(self.data_dir)):
             if filename.endswith(".json"):
                 filepath = os.path.join(self.data_dir, filename)
                 try:
@@ -37,10 +60,10 @@ class DietaryVectorStore:
                                             for suffix in [" Mg", " Mcg", " G", " Iu"]:
                                                 if pretty_name.endswith(suffix):
                                                     pretty_name = pretty_name[:-len(suffix)]
-                                            
+
                                             doc = {
                                                 "name": pretty_name.strip(),
-                                                "value": value, 
+                                                "value": value,
                                                 "age_group": age_group,
                                                 "gender": gender,
                                                 "source_file": filename
@@ -48,45 +71,108 @@ class DietaryVectorStore:
                                             self.documents.append(doc)
                         elif isinstance(data, list):
                             self.documents.extend(data)
-                            
+
                 except Exception as e:
                     print(f"Error loading {filename}: {e}")
 
+    def _build_index(self):
+        """Precompile name/token/age-gender lookup tables from the flattened documents."""
+        for i, doc in enumerate(self.documents):
+            name = normalize_nutrient(doc.get("name", ""))
+            if not name:
+                continue
+            self.by_name.setdefault(name, []).append((i, doc))
+            tokens = name.split()
+            self._max_name_tokens = max(self._max_name_tokens, len(tokens))
+            for tok in tokens:
+                self.token_index.setdefault(tok, set()).add(name)
+
+            key = (str(doc.get("age_group", "")), str(doc.get("gender", "")).lower())
+            self.table.setdefault(key, {})[name] = doc
+
+        # Resolve integer ages to their group once ("19-64", "65+", "1")
+        for group in {age_group for age_group, _ in self.table}:
+            match = re.fullmatch(r"(\d+)\s*(?:-\s*(\d+)|(\+))?", group)
+            if not match:
+                continue
+            low = int(match.group(1))
+            high = int(match.group(2)) if match.group(2) else (120 if match.group(3) else low)
+            for age in range(low, high + 1):
+                self._age_to_group.setdefault(age, group)
+
+    def lookup(self, nutrient: str, age: Union[int, str, None] = None,
+               gender: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        Structured O(1) lookup, e.g. lookup("Vitamin C", 30, "female").
+        `age` may be an integer age or an age-group key; missing age/gender
+        fall back to the first matching document.
+        """
+        name = normalize_nutrient(nutrient)
+        group = None
+        if age is not None:
+            group = self._age_to_group.get(age, str(age)) if isinstance(age, int) else str(age)
+
+        if group is not None and gender is not None:
+            return self.table.get((group, gender.lower()), {}).get(name)
+
+        for _, doc in self.by_name.get(name, []):
+            if group is not None and str(doc.get("age_group")) != group:
+                continue
+            if gender is not None and str(doc.get("gender", "")).lower() != gender.lower():
+                continue
+            return doc
+        return None
+
+    def _names_in_query(self, query_tokens: List[str]) -> set:
+        """Nutrient names that appear as a contiguous token span of the query."""
+        found = set()
+        for n in range(1, self._max_name_tokens + 1):
+            for i in range(len(query_tokens) - n + 1):
+                span = " ".join(query_tokens[i:i + n])
+                if span in self.by_name:
+                    found.add(span)
+        return found
+
     def search(self, query: str, top_k: int = 3) -> List[Dict[str, Any]]:
         """
         Find best matching recommendation.
         Returns multiple results to cover age/gender context.
+        Only nutrients sharing a token with the query are considered.
         """
         query = query.lower()
-        results = []
-        
-        # Tokenize query
-        query_tokens = set(query.split())
-        
-        for doc in self.documents:
+        query_list = re.findall(r"[a-z0-9]+", query)
+        query_tokens = set(query_list)
+
+        name_scores: Dict[str, int] = {}
+        exact = self._names_in_query(query_list)
+        candidates = set(exact)
+        for tok in query_tokens:
+            candidates |= self.token_index.get(tok, set())
+
+        for name in candidates:
             score = 0
-            name = doc.get("name", "").lower() # e.g. "vitamin c"
-            name_tokens = set(name.split())
-            
             # 1. Exact Name match in query
-            if name in query:
+            if name in exact:
                 score += 20
-                
+
             # 2. Strong token overlap (Vitamin + C)
-            intersection = query_tokens.intersection(name_tokens)
+            intersection = query_tokens.intersection(name.split())
             if len(intersection) >= 2: # "vitamin" + "c"
                 score += 10
             elif "vitamin" not in name and len(intersection) >= 1: # "zinc", "iron" (single word)
                  # avoid matching "vitamin" alone for "vitamin a" query matching "vitamin c" doc
                  score += 10
-            
-            # Boost if query mentions gender/age
-            if doc.get("gender", "") in query:
-                score += 5
-            
+
             if score > 0:
-                results.append((score, doc))
-        
-        # Sort by score descending
-        results.sort(key=lambda x: x[0], reverse=True)
-        return [r[1] for r in results[:top_k]]
+                name_scores[name] = score
+
+        results = []
+        for name, score in name_scores.items():
+            for i, doc in self.by_name[name]:
+                # Boost if query mentions gender/age
+                boost = 5 if str(doc.get("gender", "")).lower() in query_tokens else 0
+                results.append((score + boost, i, doc))
+
+        # Sort by score descending (ties keep load order)
+        results.sort(key=lambda x: (-x[0], x[1]))
+        return [r[2] for r in results[:top_k]]
@@ -0,0 +1,56 @@
+"""
+Local Text Embedders
+
+Pluggable embedders for the dense knowledge index. The default
+HashingEmbedder needs no model download and works offline; any object
+with a `dim` attribute and an `embed(texts)` method returning an
+(n, dim) float32 array can be dropped in instead.
+"""
+import zlib
+from typing import List
+
+import numpy as np
+
+from .inverted_index import tokenize
+
+
+class BaseEmbedder:
+    """Interface for embedders used by DenseIndex."""
+    dim: int = 0
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        """Return an (len(texts), dim) float32 matrix of L2-normalized rows."""
+        raise NotImplementedError
+
+
+class HashingEmbedder(BaseEmbedder):
+    """
+    Signed feature hashing over word tokens and character n-grams.
+    Character n-grams make "strawberry"/"strawberries" and small typos land close together.
+    """
+
+    def __init__(self, dim: int = 512, ngram: int = 3, word_weight: float = 2.0):
+        self.dim = dim
+        self.ngram = ngram
+        self.word_weight = word_weight
+
+    def _features(self, text: str):
+        for tok in tokenize(text):
+            yield f"w:{tok}", self.word_weight
+            padded = f"#{tok}#"
+            for i in range(max(1, len(padded) - self.ngram + 1)):
+                yield f"c:{padded[i:i + self.ngram]}", 1.0
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        out = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for feature, weight in self._features(text):
+                # crc32 is stable across processes (unlike hash())
+                h = zlib.crc32(feature.encode("utf-8"))
+                sign = 1.0 if h & 0x80000000 else -1.0
+                out[row, h % self.dim] += sign * weight
+
+        norms = np.linalg.norm(out, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        out /= norms
+        return out
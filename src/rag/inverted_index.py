@@ -0,0 +1,220 @@
+"""
+Inverted Index with BM25 Ranking
+
+Token -> postings map maintained incrementally as documents are added,
+so a query only touches documents that share at least one term with it.
+"""
+import heapq
+import math
+import re
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+
+# Manual stop word list (kept in sync with the original keyword search)
+STOP_WORDS = {
+    "what", "is", "a", "an", "the", "in", "of", "for", "to", "and", "or", "are",
+    "do", "does", "how", "much", "many", "good", "bad", "source", "sources",
+}
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase, split on non-alphanumerics, drop stop words, fold simple plurals."""
+    tokens = []
+    for tok in _TOKEN_RE.findall(text.lower()):
+        if tok in STOP_WORDS:
+            continue
+        # "vitamins" -> "vitamin", "carbs" -> "carb" (but keep "glass", "is")
+        if len(tok) > 3 and tok.endswith("s") and not tok.endswith("ss"):
+            tok = tok[:-1]
+        tokens.append(tok)
+    return tokens
+
+
+class InvertedIndex:
+    """
+    Incremental BM25 index over an append-only list of documents.
+    Documents are referred to by their position in the owning store.
+
+    May sit on top of a frozen, memory-mapped base (see mmap_snapshot):
+    base documents occupy positions [0, base_size) and are scored with
+    NumPy straight from the mapped arrays; later additions go to the
+    in-memory postings. A base document that is replaced is masked out of
+    the frozen postings and re-indexed in memory under the same position.
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.base = None  # Optional FrozenPostings
+        self.base_size = 0
+        self.postings: Dict[str, Dict[int, int]] = {}  # token -> {doc_idx: term freq}
+        self.doc_lengths: List[int] = []  # Lengths of documents after the base
+        self.replaced_base: Dict[int, int] = {}  # Base doc -> its new length (indexed in postings)
+        self._replaced_docs: Optional[np.ndarray] = None  # Sorted keys of replaced_base, for masking
+        self.total_length = 0
+
+    def __len__(self) -> int:
+        return self.base_size + len(self.doc_lengths)
+
+    def add(self, text: str) -> int:
+        """Index a new document. Returns its position."""
+        doc_idx = len(self)
+        tokens = tokenize(text)
+        self._post(doc_idx, tokens)
+        self.doc_lengths.append(len(tokens))
+        self.total_length += len(tokens)
+        return doc_idx
+
+    def replace(self, doc_idx: int, old_text: str, new_text: str):
+        """Re-index the document at `doc_idx` (whose indexed text was `old_text`) as `new_text`."""
+        tokens = tokenize(new_text)
+        if doc_idx < self.base_size and doc_idx not in self.replaced_base:
+            # Frozen postings can't be edited: mask the doc there and index it in memory instead
+            old_length = int(self.base.doc_lengths[doc_idx])
+            self._replaced_docs = None
+        else:
+            old_tokens = tokenize(old_text)
+            for tok in old_tokens:
+                posting = self.postings[tok]
+                posting[doc_idx] -= 1
+                if not posting[doc_idx]:
+                    del posting[doc_idx]
+                    if not posting:
+                        del self.postings[tok]
+            old_length = len(old_tokens)
+
+        self._post(doc_idx, tokens)
+        if doc_idx < self.base_size:
+            self.replaced_base[doc_idx] = len(tokens)
+        else:
+            self.doc_lengths[doc_idx - self.base_size] = len(tokens)
+        self.total_length += len(tokens) - old_length
+
+    def _post(self, doc_idx: int, tokens: List[str]):
+        for tok in tokens:
+            posting = self.postings.setdefault(tok, {})
+            posting[doc_idx] = posting.get(doc_idx, 0) + 1
+
+    def _base_lookup(self, term: str) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """Frozen postings for `term`, minus replaced base documents."""
+        hit = self.base.lookup(term) if self.base is not None else None
+        if not hit or not self.replaced_base:
+            return hit
+        docs, tfs = hit
+        keep = ~np.isin(docs, self._replaced_array())
+        return (docs[keep], tfs[keep]) if keep.any() else None
+
+    def _replaced_array(self) -> np.ndarray:
+        if self._replaced_docs is None:
+            self._replaced_docs = np.fromiter(sorted(self.replaced_base), dtype=np.int32, count=len(self.replaced_base))
+        return self._replaced_docs
+
+    def rebuild(self, documents: Iterable[str]):
+        """Drop everything and re-index from scratch (used after load)."""
+        self.base = None
+        self.base_size = 0
+        self.postings = {}
+        self.doc_lengths = []
+        self.replaced_base, self._replaced_docs = {}, None
+        self.total_length = 0
+        for text in documents:
+            self.add(text)
+
+    def attach_base(self, base):
+        """Use memory-mapped FrozenPostings as the index for the first len(base.doc_lengths) docs."""
+        self.base = base
+        self.base_size = len(base.doc_lengths)
+        self.postings = {}
+        self.doc_lengths = []
+        self.replaced_base, self._replaced_docs = {}, None
+        self.total_length = int(base.doc_lengths.sum(dtype=np.int64))
+
+    def _doc_length(self, doc_idx: int) -> int:
+        if doc_idx < self.base_size:
+            if doc_idx in self.replaced_base:
+                return self.replaced_base[doc_idx]
+            return int(self.base.doc_lengths[doc_idx])
+        return self.doc_lengths[doc_idx - self.base_size]
+
+    def export(self) -> Tuple[Dict[str, Tuple[np.ndarray, np.ndarray]], np.ndarray]:
+        """Flatten base + in-memory postings into (term -> (docs, tfs)), doc_lengths for a snapshot."""
+        merged: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        if self.base is not None:
+            starts = self.base.starts
+            for i, term in enumerate(self.base.terms):
+                lo, hi = int(starts[i]), int(starts[i + 1])
+                docs, tfs = self.base.docs[lo:hi], self.base.tfs[lo:hi]
+                if self.replaced_base:
+                    keep = ~np.isin(docs, self._replaced_array())
+                    docs, tfs = docs[keep], tfs[keep]
+                if len(docs):
+                    merged[term] = (docs, tfs)
+        for term, posting in self.postings.items():
+            docs = np.fromiter(posting.keys(), dtype=np.int32, count=len(posting))
+            tfs = np.fromiter(posting.values(), dtype=np.int32, count=len(posting))
+            if term in merged:
+                docs = np.concatenate([merged[term][0], docs])
+                tfs = np.concatenate([merged[term][1], tfs])
+            merged[term] = (docs, tfs)
+
+        lengths = np.asarray(self.doc_lengths, dtype=np.int32)
+        if self.base is not None:
+            base_lengths = self.base.doc_lengths
+            if self.replaced_base:
+                base_lengths = base_lengths.copy()
+                base_lengths[list(self.replaced_base)] = list(self.replaced_base.values())
+            lengths = np.concatenate([base_lengths, lengths])
+        return merged, lengths
+
+    def search(self, query: str, top_k: int = 3) -> List[Tuple[float, int]]:
+        """
+        Score candidate documents with BM25.
+        Returns up to top_k (score, doc_idx) pairs, best first.
+        """
+        terms: Set[str] = set(tokenize(query))
+        n_docs = len(self)
+        if not terms or n_docs == 0:
+            return []
+
+        avg_len = self.total_length / n_docs or 1.0
+        scores: Dict[int, float] = {}
+        base_docs, base_scores = [], []
+
+        for term in terms:
+            posting = self.postings.get(term) or {}
+            base_hit = self._base_lookup(term)
+            df = len(posting) + (len(base_hit[0]) if base_hit else 0)
+            if df == 0:
+                continue
+            idf = math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+
+            if base_hit:
+                docs, tfs = base_hit
+                norm = self.k1 * (1 - self.b + self.b * self.base.doc_lengths[docs] / avg_len)
+                base_docs.append(docs)
+                base_scores.append(idf * tfs * (self.k1 + 1) / (tfs + norm))
+
+            for doc_idx, tf in posting.items():
+                norm = self.k1 * (1 - self.b + self.b * self._doc_length(doc_idx) / avg_len)
+                scores[doc_idx] = scores.get(doc_idx, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+
+        # Ties go to the earlier document, matching the old stable sort
+        best = heapq.nlargest(top_k, scores.items(), key=lambda item: (item[1], -item[0]))
+        candidates = [(score, doc_idx) for doc_idx, score in best]
+
+        if base_docs:
+            # Sum per-term contributions per base doc, then take a top-k slice
+            uniq, inverse = np.unique(np.concatenate(base_docs), return_inverse=True)
+            totals = np.bincount(inverse, weights=np.concatenate(base_scores))
+            k = min(top_k, len(uniq))
+            kth = -np.partition(-totals, k - 1)[k - 1]
+            tied = np.nonzero(totals >= kth)[0]
+            # Among ties keep the earliest docs (uniq is sorted, so lexsort on -score then position)
+            top = tied[np.lexsort((tied, -totals[tied]))][:k]
+            candidates.extend((float(totals[i]), int(uniq[i])) for i in top)
+            candidates.sort(key=lambda item: (-item[0], item[1]))
+
+        return candidates[:top_k]
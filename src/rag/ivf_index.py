@@ -0,0 +1,202 @@
+"""
+IVF (Inverted File) Approximate Nearest-Neighbour Index
+
+Pure NumPy coarse quantizer for the dense knowledge matrix:
+spherical k-means splits rows into `n_lists` clusters and a query only
+scores the rows in its `nprobe` closest clusters.
+
+The index stores row ids, not vectors - the owning DenseIndex matrix is
+passed in on every call, so there is exactly one copy of the embeddings.
+"""
+import os
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+
+class IVFIndex:
+    """
+    Recall/latency knobs:
+    - nprobe: clusters scanned per query (higher = better recall, slower)
+    - n_lists: clusters to train (default ~sqrt(N))
+    - min_train_size: below this many rows, search is exact brute force
+    - retrain_factor: retrain once the store grows this many times past the last training
+    """
+
+    def __init__(self, n_lists: Optional[int] = None, nprobe: int = 8,
+                 min_train_size: int = 1024, retrain_factor: float = 4.0,
+                 kmeans_iters: int = 10, train_sample: int = 50_000, seed: int = 0):
+        self.n_lists = n_lists
+        self.nprobe = nprobe
+        self.min_train_size = min_train_size
+        self.retrain_factor = retrain_factor
+        self.kmeans_iters = kmeans_iters
+        self.train_sample = train_sample
+        self.seed = seed
+
+        self.centroids: Optional[np.ndarray] = None
+        self.lists: List[List[int]] = []
+        self._list_arrays: List[Optional[np.ndarray]] = []  # Cached np views, None when dirty
+        self._row_list: List[int] = []  # row -> list id, so update() needn't scan every list
+        self.trained_size = 0
+        self.size = 0
+
+    @property
+    def is_trained(self) -> bool:
+        return self.centroids is not None
+
+    # --- Build ---
+    def train(self, matrix: np.ndarray):
+        """Spherical k-means over (a sample of) the matrix, then assign every row."""
+        n = len(matrix)
+        n_lists = self.n_lists or max(1, int(np.sqrt(n)))
+        n_lists = min(n_lists, n)
+        rng = np.random.default_rng(self.seed)
+
+        sample = matrix
+        if n > self.train_sample:
+            sample = matrix[rng.choice(n, self.train_sample, replace=False)]
+
+        centroids = sample[rng.choice(len(sample), n_lists, replace=False)].copy()
+        for _ in range(self.kmeans_iters):
+            assign = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assign, sample)
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            empty = norms[:, 0] == 0
+            # Keep the previous centroid for clusters that lost all members
+            sums[empty] = centroids[empty]
+            norms[empty] = 1.0
+            centroids = (sums / norms).astype(np.float32)
+
+        self.centroids = centroids
+        self.trained_size = n
+        self._assign_all(matrix)
+
+    def _assign_all(self, matrix: np.ndarray):
+        self.lists = [[] for _ in range(len(self.centroids))]
+        self._list_arrays = [None] * len(self.centroids)
+        self._row_list = self._nearest_lists(matrix).tolist() if len(matrix) else []
+        for row, list_id in enumerate(self._row_list):
+            self.lists[list_id].append(row)
+        self.size = len(matrix)
+
+    def _nearest_lists(self, vectors: np.ndarray) -> np.ndarray:
+        return np.argmax(vectors @ self.centroids.T, axis=1)
+
+    def add(self, matrix: np.ndarray, start: int):
+        """
+        Index rows matrix[start:] that were just appended to the dense matrix.
+        Trains lazily once the store is big enough, and retrains as it grows.
+        """
+        n = len(matrix)
+        if not self.is_trained:
+            if n >= self.min_train_size:
+                self.train(matrix)
+            else:
+                self.size = n
+            return
+
+        if n >= self.trained_size * self.retrain_factor:
+            self.train(matrix)
+            return
+
+        new_rows = matrix[start:n]
+        for offset, list_id in enumerate(self._nearest_lists(new_rows).tolist()):
+            self.lists[list_id].append(start + offset)
+            self._list_arrays[list_id] = None
+            self._row_list.append(list_id)
+        self.size = n
+
+    def update(self, matrix: np.ndarray, row: int):
+        """Move an existing row to its nearest cluster after its vector changed in place."""
+        if not self.is_trained:
+            return
+        old_id = self._row_list[row]
+        list_id = int(self._nearest_lists(matrix[row:row + 1])[0])
+        if list_id == old_id:
+            return
+        self.lists[old_id].remove(row)
+        self._list_arrays[old_id] = None
+        self.lists[list_id].append(row)
+        self._list_arrays[list_id] = None
+        self._row_list[row] = list_id
+
+    # --- Query ---
+    def _list_array(self, list_id: int) -> np.ndarray:
+        arr = self._list_arrays[list_id]
+        if arr is None:
+            arr = np.asarray(self.lists[list_id], dtype=np.int64)
+            self._list_arrays[list_id] = arr
+        return arr
+
+    def search(self, matrix: np.ndarray, query_vec: np.ndarray, top_k: int = 3,
+               nprobe: Optional[int] = None) -> List[Tuple[float, int]]:
+        """Top-k (cosine, row) pairs from the nprobe nearest clusters, best first."""
+        if len(matrix) == 0:
+            return []
+
+        if not self.is_trained:
+            candidates = None
+            scores = matrix @ query_vec
+        else:
+            nprobe = min(nprobe or self.nprobe, len(self.centroids))
+            centroid_scores = self.centroids @ query_vec
+            probe = np.argpartition(-centroid_scores, nprobe - 1)[:nprobe]
+            candidates = np.concatenate([self._list_array(i) for i in probe])
+            if len(candidates) == 0:
+                return []
+            scores = matrix[candidates] @ query_vec
+
+        k = min(top_k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        rows = top if candidates is None else candidates[top]
+        return [(float(scores[i]), int(row)) for i, row in zip(top, rows)]
+
+    # --- Persistence ---
+    def save(self, path: str):
+        """Persist centroids + row assignments (vectors live with the store)."""
+        if not self.is_trained:
+            if os.path.exists(path):
+                os.remove(path)
+            return
+        assignments = np.asarray(self._row_list, dtype=np.int32)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(f, centroids=self.centroids, assignments=assignments,
+                     trained_size=np.int64(self.trained_size))
+        os.replace(tmp_path, path)
+
+    def load(self, path: str, matrix: np.ndarray) -> bool:
+        """
+        Restore from disk. Returns False (caller should rebuild) if the file is
+        missing or out of step with the current matrix.
+        """
+        if not os.path.exists(path):
+            return False
+        try:
+            with np.load(path) as data:
+                centroids = data["centroids"]
+                assignments = data["assignments"]
+                trained_size = int(data["trained_size"])
+        except Exception as e:
+            print(f"Error loading ANN index: {e}")
+            return False
+
+        if len(assignments) > len(matrix) or centroids.shape[1] != matrix.shape[1]:
+            return False
+
+        self.centroids = centroids.astype(np.float32)
+        self.trained_size = trained_size
+        self.lists = [[] for _ in range(len(centroids))]
+        self._list_arrays = [None] * len(centroids)
+        self._row_list = assignments.tolist()
+        for row, list_id in enumerate(self._row_list):
+            self.lists[list_id].append(row)
+        self.size = len(assignments)
+
+        # Rows added after the last save
+        if self.size < len(matrix):
+            self.add(matrix, self.size)
+        return True
@@ -0,0 +1,214 @@
+"""
+Memory-Mapped Knowledge Snapshot
+
+Binary checkpoint format for NutritionVectorStore that opens without
+parsing: every section is a flat array read straight out of an mmap,
+so startup cost is independent of store size and several workers
+mapping the same file share its pages through the OS page cache.
+
+Layout:
+    8 bytes   magic "NVSMMAP1"
+    8 bytes   little-endian header length
+    N bytes   JSON header {last_seq, n_docs, dim, sections: {name: [offset, nbytes, dtype, shape]}}
+    ...       64-byte aligned sections
+"""
+import bisect
+import json
+import mmap
+import os
+import struct
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+MAGIC = b"NVSMMAP1"
+ALIGN = 64
+
+
+class StringTable:
+    """Read-only sequence of strings backed by an offsets array + one byte buffer."""
+
+    def __init__(self, offsets: np.ndarray, data: memoryview):
+        self.offsets = offsets
+        self.data = data
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i: int) -> str:
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        return bytes(self.data[int(self.offsets[i]):int(self.offsets[i + 1])]).decode("utf-8")
+
+    def __iter__(self) -> Iterator[str]:
+        for i in range(len(self)):
+            yield self[i]
+
+
+class ChainedList:
+    """
+    A frozen base sequence (e.g. a StringTable) plus an in-memory tail that
+    supports append. Base items can be overwritten; the new values are kept
+    in memory alongside the base.
+    """
+
+    def __init__(self, base: Sequence[str]):
+        self.base = base
+        self.tail: List[str] = []
+        self.overrides: Dict[int, str] = {}
+
+    def __len__(self) -> int:
+        return len(self.base) + len(self.tail)
+
+    def __getitem__(self, i: int) -> str:
+        if i < 0:
+            i += len(self)
+        if i < len(self.base):
+            return self.overrides[i] if i in self.overrides else self.base[i]
+        return self.tail[i - len(self.base)]
+
+    def __setitem__(self, i: int, item: str):
+        if i < 0:
+            i += len(self)
+        if i < len(self.base):
+            self.overrides[i] = item
+        else:
+            self.tail[i - len(self.base)] = item
+
+    def __iter__(self) -> Iterator[str]:
+        if self.overrides:
+            for i, item in enumerate(self.base):
+                yield self.overrides[i] if i in self.overrides else item
+        else:
+            yield from self.base
+        yield from self.tail
+
+    def append(self, item: str):
+        self.tail.append(item)
+
+
+class FrozenPostings:
+    """
+    CSR postings for the BM25 index: sorted term table, and per term a
+    slice of (doc_idx, term freq) arrays. Term lookup is a binary search.
+    """
+
+    def __init__(self, terms: StringTable, starts: np.ndarray, docs: np.ndarray,
+                 tfs: np.ndarray, doc_lengths: np.ndarray):
+        self.terms = terms
+        self.starts = starts
+        self.docs = docs
+        self.tfs = tfs
+        self.doc_lengths = doc_lengths
+
+    def lookup(self, term: str) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        i = bisect.bisect_left(self.terms, term)
+        if i == len(self.terms) or self.terms[i] != term:
+            return None
+        start, end = int(self.starts[i]), int(self.starts[i + 1])
+        return self.docs[start:end], self.tfs[start:end]
+
+
+def _encode_strings(items) -> Tuple[np.ndarray, bytes]:
+    encoded = [s.encode("utf-8") for s in items]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.uint64)
+    if encoded:
+        offsets[1:] = np.cumsum([len(b) for b in encoded])
+    return offsets, b"".join(encoded)
+
+
+def write_snapshot(path: str, documents, doc_ids, structured_data: Dict, last_seq: int,
+                   postings: Dict[str, Tuple[np.ndarray, np.ndarray]], doc_lengths: np.ndarray,
+                   matrix: Optional[np.ndarray] = None):
+    """Serialize a full store snapshot to `path` atomically (tmp file + rename)."""
+    doc_offsets, doc_bytes = _encode_strings(documents)
+    id_offsets, id_bytes = _encode_strings(doc_ids)
+
+    terms = sorted(postings)
+    term_offsets, term_bytes = _encode_strings(terms)
+    starts = np.zeros(len(terms) + 1, dtype=np.uint64)
+    if terms:
+        starts[1:] = np.cumsum([len(postings[t][0]) for t in terms])
+    posting_docs = np.concatenate([postings[t][0] for t in terms]).astype(np.int32) if terms else np.zeros(0, np.int32)
+    posting_tfs = np.concatenate([postings[t][1] for t in terms]).astype(np.int32) if terms else np.zeros(0, np.int32)
+
+    sections = {
+        "doc_offsets": doc_offsets,
+        "doc_bytes": np.frombuffer(doc_bytes, dtype=np.uint8),
+        "id_offsets": id_offsets,
+        "id_bytes": np.frombuffer(id_bytes, dtype=np.uint8),
+        "structured": np.frombuffer(json.dumps(structured_data).encode("utf-8"), dtype=np.uint8),
+        "term_offsets": term_offsets,
+        "term_bytes": np.frombuffer(term_bytes, dtype=np.uint8),
+        "posting_starts": starts,
+        "posting_docs": posting_docs,
+        "posting_tfs": posting_tfs,
+        "doc_lengths": np.asarray(doc_lengths, dtype=np.int32),
+    }
+    if matrix is not None:
+        sections["embeddings"] = np.ascontiguousarray(matrix, dtype=np.float32)
+
+    # Lay out sections after a header sized generously enough to hold the table
+    table = {}
+    header_reserve = 4096
+    cursor = header_reserve
+    for name, arr in sections.items():
+        table[name] = [cursor, arr.nbytes, arr.dtype.str, list(arr.shape)]
+        cursor += -(-arr.nbytes // ALIGN) * ALIGN
+    header = json.dumps({
+        "last_seq": last_seq,
+        "n_docs": len(doc_offsets) - 1,
+        "dim": int(matrix.shape[1]) if matrix is not None else 0,
+        "sections": table,
+    }).encode("utf-8")
+    if len(header) + 16 > header_reserve:
+        raise ValueError("Snapshot header too large")
+
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(MAGIC + struct.pack("<Q", len(header)) + header)
+        for name, arr in sections.items():
+            f.seek(table[name][0])
+            f.write(arr.tobytes())
+        f.truncate(cursor)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+class MmapSnapshot:
+    """Opened snapshot. All arrays are zero-copy views into one read-only mmap."""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        buf = memoryview(self._mmap)
+
+        if bytes(buf[:8]) != MAGIC:
+            raise ValueError(f"{path} is not a nutrition store snapshot")
+        (header_len,) = struct.unpack("<Q", buf[8:16])
+        header = json.loads(bytes(buf[16:16 + header_len]))
+        self.last_seq = header["last_seq"]
+        self.n_docs = header["n_docs"]
+        self.dim = header["dim"]
+
+        arrays = {}
+        for name, (offset, nbytes, dtype, shape) in header["sections"].items():
+            arr = np.frombuffer(buf, dtype=np.dtype(dtype), count=nbytes // np.dtype(dtype).itemsize, offset=offset)
+            arrays[name] = arr.reshape(shape)
+
+        self.documents = StringTable(arrays["doc_offsets"], memoryview(arrays["doc_bytes"]))
+        self.doc_ids = StringTable(arrays["id_offsets"], memoryview(arrays["id_bytes"]))
+        self._structured = arrays["structured"]
+        self.postings = FrozenPostings(
+            StringTable(arrays["term_offsets"], memoryview(arrays["term_bytes"])),
+            arrays["posting_starts"], arrays["posting_docs"], arrays["posting_tfs"], arrays["doc_lengths"],
+        )
+        self.matrix = arrays.get("embeddings")
+
+    def structured_data(self) -> Dict:
+        """Structured food entries (small; decoded on demand)."""
+        return json.loads(self._structured.tobytes()) if len(self._structured) else {}
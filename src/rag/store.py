@@ -1,77 +1,252 @@
 """
-Nutrition Knowledge Store (Simple Keyword Search)
+Nutrition Knowledge Store (BM25 Keyword Search)
 
 Replaces ChromaDB with a lightweight in-memory store for Python 3.14 compatibility.
 """
 import json
 import os
+import threading
 from typing import List, Optional, Dict
 
+from .inverted_index import InvertedIndex
+from .dense_index import DenseIndex
+from .embeddings import BaseEmbedder
+from .ivf_index import IVFIndex
+from .append_log import AppendLog
+from .mmap_snapshot import ChainedList, MmapSnapshot, write_snapshot
+from src.services.executors import WriteBehind
+
 
 class NutritionVectorStore:
     """
-    Simple in-memory knowledge store using keyword matching.
+    Simple in-memory knowledge store using BM25 over an inverted index.
     Mocking the 'VectorStore' interface for compatibility.
+
+    Passing an `embedder` enables dense mode: every document is also embedded
+    into a float32 matrix and search prefers cosine similarity, falling back
+    to BM25 when nothing clears `dense_threshold`. An optional `ann_index`
+    (IVF) replaces the brute-force cosine scan once the store is large.
+
+    Persistence is log-structured: `nutrition_store.json` is a checkpoint and
+    every mutation after it is one appended line in `nutrition_store.log.jsonl`.
+    The log is folded into a new checkpoint every `compact_every` records.
+    With `snapshot_format="mmap"` the checkpoint is `nutrition_store.bin`
+    instead, which is memory-mapped on load rather than parsed.
+    Checkpoints triggered by save() run on the io pool (write-behind), so a
+    mutation on the request path never waits for a full snapshot write.
     """
     
-    def __init__(self, persist_directory: Optional[str] = "data"):
+    def __init__(self, persist_directory: Optional[str] = "data",
+                 embedder: Optional[BaseEmbedder] = None,
+                 dense_threshold: float = 0.25,
+                 ann_index: Optional[IVFIndex] = None,
+                 compact_every: int = 500,
+                 snapshot_format: str = "json"):
         """Initialize the store."""
         self.persist_directory = persist_directory
         self.persist_file = os.path.join(persist_directory, "nutrition_store.json") if persist_directory else None
+        self.ann_file = os.path.join(persist_directory, "nutrition_store.ivf.npz") if persist_directory else None
+        self.log = AppendLog(os.path.join(persist_directory, "nutrition_store.log.jsonl"),
+                             on_foreign=self._apply_foreign) if persist_directory else None
+        self.snapshot_file = os.path.join(persist_directory, "nutrition_store.bin") if persist_directory else None
+        self.snapshot_format = snapshot_format
+        self.compact_every = compact_every
+        self._snapshot = None # Open MmapSnapshot; keeps the mapping alive
         
         self.documents = []
         self.doc_ids = []
         self.structured_data = {} # Map query -> structured info dict
+        self.index = InvertedIndex() # Token -> postings, kept in step with documents
+        self.dense_index = DenseIndex(embedder) if embedder is not None else None
+        self.dense_threshold = dense_threshold
+        self.ann_index = ann_index if self.dense_index is not None else None
+        self._id_positions: Optional[Dict[str, int]] = None # doc_id -> position, built on first write
+        self._lock = threading.RLock() # Mutations vs. a background checkpoint reading the same state
+        self._checkpointer = WriteBehind(self.checkpoint)
         
         # Ensure data directory exists
         if self.persist_directory and not os.path.exists(self.persist_directory):
             os.makedirs(self.persist_directory)
             
         # Load existing data if available
-        if self.persist_file and os.path.exists(self.persist_file):
+        if self.persist_file and (os.path.exists(self.persist_file) or os.path.exists(self.snapshot_file)):
             self.load()
         else:
             # Seed with initial knowledge if empty
             self._seed_initial_knowledge()
             if self.persist_file:
-                self.save()
+                # A log without a checkpoint (e.g. the snapshot was deleted) still holds learned
+                # records; fold them in before the checkpoint truncates it
+                for record in self.log.replay():
+                    self._apply_record(record)
+                self.checkpoint()
     
     def save(self):
-        """Save knowledge base to disk."""
+        """
+        Make pending changes durable. Mutations are already appended to the
+        log as they happen, so this only checkpoints once the log is long,
+        and then in the background.
+        """
+        if self.log is None:
+            return
+        if self.log.record_count >= self.compact_every:
+            self._checkpointer.mark()
+
+    def flush(self):
+        """Finish any background checkpoint (e.g. before exit)."""
+        self._checkpointer.flush()
+
+    def checkpoint(self):
+        """Write a full snapshot (atomic rename) and truncate the log."""
         if not self.persist_file:
             return
-            
+        self.log.compact(self._write_snapshot)
+        if self.ann_index is not None:
+            with self._lock:
+                self.ann_index.save(self.ann_file)
+
+    def _write_snapshot(self, last_seq: int):
+        with self._lock:
+            self._write_snapshot_locked(last_seq)
+
+    def _write_snapshot_locked(self, last_seq: int):
+        if self.snapshot_format == "mmap":
+            postings, doc_lengths = self.index.export()
+            matrix = self.dense_index.matrix if self.dense_index is not None else None
+            write_snapshot(self.snapshot_file, self.documents, self.doc_ids, self.structured_data,
+                           last_seq, postings, doc_lengths, matrix)
+            return
+
         data = {
-            "documents": self.documents,
-            "doc_ids": self.doc_ids,
-            "structured_data": self.structured_data
+            "documents": list(self.documents),
+            "doc_ids": list(self.doc_ids),
+            "structured_data": self.structured_data,
+            "last_seq": last_seq
         }
-        with open(self.persist_file, "w") as f:
-            json.dump(data, f, indent=2)
+        tmp_file = self.persist_file + ".tmp"
+        with open(tmp_file, "w") as f:
+            f.write(json.dumps(data)) # One-shot dumps without indent uses the C encoder: shorter GIL hold
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_file, self.persist_file)
     
     def load(self):
-        """Load knowledge base from disk."""
-        if not self.persist_file or not os.path.exists(self.persist_file):
+        """Load the last checkpoint from disk, then replay the log on top."""
+        if not self.persist_file:
             return
             
         try:
-            with open(self.persist_file, "r") as f:
-                data = json.load(f)
-            self.documents = data.get("documents", [])
-            self.doc_ids = data.get("doc_ids", [])
-            self.structured_data = data.get("structured_data", {})
+            fmt = self._snapshot_on_disk()
+            if fmt is None:
+                return
+            if fmt != self.snapshot_format:
+                print(f"ℹ️ Loading {fmt} snapshot (configured: {self.snapshot_format}); "
+                      f"the next checkpoint writes {self.snapshot_format}")
+            last_seq = self._load_mmap_snapshot() if fmt == "mmap" else self._load_json_snapshot()
+
+            if self.ann_index is not None and not self.ann_index.load(self.ann_file, self.dense_index.matrix):
+                self.ann_index.add(self.dense_index.matrix, 0)
+
+            for record in self.log.replay(after_seq=last_seq):
+                self._apply_record(record)
         except Exception as e:
             print(f"Error loading store: {e}")
 
+    def _snapshot_on_disk(self) -> Optional[str]:
+        """
+        Which checkpoint to load: the configured format's file, or the other
+        one after a format switch/rollback. If both exist, the newer wins (the
+        older one predates a log truncation by the other format's checkpoints).
+        """
+        files = {"mmap": self.snapshot_file, "json": self.persist_file}
+        present = [fmt for fmt in (self.snapshot_format, "json" if self.snapshot_format == "mmap" else "mmap")
+                   if os.path.exists(files[fmt])]
+        if len(present) == 2 and os.path.getmtime(files[present[1]]) > os.path.getmtime(files[present[0]]):
+            return present[1]
+        return present[0] if present else None
+
+    def _apply_record(self, record: dict):
+        if record["op"] == "add":
+            self._apply_knowledge(record["text"], record["id"])
+        elif record["op"] == "food":
+            self._apply_structured_food(record["name"], record["info"])
+
+    def _apply_foreign(self, records: List[dict], reset: bool):
+        """
+        Fold in what other processes sharing this directory wrote (called by
+        the log under its cross-process lock). After another process's
+        compaction, its checkpoint holds records this process never saw.
+        """
+        if reset:
+            self.log.last_seq = max(self.log.last_seq, self._merge_checkpoint())
+        for record in records:
+            self._apply_record(record)
+
+    def _merge_checkpoint(self) -> int:
+        """Apply documents/foods from the on-disk checkpoint that are missing or newer there. Returns its last_seq."""
+        fmt = self._snapshot_on_disk()
+        if fmt == "mmap":
+            snap = MmapSnapshot(self.snapshot_file)
+            doc_ids, documents, structured, last_seq = snap.doc_ids, snap.documents, snap.structured_data(), snap.last_seq
+        elif fmt == "json":
+            with open(self.persist_file, "r") as f:
+                data = json.load(f)
+            doc_ids, documents = data.get("doc_ids", []), data.get("documents", [])
+            structured, last_seq = data.get("structured_data", {}), data.get("last_seq", 0)
+        else:
+            return 0
+        # The compacting process caught up on our records first, so its checkpoint is never older
+        # than what we hold: take its text for foods that were re-added there
+        for i, doc_id in enumerate(doc_ids):
+            self._replace_knowledge(documents[i], doc_id)
+        with self._lock:
+            self.structured_data.update(structured)
+        return last_seq
+
+    def _load_json_snapshot(self) -> int:
+        self._id_positions = None
+        with open(self.persist_file, "r") as f:
+            data = json.load(f)
+        self.documents = data.get("documents", [])
+        self.doc_ids = data.get("doc_ids", [])
+        self.structured_data = data.get("structured_data", {})
+        self.index.rebuild(self.documents)
+        if self.dense_index is not None:
+            self.dense_index.rebuild(self.documents)
+        return data.get("last_seq", 0)
+
+    def _load_mmap_snapshot(self) -> int:
+        """Map the binary snapshot; documents, postings and embeddings are read lazily from it."""
+        snap = MmapSnapshot(self.snapshot_file)
+        self._snapshot = snap
+        self._id_positions = None
+        self.documents = ChainedList(snap.documents)
+        self.doc_ids = ChainedList(snap.doc_ids)
+        self.structured_data = snap.structured_data()
+        self.index.attach_base(snap.postings)
+        if self.dense_index is not None:
+            if snap.matrix is not None and snap.dim == self.dense_index.dim:
+                self.dense_index.attach_matrix(snap.matrix)
+            else:
+                # Snapshot written without (or with a different) embedder
+                self.dense_index.rebuild(self.documents)
+        return snap.last_seq
+
     def add_structured_food(self, name: str, info: Dict):
         """Add structured food data for precise direct lookup."""
-        self.structured_data[name.lower()] = info
-        # Also add a text representation for RAG search
+        self._apply_structured_food(name, info)
+        if self.log is not None:
+            self.log.append({"op": "food", "name": name, "info": info}, key=f"food:{name.lower()}")
+        self.save()
+
+    def _apply_structured_food(self, name: str, info: Dict):
+        with self._lock:
+            self.structured_data[name.lower()] = info
+        # Also add a text representation for RAG search (replacing the old one if the food is known)
         text_rep = f"Nutrition for {name}: {info.get('description', '')}. "
         for nutrient in info.get('nutrients', []):
              text_rep += f"{nutrient['name']}: {nutrient['amount']}{nutrient['unit']}. "
-        self.add_knowledge(text_rep, f"food_{name.lower().replace(' ', '_')}")
-        self.save()
+        self._replace_knowledge(text_rep, f"food_{name.lower().replace(' ', '_')}")
 
     def get_structured_food(self, name: str) -> Optional[Dict]:
         """Direct lookup for a specific food."""
@@ -106,42 +281,89 @@ class NutritionVectorStore:
         ]
         
         for i, text in enumerate(knowledge):
-            self.add_knowledge(text, f"knowledge_{i}")
+            self._apply_knowledge(text, f"knowledge_{i}")
     
     def search(self, query: str, n_results: int = 3) -> List[str]:
         """
-        Search for relevant nutrition knowledge using finding matching words.
-        Simple logic: count overlapping non-stop-words.
+        Search for relevant nutrition knowledge.
+        Only documents sharing a term with the query are scored (BM25),
+        and the top N are picked with a heap instead of a full sort.
+        In dense mode, confident cosine matches win over BM25.
         """
-        query_words = set(query.lower().split())
-        # Remove common stop words (manual list for simplicity)
-        stop_words = {"what", "is", "a", "an", "the", "in", "of", "for", "to", "and", "or", "are", "do", "does", "how", "much", "many", "good", "bad", "source", "sources"}
-        keywords = query_words - stop_words
-        
-        if not keywords:
-            # If query is only stop words, return random or empty
-            return []
-            
-        scores = []
-        for doc in self.documents:
-            doc_lower = doc.lower()
-            score = 0
-            for kw in keywords:
-                if kw in doc_lower:
-                    score += 1
-            scores.append((score, doc))
-        
-        # Sort by score descending
-        scores.sort(key=lambda x: x[0], reverse=True)
-        
-        # Return top N results if score > 0
-        results = [doc for score, doc in scores[:n_results] if score > 0]
-        return results
+        if self.dense_index is not None:
+            dense_hits = self._dense_search(query, n_results)
+            results = [self.documents[doc_idx] for score, doc_idx in dense_hits if score >= self.dense_threshold]
+            if results:
+                return results
+
+        hits = self.index.search(query, top_k=n_results)
+        return [self.documents[doc_idx] for score, doc_idx in hits if score > 0]
     
-    def add_knowledge(self, text: str, doc_id: Optional[str] = None):
-        """Add new knowledge to the store."""
+    def _dense_search(self, query: str, top_k: int):
+        """Cosine top-k, through the ANN index when one is configured."""
+        if self.ann_index is None:
+            return self.dense_index.search(query, top_k=top_k)
+        query_vec = self.dense_index.embedder.embed([query])[0]
+        return self.ann_index.search(self.dense_index.matrix, query_vec, top_k=top_k)
+
+    def add_knowledge(self, text: str, doc_id: Optional[str] = None) -> bool:
+        """
+        Add new knowledge to the store (one O(1) log append when persistent).
+        Returns False if a document with this doc_id already exists.
+        """
         if doc_id is None:
             doc_id = f"knowledge_{len(self.documents)}"
         
-        self.documents.append(text)
-        self.doc_ids.append(doc_id)
+        if not self._apply_knowledge(text, doc_id):
+            return False
+        if self.log is not None:
+            self.log.append({"op": "add", "id": doc_id, "text": text}, key=f"doc:{doc_id}")
+        return True
+
+    def _doc_positions(self) -> Dict[str, int]:
+        # Built lazily so an mmap open doesn't have to decode every id up front
+        if self._id_positions is None:
+            self._id_positions = {}
+            for i, existing_id in enumerate(self.doc_ids):
+                self._id_positions.setdefault(existing_id, i)
+        return self._id_positions
+
+    def has_document(self, doc_id: str) -> bool:
+        return doc_id in self._doc_positions()
+
+    def get_document(self, doc_id: str) -> Optional[str]:
+        pos = self._doc_positions().get(doc_id)
+        return self.documents[pos] if pos is not None else None
+
+    def _replace_knowledge(self, text: str, doc_id: str) -> bool:
+        """Set the text of `doc_id` in place (same position in every index), adding it if new."""
+        with self._lock:
+            pos = self._doc_positions().get(doc_id)
+            if pos is None:
+                return self._apply_knowledge(text, doc_id)
+            old_text = self.documents[pos]
+            if old_text == text:
+                return False
+            self.documents[pos] = text
+            self.index.replace(pos, old_text, text)
+            if self.dense_index is not None:
+                self.dense_index.replace(pos, text)
+                if self.ann_index is not None:
+                    self.ann_index.update(self.dense_index.matrix, pos)
+            return True
+
+    def _apply_knowledge(self, text: str, doc_id: str) -> bool:
+        with self._lock:
+            positions = self._doc_positions()
+            if doc_id in positions:
+                return False # Dedupe: e.g. two concurrent learns of the same query
+            positions[doc_id] = len(self.documents)
+
+            self.documents.append(text)
+            self.doc_ids.append(doc_id)
+            self.index.add(text)
+            if self.dense_index is not None:
+                row = self.dense_index.add(text)
+                if self.ann_index is not None:
+                    self.ann_index.add(self.dense_index.matrix, row)
+            return True
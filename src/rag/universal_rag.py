@@ -4,9 +4,8 @@ import os
 import json
 from typing import Optional, Dict
 
-from ..services.serper import SerperService
-from .store import NutritionVectorStore
-from .dietary_store import DietaryVectorStore
+from ..services.registry import registry
+from ..services.single_flight import SingleFlight
 from spoon_ai.chat import ChatBot
 
 class UniversalNutritionRag:
@@ -19,16 +18,18 @@ class UniversalNutritionRag:
     """
 
     def __init__(self):
-        self.dietary_store = DietaryVectorStore() # Specific advice
-        self.knowledge_store = NutritionVectorStore(persist_directory="data") # Learned facts
-        self.serper = SerperService()
+        # Shared instances (see src/services/registry.py)
+        self.dietary_store = registry.get("dietary_store") # Specific advice
+        self.knowledge_store = registry.get("knowledge_store") # Learned facts
+        self.serper = registry.get("serper")
+        self._learn_flight = SingleFlight() # One web learn per query, however many requests miss at once
         self.llm = ChatBot(model="gpt-4o-mini", api_key=os.getenv("OPENAI_API_KEY"))
 
     async def search(self, query: str) -> str:
         """
         Main entry point. Returns a natural language answer with sources.
         """
-        query = query.lower().strip()
+        query = " ".join(query.lower().split())
 
         # 1. Check Dietary Store (High Priority - "How much Vitamin C?")
         dietary_results = self.dietary_store.search(query, top_k=1)
@@ -48,7 +49,7 @@ class UniversalNutritionRag:
 
         # 3. Web Search (Fallback - "Dragon Fruit specific nutrition")
         print("🌍 Cache Miss. Searching Web...")
-        return await self._learn_from_web(query)
+        return await self._learn_flight.do(query, lambda: self._learn_from_web(query))
 
     def _format_dietary_response(self, doc: Dict) -> str:
         name = doc.get("name")
@@ -58,6 +59,12 @@ class UniversalNutritionRag:
 
     async def _learn_from_web(self, query: str) -> str:
         """Search Google, Summarize, Cache."""
+        doc_id = f"learned_{query.replace(' ', '_')}"
+        # A previous flight for this query may have finished since our cache check
+        learned = self.knowledge_store.get_document(doc_id)
+        if learned is not None:
+            return f"{learned}\n*(Source: Learned Knowledge)*"
+
         # Search for "query + nutrition facts benefits"
         search_query = f"{query} nutrition facts health benefits"
         
@@ -87,7 +94,7 @@ class UniversalNutritionRag:
         response = await self.llm.ask([{"role": "user", "content": prompt}])
         
         # Save to Knowledge Store
-        self.knowledge_store.add_knowledge(response, f"learned_{query.replace(' ', '_')}")
+        self.knowledge_store.add_knowledge(response, doc_id)
         self.knowledge_store.save()
         
         return f"{response}\n*(Learned from Web)*"
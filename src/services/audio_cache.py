@@ -0,0 +1,102 @@
+"""
+Content-Addressed Audio Cache
+
+Generated speech is stored as tts_<hash>.mp3, where the hash covers the
+text and every synthesis setting (voice, model, voice_settings), so the
+same answer is only ever voiced once. The directory is kept under
+`max_bytes` by evicting the least recently used files (mtime is bumped
+on every hit).
+"""
+import hashlib
+import json
+import os
+import threading
+from typing import Any, Dict, Optional
+
+
+class AudioCache:
+    def __init__(self, directory: str, max_bytes: int = 200 * 1024 * 1024, web_prefix: str = "/static/audio"):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.web_prefix = web_prefix
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self._size = self._scan_size()
+
+    @staticmethod
+    def key(text: str, voice_id: str, model_id: str, settings: Dict[str, Any]) -> str:
+        blob = json.dumps({"text": text, "voice": voice_id, "model": model_id, "settings": settings},
+                          sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(blob.encode("utf-8")).hexdigest()[:32]
+
+    def _filename(self, key: str) -> str:
+        return f"tts_{key}.mp3"
+
+    def _scan_size(self) -> int:
+        return sum(entry.stat().st_size for entry in os.scandir(self.directory)
+                   if entry.is_file() and entry.name.endswith(".mp3"))
+
+    def get(self, key: str) -> Optional[str]:
+        """Web path of the cached audio, or None. A hit refreshes the file's LRU position."""
+        path = os.path.join(self.directory, self._filename(key))
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return f"{self.web_prefix}/{self._filename(key)}"
+
+    def put(self, key: str, data: bytes) -> str:
+        """Store audio atomically (readers never see a partial file) and return its web path."""
+        filename = self._filename(key)
+        path = os.path.join(self.directory, filename)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        with self._lock:
+            existing = os.path.getsize(path) if os.path.exists(path) else 0
+            os.replace(tmp, path)
+            self._size += len(data) - existing
+            if self._size > self.max_bytes:
+                self._collect(keep=filename)
+        return f"{self.web_prefix}/{filename}"
+
+    def _collect(self, keep: Optional[str] = None):
+        """Evict least recently used .mp3 files until under budget (caller holds the lock)."""
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.is_file() and entry.name.endswith(".mp3"):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, entry.name, stat.st_size))
+        entries.sort()
+        self._size = sum(size for _, _, size in entries)
+        for _, name, size in entries:
+            if self._size <= self.max_bytes:
+                break
+            if name == keep:
+                continue
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                pass
+            self._size -= size
+            self.evictions += 1
+
+    def gc(self):
+        with self._lock:
+            self._collect()
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "evictions": self.evictions,
+            "bytes": self._size,
+            "max_bytes": self.max_bytes,
+        }
@@ -0,0 +1,133 @@
+"""
+Background Audio Jobs
+
+Text-to-speech runs off the request path: /chat returns as soon as the
+text is ready, with a job ID whose audio is synthesized in the background
+and can be streamed while it is still being generated. Finished jobs are
+also saved to the voice audio cache so later plays are a plain file fetch.
+"""
+import asyncio
+import time
+import uuid
+from collections import OrderedDict
+from typing import AsyncIterator, Dict, List, Optional
+
+from .executors import run_io
+from .voice import VoiceService
+
+
+class AudioJob:
+    def __init__(self, text: str, key: str):
+        self.id = uuid.uuid4().hex
+        self.text = text
+        self.key = key  # Content address in the audio cache
+        self.chunks: List[bytes] = []
+        self.status = "pending"  # pending -> streaming -> done | failed
+        self.audio_path: Optional[str] = None
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.task: Optional[asyncio.Task] = None
+        self.cond = asyncio.Condition()
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("done", "failed")
+
+
+class AudioJobManager:
+    """
+    Keeps the most recent `max_jobs` jobs in memory. Any number of clients
+    may stream the same job; each gets every chunk from the start.
+
+    `_jobs` lives in this process only: with several uvicorn workers, a
+    /audio/{id}/stream request that lands on a different worker than the
+    /chat that created the job gets a 404. Run one worker, or use sticky
+    sessions, when voice is enabled.
+    """
+
+    def __init__(self, voice: VoiceService, max_jobs: int = 256):
+        self.voice = voice
+        self.max_jobs = max_jobs
+        self._jobs: "OrderedDict[str, AudioJob]" = OrderedDict()
+
+    def submit(self, text: str) -> Optional[str]:
+        """
+        Start synthesizing `text` in the background. Returns the job ID, or None
+        if voice is disabled. Identical text already being synthesized shares its job.
+        """
+        if not self.voice.api_key or not text:
+            return None
+        key = self.voice.audio_key(text)
+        for job in reversed(self._jobs.values()):
+            if job.key == key and job.status != "failed":
+                return job.id
+        job = AudioJob(text, key)
+        job.task = asyncio.create_task(self._run(job))
+        self._jobs[job.id] = job
+        while len(self._jobs) > self.max_jobs:
+            _, old = self._jobs.popitem(last=False)
+            if old.task and not old.task.done():
+                old.task.cancel()
+        return job.id
+
+    def get(self, job_id: str) -> Optional[AudioJob]:
+        return self._jobs.get(job_id)
+
+    async def _run(self, job: AudioJob):
+        job.status = "streaming"
+        try:
+            async for chunk in self.voice.stream_speech(job.text):
+                async with job.cond:
+                    job.chunks.append(chunk)
+                    job.cond.notify_all()
+            if job.chunks:
+                job.audio_path = await run_io(self._save, job)
+            job.status = "done"
+        except asyncio.CancelledError:
+            job.status, job.error = "failed", "cancelled"
+            raise
+        except Exception as e:
+            print(f"❌ Voice Generation Error: {e}")
+            job.status, job.error = "failed", str(e)
+        finally:
+            async with job.cond:
+                job.cond.notify_all()
+
+    def _save(self, job: AudioJob) -> str:
+        return self.voice.cache.put(job.key, b"".join(job.chunks))
+
+    async def stream(self, job_id: str) -> AsyncIterator[bytes]:
+        """Yield the job's audio from the first byte, waiting on synthesis as needed."""
+        job = self._jobs.get(job_id)
+        if job is None:
+            return
+        sent = 0
+        while True:
+            async with job.cond:
+                await job.cond.wait_for(lambda: len(job.chunks) > sent or job.finished)
+                pending = job.chunks[sent:]
+                finished = job.finished
+            for chunk in pending:
+                yield chunk
+            sent += len(pending)
+            if finished and sent == len(job.chunks):
+                return
+
+    def status(self, job_id: str) -> Optional[Dict]:
+        job = self._jobs.get(job_id)
+        if job is None:
+            return None
+        return {
+            "id": job.id,
+            "status": job.status,
+            "audio_path": job.audio_path,
+            "bytes": sum(len(c) for c in job.chunks),
+            "error": job.error,
+        }
+
+    async def shutdown(self):
+        """Cancel jobs still synthesizing (FastAPI lifespan shutdown)."""
+        tasks = [job.task for job in self._jobs.values() if job.task and not job.task.done()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
@@ -0,0 +1,197 @@
+"""
+Blocking-Work Executors
+
+Coroutines hand synchronous work (SQLAlchemy sessions, bcrypt, ...) to a
+named, bounded thread pool instead of running it on the event loop, so a
+slow query or password hash never stalls the other in-flight requests.
+
+- db:  SQLite/SQLAlchemy calls (DB_POOL_SIZE, default 8; keep it within
+       the engine's connection pool)
+- cpu: CPU-heavy calls such as bcrypt (CPU_POOL_SIZE, default 4), kept
+       separate so a burst of logins can't starve database work
+- io:  file writes (IO_POOL_SIZE, default 4): profile JSON, knowledge-store
+       checkpoints, generated audio
+
+Stores that rewrite a whole file on every mutation use WriteBehind, so a
+burst of mutations costs one write on the io pool instead of one each.
+"""
+import asyncio
+import os
+import threading
+import weakref
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Dict, Optional
+
+
+class BlockingExecutor:
+    def __init__(self, name: str, max_workers: int):
+        self.name = name
+        self.max_workers = max_workers
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self.submitted = 0
+        self.completed = 0
+
+    def _get_pool(self) -> ThreadPoolExecutor:
+        if self._pool is None:
+            with self._lock:
+                if self._pool is None:
+                    self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix=f"{self.name}-pool")
+        return self._pool
+
+    def submit(self, fn: Callable[..., Any], *args, **kwargs) -> Future:
+        """Queue fn(*args, **kwargs) from any thread; no event loop needed."""
+        future = self._get_pool().submit(partial(fn, *args, **kwargs))
+        with self._lock:
+            self.submitted += 1
+        future.add_done_callback(self._done)
+        return future
+
+    def _done(self, future: Future):
+        with self._lock:
+            self.completed += 1
+
+    async def run(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """Run fn(*args, **kwargs) on the pool and await its result."""
+        return await asyncio.wrap_future(self.submit(fn, *args, **kwargs))
+
+    def stats(self) -> Dict[str, Any]:
+        return {"workers": self.max_workers, "submitted": self.submitted,
+                "pending": self.submitted - self.completed}
+
+    def shutdown(self, wait: bool = True):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=wait)
+                self._pool = None
+
+
+db_executor = BlockingExecutor("db", int(os.getenv("DB_POOL_SIZE", "8")))
+cpu_executor = BlockingExecutor("cpu", int(os.getenv("CPU_POOL_SIZE", "4")))
+io_executor = BlockingExecutor("io", int(os.getenv("IO_POOL_SIZE", "4")))
+EXECUTORS: Dict[str, BlockingExecutor] = {"db": db_executor, "cpu": cpu_executor, "io": io_executor}
+
+
+async def run_db(fn: Callable[..., Any], *args, **kwargs) -> Any:
+    """Blocking store/DB call off the event loop."""
+    return await db_executor.run(fn, *args, **kwargs)
+
+
+async def run_in_session(fn: Callable[..., Any], *args, **kwargs) -> Any:
+    """fn(db, *args, **kwargs) with a SessionLocal opened and closed on the DB pool thread."""
+    from src.db.database import SessionLocal
+
+    def call():
+        with SessionLocal() as db:
+            return fn(db, *args, **kwargs)
+    return await db_executor.run(call)
+
+
+async def run_cpu(fn: Callable[..., Any], *args, **kwargs) -> Any:
+    """CPU-bound call (e.g. bcrypt) off the event loop."""
+    return await cpu_executor.run(fn, *args, **kwargs)
+
+
+async def run_io(fn: Callable[..., Any], *args, **kwargs) -> Any:
+    """Blocking file I/O off the event loop."""
+    return await io_executor.run(fn, *args, **kwargs)
+
+
+WRITE_BEHIND_DELAY = int(os.getenv("WRITE_BEHIND_MS", "20")) / 1000
+_writers: "weakref.WeakSet[WriteBehind]" = weakref.WeakSet()
+
+
+class WriteBehind:
+    """
+    Coalescing background writer for one file.
+
+    mark() records that the in-memory state changed and returns at once;
+    `write` runs on the io pool `delay` seconds later, and every mark()
+    that lands before (or while) it runs is covered by that one write or
+    the single follow-up write. The delay is a threading.Timer, so no pool
+    thread sits idle while a burst lands; only the write itself is submitted.
+    Changes made in the last `delay` seconds
+    before a crash are lost; flush() writes them synchronously, and
+    shutdown_executors() flushes every writer before the pools close.
+    """
+
+    def __init__(self, write: Callable[[], None], delay: Optional[float] = None,
+                 executor: Optional[BlockingExecutor] = None):
+        self.write = write
+        self.delay = WRITE_BEHIND_DELAY if delay is None else delay
+        self.executor = executor or io_executor
+        self.marks = 0
+        self.writes = 0
+        self._dirty = False
+        self._timer: Optional[threading.Timer] = None
+        self._future: Optional[Future] = None
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock() # One write at a time, worker or flush()
+        _writers.add(self)
+
+    def mark(self):
+        with self._lock:
+            self._dirty = True
+            self.marks += 1
+            if self._future is None and self._timer is None:
+                if self.delay: # Let the rest of the burst land first
+                    self._timer = threading.Timer(self.delay, self._submit)
+                    self._timer.daemon = True
+                    self._timer.start()
+                else:
+                    self._future = self.executor.submit(self._drain)
+
+    def _submit(self):
+        # Timer thread: hand the write to the pool, unless flush() already did it
+        with self._lock:
+            if self._timer is not threading.current_thread():
+                return
+            self._timer = None
+            if self._dirty:
+                self._future = self.executor.submit(self._drain)
+
+    def _drain(self):
+        while True:
+            with self._lock:
+                if not self._dirty:
+                    self._future = None
+                    return
+                self._dirty = False
+            self._write_once()
+
+    def _write_once(self):
+        with self._write_lock:
+            try:
+                self.write()
+                self.writes += 1
+            except Exception as e:
+                print(f"⚠️ Write-behind failed: {e}")
+
+    def flush(self):
+        """Write pending changes now, on the calling thread."""
+        with self._lock:
+            dirty, self._dirty = self._dirty, False
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        if dirty:
+            self._write_once()
+        else:
+            with self._write_lock: # Wait out a write already in progress
+                pass
+
+    @property
+    def pending(self) -> bool:
+        return self._dirty or self._timer is not None or self._future is not None
+
+
+def flush_write_behind():
+    for writer in list(_writers):
+        writer.flush()
+
+
+def shutdown_executors(wait: bool = True):
+    flush_write_behind()
+    for executor in EXECUTORS.values():
+        executor.shutdown(wait=wait)
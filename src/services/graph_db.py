@@ -1,74 +1,244 @@
 
-from sqlalchemy.orm import Session
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import func, literal, or_, and_, select
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, aliased
 from src.db.models import GraphNode, GraphEdge
+from src.memory.pagination import clamp_limit, decode_cursor, encode_cursor
+
+IN_CHUNK = 500 # Keeps IN (...) lists well under SQLite's bound-variable limit
+# Dedup is enforced by the unique indexes (see models / migration 1): inserts skip existing rows
+NODE_KEY = ["user_id", "label"]
+EDGE_KEY = ["source_id", "target_id", "relationship"]
+GRAPH_MAX_PAGE = 2000
+MAX_DEPTH = 5
+
+NodeSpec = Tuple[str, str] # (label, type)
+EdgeSpec = Tuple[int, int, str] # (source_id, target_id, relationship)
+
+
+def _chunks(items: Sequence[Any], size: int = IN_CHUNK) -> Iterable[Sequence[Any]]:
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
 
 class GraphService:
     def __init__(self, db: Session):
         self.db = db
 
-    def get_user_graph(self, user_id: int):
-        nodes = self.db.query(GraphNode).filter(GraphNode.user_id == user_id).all()
-        # Find edges where both source and target belong to this user's nodes
-        node_ids = [n.id for n in nodes]
-        edges = self.db.query(GraphEdge).filter(
-            GraphEdge.source_id.in_(node_ids),
-            GraphEdge.target_id.in_(node_ids)
-        ).all()
-        
+    def get_user_graph(self, user_id: int, types: Optional[List[str]] = None,
+                       limit: Optional[int] = None, cursor: Optional[str] = None) -> Dict[str, Any]:
+        """
+        The user's nodes (optionally only `types`) and the edges between them.
+        With `limit`, nodes come in id order one page at a time, and each page
+        carries the edges whose source is on it, so every edge arrives exactly
+        once; pass back `next_cursor` for the next page.
+        Two index-driven queries (nodes, then one JOIN for edges); no IN lists.
+        """
+        after = self._cursor_key(cursor, 1)[0] if cursor else 0
+        query = (select(GraphNode.id, GraphNode.label, GraphNode.type)
+                 .where(GraphNode.user_id == user_id, GraphNode.id > after).order_by(GraphNode.id))
+        if types:
+            query = query.where(GraphNode.type.in_(types))
+        if limit is not None:
+            limit = clamp_limit(limit, GRAPH_MAX_PAGE)
+            query = query.limit(limit + 1)
+        nodes = self.db.execute(query).all()
+        more = limit is not None and len(nodes) > limit
+        nodes = nodes[:limit] if more else nodes
+
+        source, target = aliased(GraphNode), aliased(GraphNode)
+        edges = (select(GraphEdge.source_id, GraphEdge.target_id, GraphEdge.relationship)
+                 .join(source, source.id == GraphEdge.source_id)
+                 .join(target, target.id == GraphEdge.target_id)
+                 .where(source.user_id == user_id, target.user_id == user_id, source.id > after))
+        if types:
+            edges = edges.where(source.type.in_(types), target.type.in_(types))
+        if more:
+            edges = edges.where(source.id <= nodes[-1].id)
+        edges = self.db.execute(edges).all() if nodes else []
+
         return {
-            "nodes": [{"id": n.id, "label": n.label, "type": n.type, "group": n.type} for n in nodes],
-            "edges": [{"from": e.source_id, "to": e.target_id, "label": e.relationship} for e in edges]
+            "nodes": [self._node_dict(n) for n in nodes],
+            "edges": [{"from": e.source_id, "to": e.target_id, "label": e.relationship} for e in edges],
+            "next_cursor": encode_cursor(nodes[-1].id) if more else None
         }
 
+    def get_neighborhood(self, user_id: int, node_id: int, depth: int = 1, types: Optional[List[str]] = None,
+                         limit: int = 500, cursor: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        Nodes within `depth` hops of `node_id` (edges followed both ways),
+        nearest first, each with its hop distance, plus the edges between
+        them (with the page holding the edge's source). `types` filters the
+        returned nodes; the walk itself passes through any node.
+        One recursive CTE; None if the start node isn't the user's.
+        """
+        if self.db.scalar(select(GraphNode.id).where(GraphNode.id == node_id, GraphNode.user_id == user_id)) is None:
+            return None
+        depth = max(0, min(int(depth), MAX_DEPTH))
+        limit = clamp_limit(limit, GRAPH_MAX_PAGE)
+
+        hops = select(literal(node_id).label("id"), literal(0).label("depth")).cte("hops", recursive=True)
+        prev = hops.alias("prev")
+        hops = hops.union(
+            select(GraphEdge.target_id, prev.c.depth + 1).join(prev, GraphEdge.source_id == prev.c.id)
+            .where(prev.c.depth < depth),
+            select(GraphEdge.source_id, prev.c.depth + 1).join(prev, GraphEdge.target_id == prev.c.id)
+            .where(prev.c.depth < depth),
+        )
+        reach = select(hops.c.id, func.min(hops.c.depth).label("depth")).group_by(hops.c.id).subquery("reach")
+        found = (select(GraphNode.id, GraphNode.label, GraphNode.type, reach.c.depth)
+                 .join(reach, reach.c.id == GraphNode.id).where(GraphNode.user_id == user_id))
+        if types:
+            found = found.where(GraphNode.type.in_(types))
+        found = found.cte("found")
+
+        page = select(found).order_by(found.c.depth, found.c.id)
+        if cursor:
+            after_depth, after_id = self._cursor_key(cursor, 2)
+            page = page.where(or_(found.c.depth > after_depth, and_(found.c.depth == after_depth, found.c.id > after_id)))
+        nodes = self.db.execute(page.limit(limit + 1)).all()
+        more = len(nodes) > limit
+        nodes = nodes[:limit]
+
+        on_page = page.limit(limit).cte("on_page")
+        # Edges out of the page whose target is in the neighbourhood. A JOIN on `found` rescans
+        # it per edge, so membership is an IN (subquery), which SQLite answers from an
+        # ephemeral index; `+ 0` keeps the planner from iterating that list against the edge index.
+        edges = (select(GraphEdge.source_id, GraphEdge.target_id, GraphEdge.relationship)
+                 .join(on_page, on_page.c.id == GraphEdge.source_id)
+                 .where((GraphEdge.target_id + 0).in_(select(found.c.id))))
+        edges = self.db.execute(edges).all() if nodes else []
+
+        return {
+            "nodes": [dict(self._node_dict(n), depth=n.depth) for n in nodes],
+            "edges": [{"from": e.source_id, "to": e.target_id, "label": e.relationship} for e in edges],
+            "next_cursor": encode_cursor(nodes[-1].depth, nodes[-1].id) if more else None
+        }
+
+    @staticmethod
+    def _node_dict(n) -> Dict[str, Any]:
+        return {"id": n.id, "label": n.label, "type": n.type, "group": n.type}
+
+    @staticmethod
+    def _cursor_key(cursor: str, size: int) -> List[int]:
+        return decode_cursor(cursor, *[int] * size)
+
     def add_node(self, user_id: int, label: str, type: str = "FACT"):
-        # Check existing
-        existing = self.db.query(GraphNode).filter(
-            GraphNode.user_id == user_id, 
-            GraphNode.label == label
-        ).first()
-        if existing:
-            return existing
-            
-        new_node = GraphNode(user_id=user_id, label=label, type=type)
-        self.db.add(new_node)
+        # INSERT ... ON CONFLICT DO NOTHING: the unique index does the existence check
+        stmt = insert(GraphNode).values(user_id=user_id, label=label, type=type)
+        new_node = self.db.scalars(stmt.on_conflict_do_nothing(index_elements=NODE_KEY).returning(GraphNode)).first()
         self.db.commit()
-        self.db.refresh(new_node)
-        return new_node
+        if new_node is not None:
+            return new_node
+        return self.db.scalars(select(GraphNode).where(GraphNode.user_id == user_id, GraphNode.label == label)).one()
 
     def add_edge(self, source_id: int, target_id: int, relationship: str):
-        existing = self.db.query(GraphEdge).filter(
+        stmt = insert(GraphEdge).values(source_id=source_id, target_id=target_id, relationship=relationship)
+        edge = self.db.scalars(stmt.on_conflict_do_nothing(index_elements=EDGE_KEY).returning(GraphEdge)).first()
+        self.db.commit()
+        if edge is not None:
+            return edge
+        return self.db.scalars(select(GraphEdge).where(
             GraphEdge.source_id == source_id,
             GraphEdge.target_id == target_id,
             GraphEdge.relationship == relationship
-        ).first()
-        if existing: return existing
-        
-        edge = GraphEdge(source_id=source_id, target_id=target_id, relationship=relationship)
-        self.db.add(edge)
-        self.db.commit()
-        return edge
+        )).one()
 
     def auto_extract_facts(self, user_id: int, text: str):
         pass
 
-    def delete_node(self, node_id: int):
+    def _owned_node(self, node_id: int, user_id: Optional[int]):
+        query = self.db.query(GraphNode).filter(GraphNode.id == node_id)
+        if user_id is not None:
+            query = query.filter(GraphNode.user_id == user_id)
+        return query.first()
+
+    def owns_nodes(self, user_id: int, node_ids: Iterable[int]) -> bool:
+        """True if every id in node_ids is one of the user's nodes."""
+        ids = set(node_ids)
+        found = self.db.scalar(select(func.count(GraphNode.id)).where(GraphNode.id.in_(ids), GraphNode.user_id == user_id))
+        return found == len(ids)
+
+    def delete_node(self, node_id: int, user_id: Optional[int] = None):
+        """Delete a node and its edges; with user_id, only if the node is that user's."""
+        node = self._owned_node(node_id, user_id)
+        if not node:
+            return False
         # Edges will cascade if configured in DB, else manual delete
         # For SQLite default, let's manual delete edges first
         self.db.query(GraphEdge).filter(
             (GraphEdge.source_id == node_id) | (GraphEdge.target_id == node_id)
         ).delete()
-        
-        node = self.db.query(GraphNode).filter(GraphNode.id == node_id).first()
-        if node:
-            self.db.delete(node)
-            self.db.commit()
-            return True
-        return False
+        self.db.delete(node)
+        self.db.commit()
+        return True
 
-    def update_node(self, node_id: int, new_label: str):
-        node = self.db.query(GraphNode).filter(GraphNode.id == node_id).first()
+    def update_node(self, node_id: int, new_label: str, user_id: Optional[int] = None):
+        node = self._owned_node(node_id, user_id)
         if node:
             node.label = new_label
-            self.db.commit()
+            try:
+                self.db.commit()
+            except IntegrityError:
+                self.db.rollback()
+                raise ValueError(f"A node labelled '{new_label}' already exists")
             return node
         return None
+
+    # --- Bulk API: executemany inserts (conflicts skipped), set-based id lookups, one commit ---
+    def add_nodes(self, user_id: int, nodes: Iterable[NodeSpec], commit: bool = True) -> Dict[str, int]:
+        """
+        Create the user's (label, type) nodes that don't exist yet.
+        Returns label -> node id for every requested label (existing ones keep their type).
+        """
+        wanted: Dict[str, str] = {}
+        for label, type in nodes:
+            wanted.setdefault(label, type)
+        labels = list(wanted)
+        if labels:
+            self.db.execute(insert(GraphNode).on_conflict_do_nothing(index_elements=NODE_KEY),
+                            [{"user_id": user_id, "label": label, "type": wanted[label]} for label in labels])
+        ids: Dict[str, int] = {}
+        for chunk in _chunks(labels):
+            rows = self.db.execute(
+                select(GraphNode.label, GraphNode.id).where(GraphNode.user_id == user_id, GraphNode.label.in_(chunk))
+            )
+            for label, node_id in rows:
+                ids[label] = node_id
+        if commit:
+            self.db.commit()
+        return ids
+
+    def add_edges(self, edges: Iterable[EdgeSpec], commit: bool = True) -> int:
+        """Insert the (source_id, target_id, relationship) edges that don't exist yet. Returns how many were added."""
+        rows = [{"source_id": s, "target_id": t, "relationship": r}
+                for s, t, r in dict.fromkeys((int(s), int(t), r) for s, t, r in edges)]
+        added = 0
+        if rows:
+            stmt = insert(GraphEdge).on_conflict_do_nothing(index_elements=EDGE_KEY).returning(GraphEdge.id)
+            added = len(self.db.execute(stmt, rows).all())
+        if commit:
+            self.db.commit()
+        return added
+
+    def upsert_subgraph(self, user_id: int, nodes: Iterable[NodeSpec],
+                        edges: Iterable[Tuple[str, str, str]] = (), default_type: str = "FACT") -> Dict[str, Any]:
+        """
+        Merge a labelled subgraph into the user's graph in one transaction.
+        `edges` are (from_label, to_label, relationship); endpoint labels not
+        listed in `nodes` are created with `default_type`.
+        """
+        nodes, edges = list(nodes), list(edges)
+        for from_label, to_label, _ in edges:
+            nodes.extend([(from_label, default_type), (to_label, default_type)]) # setdefault keeps explicit types
+        try:
+            ids = self.add_nodes(user_id, nodes, commit=False)
+            added = self.add_edges([(ids[f], ids[t], r) for f, t, r in edges], commit=False)
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+        return {"nodes": ids, "edges_added": added}
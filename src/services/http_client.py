@@ -0,0 +1,61 @@
+"""
+Shared HTTP Client Pool
+
+One long-lived httpx.AsyncClient per event loop, reused by every
+outbound call (Serper, ElevenLabs) so connections, TLS sessions and
+HTTP/2 streams are kept alive instead of re-established per request.
+"""
+import asyncio
+from typing import Optional
+
+import httpx
+
+try:
+    import h2  # noqa: F401  (enables httpx HTTP/2 support)
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+DEFAULT_LIMITS = httpx.Limits(max_connections=100, max_keepalive_connections=20, keepalive_expiry=30.0)
+DEFAULT_TIMEOUT = httpx.Timeout(10.0, connect=5.0)
+
+
+class HTTPClientPool:
+    """
+    Lazily creates the shared client. A client is bound to the loop it was
+    created on, so a new one is made if called from a different loop
+    (e.g. successive asyncio.run() calls in scripts).
+    """
+
+    def __init__(self, limits: httpx.Limits = DEFAULT_LIMITS, timeout: httpx.Timeout = DEFAULT_TIMEOUT):
+        self.limits = limits
+        self.timeout = timeout
+        self._client: Optional[httpx.AsyncClient] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def get(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._client.is_closed or self._loop is not loop:
+            self._client = httpx.AsyncClient(http2=HTTP2_AVAILABLE, limits=self.limits, timeout=self.timeout)
+            self._loop = loop
+        return self._client
+
+    async def startup(self):
+        """Create the client up front (FastAPI lifespan)."""
+        self.get()
+        print(f"🌐 HTTP client pool ready (HTTP/2: {'on' if HTTP2_AVAILABLE else 'off'})")
+
+    async def aclose(self):
+        """Close pooled connections (FastAPI lifespan shutdown)."""
+        if self._client is not None and not self._client.is_closed:
+            await self._client.aclose()
+        self._client = None
+        self._loop = None
+
+
+http_pool = HTTPClientPool()
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Shared pooled client for the current event loop."""
+    return http_pool.get()
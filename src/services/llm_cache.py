@@ -0,0 +1,85 @@
+"""
+LLM Response Cache
+
+Sits in front of SpoonService.chat:
+1. Exact tier: sha256 of (model, messages) in a TTL/LRU ResponseCache,
+   optionally persisted to SQLite.
+2. Semantic tier (opt-in): near-duplicate requests for the same model and
+   call site reuse a cached answer if their embeddings are within
+   `similarity_threshold` cosine. Kept in memory only. Only calls that pass
+   `semantic_text` (the variable part of the prompt, e.g. the user's query)
+   take part: embedding a long fixed template would make "extract the food
+   from 'I ate an apple'" and "... 'I ate a banana'" near-identical (0.99).
+"""
+import hashlib
+import json
+from collections import deque
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from .response_cache import ResponseCache
+
+
+class LLMResponseCache:
+    def __init__(self, max_entries: int = 4096, ttl: float = 24 * 3600,
+                 db_path: Optional[str] = None, semantic: bool = False,
+                 similarity_threshold: float = 0.97, semantic_entries: int = 512):
+        self.exact = ResponseCache(max_entries=max_entries, default_ttl=ttl, db_path=db_path, namespace="llm")
+        self.ttl = ttl
+        self.semantic = semantic
+        self.similarity_threshold = similarity_threshold
+        self.semantic_entries = semantic_entries
+        self._embedder = None
+        self._semantic_index: Dict[str, deque] = {}  # "model|tag" -> deque[(vec, exact_key)]
+        self._semantic_hits: Dict[str, int] = {}
+
+        if semantic:
+            from src.rag.embeddings import HashingEmbedder
+            self._embedder = HashingEmbedder()
+
+    @staticmethod
+    def make_key(model: str, messages: List[Dict[str, Any]]) -> str:
+        payload = json.dumps({"model": model, "messages": messages}, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    async def get(self, model: str, messages: List[Dict[str, Any]], tag: str = "default",
+                  semantic_text: Optional[str] = None) -> Optional[str]:
+        """Exact tier first (SQLite only on a memory miss, off the loop), then semantic."""
+        key = self.make_key(model, messages)
+        cached = await self.exact.aget(key, tag=tag)
+        if cached is not None or not self.semantic or not semantic_text:
+            return cached
+
+        bucket = self._semantic_index.get(f"{model}|{tag}")
+        if not bucket:
+            return None
+        query_vec = self._embedder.embed([semantic_text])[0]
+        vecs = np.stack([vec for vec, _ in bucket])
+        scores = vecs @ query_vec
+        best = int(np.argmax(scores))
+        if scores[best] < self.similarity_threshold:
+            return None
+        # Peek without counting a second exact-tier miss
+        value = await self.exact.aget(bucket[best][1], tag=None)
+        if value is not None:
+            self._semantic_hits[tag] = self._semantic_hits.get(tag, 0) + 1
+        return value
+
+    def set(self, model: str, messages: List[Dict[str, Any]], response: str, tag: str = "default",
+            semantic_text: Optional[str] = None):
+        key = self.make_key(model, messages)
+        self.exact.set(key, response, ttl=self.ttl)
+        if self.semantic and semantic_text:
+            bucket = self._semantic_index.setdefault(f"{model}|{tag}", deque(maxlen=self.semantic_entries))
+            bucket.append((self._embedder.embed([semantic_text])[0], key))
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Per call site: exact hits/misses, semantic hits and overall hit rate."""
+        out = {}
+        for tag, counts in self.exact.stats().items():
+            semantic_hits = self._semantic_hits.get(tag, 0)
+            hits = counts["hits"] + counts["disk_hits"] + semantic_hits
+            total = counts["hits"] + counts["disk_hits"] + counts["misses"]
+            out[tag] = {**counts, "semantic_hits": semantic_hits, "hit_rate": hits / total if total else 0.0}
+        return out
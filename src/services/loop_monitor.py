@@ -0,0 +1,77 @@
+"""
+Event-Loop Stall Monitor
+
+A background task that asks to wake every `interval` seconds and records
+how late it actually woke. Any blocking call on the loop (a file write,
+a slow query, a password hash) shows up directly as lag, so the numbers
+say how long other in-flight requests were frozen.
+"""
+import asyncio
+import os
+from collections import deque
+from typing import Any, Deque, Dict, Optional
+
+
+class LoopStallMonitor:
+    def __init__(self, interval: float = 0.02, window: int = 4096, stall_threshold: float = 0.05):
+        self.interval = interval
+        self.stall_threshold = stall_threshold
+        self._lags: Deque[float] = deque(maxlen=window) # Most recent lags, seconds
+        self._task: Optional[asyncio.Task] = None
+        self.reset()
+
+    def reset(self):
+        self._lags.clear()
+        self.samples = 0
+        self.max_lag = 0.0
+        self.total_stall = 0.0 # Sum of lag over stall_threshold ticks
+        self.stalls = 0
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            self.record(max(0.0, loop.time() - expected))
+
+    def record(self, lag: float):
+        self._lags.append(lag)
+        self.samples += 1
+        self.max_lag = max(self.max_lag, lag)
+        if lag >= self.stall_threshold:
+            self.stalls += 1
+            self.total_stall += lag
+
+    def start(self):
+        """Start sampling on the running loop (FastAPI lifespan)."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def percentile(self, q: float) -> float:
+        if not self._lags:
+            return 0.0
+        lags = sorted(self._lags)
+        return lags[min(len(lags) - 1, int(q * len(lags)))]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "samples": self.samples,
+            "interval_ms": self.interval * 1000,
+            "p50_ms": round(self.percentile(0.50) * 1000, 2),
+            "p99_ms": round(self.percentile(0.99) * 1000, 2),
+            "max_ms": round(self.max_lag * 1000, 2),
+            "stalls": self.stalls, # Ticks at least stall_threshold late
+            "stall_ms": round(self.total_stall * 1000, 1),
+        }
+
+
+loop_monitor = LoopStallMonitor(interval=int(os.getenv("LOOP_MONITOR_MS", "20")) / 1000)
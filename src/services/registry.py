@@ -0,0 +1,208 @@
+"""
+Process-wide Service Registry
+
+One lazily-created instance per store/service, shared by the API,
+graph nodes and tools, so the knowledge base, dietary tables and user
+profile are loaded once and every component sees the same state.
+"""
+import asyncio
+import inspect
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+
+class ServiceRegistry:
+    """
+    Name -> factory map with lazy, thread-safe, create-once semantics.
+    Warm-up instantiates services ahead of the first request; startup and
+    shutdown hooks (sync or async) are run from the FastAPI lifespan.
+    """
+
+    def __init__(self):
+        self._factories: Dict[str, Callable[[], Any]] = {}
+        self._instances: Dict[str, Any] = {}
+        self._startup_hooks: List[Callable[[], Any]] = []
+        self._shutdown_hooks: List[Callable[[], Any]] = []
+        self._lock = threading.RLock()
+
+    def register(self, name: str, factory: Callable[[], Any]):
+        """Register (or replace) the factory for `name`. Existing instances are kept."""
+        with self._lock:
+            self._factories[name] = factory
+
+    def set(self, name: str, instance: Any):
+        """Pin an explicit instance (e.g. a fake in a script or test harness)."""
+        with self._lock:
+            self._instances[name] = instance
+
+    def get(self, name: str) -> Any:
+        """Return the shared instance, creating it on first use."""
+        instance = self._instances.get(name)
+        if instance is not None:
+            return instance
+        with self._lock:
+            if name not in self._instances:
+                if name not in self._factories:
+                    raise KeyError(f"No service registered under '{name}'")
+                self._instances[name] = self._factories[name]()
+            return self._instances[name]
+
+    def is_initialized(self, name: str) -> bool:
+        return name in self._instances
+
+    def on_startup(self, hook: Callable[[], Any]):
+        self._startup_hooks.append(hook)
+        return hook
+
+    def on_shutdown(self, hook: Callable[[], Any]):
+        self._shutdown_hooks.append(hook)
+        return hook
+
+    async def warm_up(self, names: Optional[Iterable[str]] = None) -> Dict[str, float]:
+        """
+        Instantiate services (all registered ones by default) off the event loop,
+        then run startup hooks. Returns per-service init time in seconds.
+        """
+        timings = {}
+        for name in list(names or self._factories):
+            start = time.perf_counter()
+            await asyncio.to_thread(self.get, name)
+            timings[name] = time.perf_counter() - start
+        for hook in self._startup_hooks:
+            result = hook()
+            if inspect.isawaitable(result):
+                await result
+        return timings
+
+    async def shutdown(self):
+        """Run shutdown hooks in reverse registration order."""
+        for hook in reversed(self._shutdown_hooks):
+            try:
+                result = hook()
+                if inspect.isawaitable(result):
+                    await result
+            except Exception as e:
+                print(f"⚠️ Shutdown hook failed: {e}")
+
+    def reset(self):
+        """Drop all instances (factories and hooks stay registered)."""
+        with self._lock:
+            self._instances.clear()
+
+
+registry = ServiceRegistry()
+
+
+# --- Default services (imports deferred to avoid import cycles) ---
+def _profile_stores():
+    import os
+    from src.memory.profile_stores import ProfileStores
+    # SQLite tables by default (imports data/user_profile.json once); PROFILE_BACKEND=json keeps the old file store
+    return ProfileStores(backend=os.getenv("PROFILE_BACKEND", "sql"),
+                         shards=int(os.getenv("PROFILE_SHARDS", "1")),
+                         max_hot=int(os.getenv("PROFILE_HOT_USERS", "256")))
+
+
+def _user_profile_store():
+    # Account-less local profile; per-user stores come from profile_stores.for_user()
+    return registry.get("profile_stores").for_user(None)
+
+
+def _knowledge_store():
+    import os
+    from src.rag.store import NutritionVectorStore
+    from src.rag.embeddings import HashingEmbedder
+    # Dense mode catches near-miss phrasings BM25 can't (set RAG_DENSE=0 to disable).
+    # No IVF index: on hashed vectors nprobe=8 keeps only ~60% of the exact top-3 and
+    # needs most lists probed to pass 90% (benchmarks/bench_ann_recall.py), so exact
+    # cosine it is. mmap snapshot opens without parsing
+    embedder = HashingEmbedder() if os.getenv("RAG_DENSE", "1") != "0" else None
+    return NutritionVectorStore(persist_directory="data", embedder=embedder, snapshot_format="mmap")
+
+
+def _dietary_store():
+    from src.rag.dietary_store import DietaryVectorStore
+    return DietaryVectorStore()
+
+
+def _universal_rag():
+    from src.rag.universal_rag import UniversalNutritionRag
+    return UniversalNutritionRag()
+
+
+def _serper():
+    from src.services.serper import SerperService
+    return SerperService()
+
+
+def _voice():
+    from src.services.voice import VoiceService
+    return VoiceService()
+
+
+def _audio_jobs():
+    from src.services.audio_jobs import AudioJobManager
+    return AudioJobManager(registry.get("voice"))
+
+
+def _intent_classifier():
+    import os
+    from src.graph.intent_classifier import IntentClassifier
+    # LOCAL_ROUTER=0 sends every query to the LLM router
+    if os.getenv("LOCAL_ROUTER", "1") == "0":
+        return False
+    return IntentClassifier()
+
+
+def _spoon():
+    from src.services.spoon_service import SpoonService
+    return SpoonService.get_instance()
+
+
+registry.register("profile_stores", _profile_stores)
+registry.register("user_profile_store", _user_profile_store)
+registry.register("knowledge_store", _knowledge_store)
+registry.register("dietary_store", _dietary_store)
+registry.register("universal_rag", _universal_rag)
+registry.register("serper", _serper)
+registry.register("voice", _voice)
+registry.register("audio_jobs", _audio_jobs)
+registry.register("spoon", _spoon)
+registry.register("intent_classifier", _intent_classifier)
+
+
+# --- Lifespan hooks ---
+def _register_http_pool():
+    from src.services.http_client import http_pool
+    registry.on_startup(http_pool.startup)
+    registry.on_shutdown(http_pool.aclose)
+
+
+_register_http_pool()
+
+
+def _register_loop_monitor():
+    import os
+    from src.services.loop_monitor import loop_monitor
+    # LOOP_MONITOR=0 turns off event-loop lag sampling (/loop/stats)
+    if os.getenv("LOOP_MONITOR", "1") != "0":
+        registry.on_startup(loop_monitor.start)
+        registry.on_shutdown(loop_monitor.stop)
+
+
+_register_loop_monitor()
+
+
+@registry.on_shutdown
+def _shutdown_executors():
+    # Runs after audio jobs are cancelled: flushes write-behind files and waits for in-flight work before exit
+    from src.services.executors import shutdown_executors
+    shutdown_executors(wait=True)
+
+
+@registry.on_shutdown
+async def _cancel_audio_jobs():
+    # Registered after the pool, so it runs before the pool closes
+    if registry.is_initialized("audio_jobs"):
+        await registry.get("audio_jobs").shutdown()
@@ -0,0 +1,171 @@
+"""
+TTL + LRU Response Cache
+
+Size-bounded in-memory LRU with per-entry expiry, optionally backed by a
+SQLite table so cached responses survive restarts. Values must be
+JSON-serializable. Hit/miss counters are kept per caller-supplied tag
+(e.g. Serper endpoint or LLM call site).
+
+Coroutines use aget(): the in-memory LRU is checked on the event loop and
+only a miss goes to SQLite, on the db pool. set() never touches the disk
+itself; new entries are written in batches by a WriteBehind on the db pool.
+"""
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from .executors import WriteBehind, db_executor, run_db
+
+_MISSING = object()
+
+
+class ResponseCache:
+    def __init__(self, max_entries: int = 1024, default_ttl: float = 3600.0,
+                 db_path: Optional[str] = None, namespace: str = "default"):
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self.namespace = namespace
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()  # key -> (expires_at, value)
+        self._stats: Dict[str, Dict[str, int]] = {}
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        self._db_lock = threading.Lock() # One connection, used from pool threads and sync callers
+        self._pending: Dict[str, Tuple[float, Any]] = {} # Set but not yet on disk
+        self._writer = WriteBehind(self._flush_pending, executor=db_executor)
+        if db_path:
+            self._open_db(db_path)
+
+    # --- SQLite tier ---
+    def _open_db(self, db_path: str):
+        try:
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS response_cache ("
+                " namespace TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL, expires_at REAL NOT NULL,"
+                " PRIMARY KEY (namespace, key))"
+            )
+            self._db.execute("DELETE FROM response_cache WHERE expires_at < ?", (time.time(),))
+            self._db.commit()
+        except sqlite3.Error as e:
+            print(f"⚠️ Response cache DB disabled: {e}")
+            self._db = None
+
+    def _db_get(self, key: str):
+        if self._db is None:
+            return _MISSING, 0.0
+        with self._lock:
+            pending = self._pending.get(key)
+        if pending is not None:
+            expires_at, value = pending
+            return (value, expires_at) if expires_at >= time.time() else (_MISSING, 0.0)
+        with self._db_lock:
+            row = self._db.execute(
+                "SELECT value, expires_at FROM response_cache WHERE namespace = ? AND key = ?",
+                (self.namespace, key),
+            ).fetchone()
+        if row is None or row[1] < time.time():
+            return _MISSING, 0.0
+        return json.loads(row[0]), row[1]
+
+    def _flush_pending(self):
+        """WriteBehind target: every entry set since the last flush, in one transaction."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if self._db is None or not pending:
+            return
+        rows = [(self.namespace, key, json.dumps(value), expires_at) for key, (expires_at, value) in pending.items()]
+        with self._db_lock:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO response_cache (namespace, key, value, expires_at) VALUES (?, ?, ?, ?)", rows)
+            self._db.commit()
+
+    def flush(self):
+        """Write pending entries to SQLite now (also done at shutdown)."""
+        self._writer.flush()
+
+    # --- Public API ---
+    def _count(self, tag: Optional[str], field: str):
+        if tag is None:
+            return
+        stats = self._stats.setdefault(tag, {"hits": 0, "disk_hits": 0, "misses": 0})
+        stats[field] += 1
+
+    def _get_memory(self, key: str, tag: Optional[str]) -> Any:
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] >= now:
+                    self._entries.move_to_end(key)
+                    self._count(tag, "hits")
+                    return entry[1]
+                del self._entries[key]
+        return _MISSING
+
+    def _promote(self, key: str, tag: Optional[str], value: Any, expires_at: float) -> Any:
+        with self._lock:
+            if value is _MISSING:
+                self._count(tag, "misses")
+                return None
+            self._insert(key, value, expires_at)
+            self._count(tag, "disk_hits")
+            return value
+
+    def get(self, key: str, tag: Optional[str] = "default") -> Any:
+        """
+        Return the cached value or None. Disk hits are promoted into memory.
+        Pass tag=None to look up without touching the counters. Blocks on
+        SQLite for a memory miss: coroutines should use aget().
+        """
+        value = self._get_memory(key, tag)
+        if value is not _MISSING:
+            return value
+        return self._promote(key, tag, *self._db_get(key))
+
+    async def aget(self, key: str, tag: Optional[str] = "default") -> Any:
+        """get() for coroutines: a memory miss is looked up in SQLite on the db pool."""
+        value = self._get_memory(key, tag)
+        if value is not _MISSING:
+            return value
+        if self._db is None:
+            return self._promote(key, tag, _MISSING, 0.0)
+        return self._promote(key, tag, *await run_db(self._db_get, key))
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        expires_at = time.time() + (ttl if ttl is not None else self.default_ttl)
+        with self._lock:
+            self._insert(key, value, expires_at)
+            if self._db is not None:
+                self._pending[key] = (expires_at, value)
+        if self._db is not None:
+            self._writer.mark()
+
+    def _insert(self, key: str, value: Any, expires_at: float):
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._pending.clear()
+        if self._db is not None:
+            with self._db_lock:
+                self._db.execute("DELETE FROM response_cache WHERE namespace = ?", (self.namespace,))
+                self._db.commit()
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Per-tag counters plus hit rate, e.g. {"places": {"hits": 3, "misses": 1, "hit_rate": 0.75}}."""
+        out = {}
+        for tag, counts in self._stats.items():
+            total = counts["hits"] + counts["disk_hits"] + counts["misses"]
+            out[tag] = {**counts, "hit_rate": (counts["hits"] + counts["disk_hits"]) / total if total else 0.0}
+        return out
+
+    def __len__(self) -> int:
+        return len(self._entries)
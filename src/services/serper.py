@@ -1,89 +1,94 @@
-
 import os
-import httpx
 import json
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
+
+from .http_client import get_http_client
+from .response_cache import ResponseCache
 
 class SerperService:
     """
     Wrapper for Serper.dev API to perform Google Searches and Places interaction.
+    All calls share one pooled keep-alive client (see http_client.py).
+    Results are cached per (endpoint, query, location) with per-endpoint TTLs.
     """
     BASE_URL = "https://google.serper.dev"
-    
-    def __init__(self):
+    # Nutrition facts barely change; opening hours and prices do
+    CACHE_TTLS = {"search": 24 * 3600, "places": 6 * 3600, "shopping": 3600}
+
+    def __init__(self, cache: Optional[ResponseCache] = None):
         self.api_key = os.getenv("SERPER_API_KEY")
         if not self.api_key:
             print("⚠️ SERPER_API_KEY not found in environment.")
-            
+        if cache is None:
+            db_path = os.getenv("SERPER_CACHE_DB", "data/serper_cache.db")
+            if db_path:
+                os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+            cache = ResponseCache(max_entries=2048, db_path=db_path or None, namespace="serper")
+        self.cache = cache
+
+    @staticmethod
+    def _cache_key(endpoint: str, query: str, location: str) -> str:
+        # "Vegan  Restaurants" / "vegan restaurants" share an entry
+        query = " ".join(query.lower().split())
+        location = " ".join(location.lower().split())
+        return f"{endpoint}|{query}|{location}"
+
+    async def _post(self, endpoint: str, payload: Dict[str, Any], result_key: str, label: str,
+                    cache_key: str) -> List[Dict[str, Any]]:
+        """POST to a Serper endpoint over the shared client and return data[result_key] (cached)."""
+        cached = await self.cache.aget(cache_key, tag=endpoint)
+        if cached is not None:
+            return cached
+
+        url = f"{self.BASE_URL}/{endpoint}"
+        headers = {
+            'X-API-KEY': self.api_key,
+            'Content-Type': 'application/json'
+        }
+        try:
+            response = await get_http_client().post(url, headers=headers, data=json.dumps(payload))
+            response.raise_for_status()
+            results = response.json().get(result_key, [])
+        except Exception as e:
+            print(f"Serper {label} Error: {e}")
+            return [] # Failures are not cached
+
+        self.cache.set(cache_key, results, ttl=self.CACHE_TTLS.get(endpoint))
+        return results
+
     async def search(self, query: str, location: str = "London, UK") -> List[Dict[str, Any]]:
         """General Google Search"""
         if not self.api_key: return []
-        
-        url = f"{self.BASE_URL}/search"
-        payload = json.dumps({
+
+        payload = {
             "q": query,
             "location": location,
             "gl": "gb" # Target UK
-        })
-        headers = {
-            'X-API-KEY': self.api_key,
-            'Content-Type': 'application/json'
         }
-        
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.post(url, headers=headers, data=payload)
-                data = response.json()
-                return data.get("organic", [])
-            except Exception as e:
-                print(f"Serper Search Error: {e}")
-                return []
+        return await self._post("search", payload, "organic", "Search",
+                                self._cache_key("search", query, location))
 
     async def find_places(self, query: str, location: str = "London") -> List[Dict[str, Any]]:
         """Find places (restaurants, shops)"""
         if not self.api_key: return []
-        
-        url = f"{self.BASE_URL}/places"
+
         # Places API expects separate location or embedded in query?
         # Serper places endpoint: {"q": "Restaurants in London"}
-        payload = json.dumps({
+        payload = {
             "q": f"{query} in {location}",
             "gl": "gb"
-        })
-        headers = {
-            'X-API-KEY': self.api_key,
-            'Content-Type': 'application/json'
         }
-        
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.post(url, headers=headers, data=payload)
-                data = response.json()
-                return data.get("places", [])
-            except Exception as e:
-                print(f"Serper Places Error: {e}")
-                return []
-                
+        return await self._post("places", payload, "places", "Places",
+                                self._cache_key("places", query, location))
+
     async def shopping_search(self, query: str, location: str = "London") -> List[Dict[str, Any]]:
-         """Specific Shopping Search"""
-         if not self.api_key: return []
-         
-         url = f"{self.BASE_URL}/shopping"
-         payload = json.dumps({
-             "q": query,
-             "location": location,
-             "gl": "gb"
-         })
-         headers = {
-             'X-API-KEY': self.api_key,
-             'Content-Type': 'application/json'
-         }
-         
-         async with httpx.AsyncClient() as client:
-             try:
-                 response = await client.post(url, headers=headers, data=payload)
-                 data = response.json()
-                 return data.get("shopping", [])
-             except Exception as e:
-                 print(f"Serper Shopping Error: {e}")
-                 return []
+        """Specific Shopping Search"""
+        if not self.api_key: return []
+
+        payload = {
+            "q": query,
+            "location": location,
+            "gl": "gb"
+        }
+        return await self._post("shopping", payload, "shopping", "Shopping",
+                                self._cache_key("shopping", query, location))
@@ -1,8 +1,10 @@
-
 from spoon_ai.llm import LLMManager, OpenAIProvider
 import os
+from typing import AsyncIterator, Optional
 from dotenv import load_dotenv
 
+from .llm_cache import LLMResponseCache
+
 load_dotenv()
 
 class SpoonService:
@@ -18,9 +20,71 @@ class SpoonService:
         # Initialize OpenAI Provider directly
         # It typically reads from env
         self.provider = OpenAIProvider()
+
+        # Response cache: exact (model, messages) hits persist in SQLite;
+        # LLM_SEMANTIC_CACHE=1 also reuses answers for near-identical prompts
+        db_path = os.getenv("LLM_CACHE_DB", "data/llm_cache.db")
+        if db_path:
+            os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self.cache = LLMResponseCache(
+            db_path=db_path or None,
+            semantic=os.getenv("LLM_SEMANTIC_CACHE", "0") == "1",
+        )
         print("🥄 SpoonOS LLM Service Initialized (Direct Provider)")
 
-    async def chat(self, messages: list, model: str = "gpt-4o-mini") -> str:
+    async def chat(self, messages: list, model: str = "gpt-4o-mini",
+                   cache_tag: str = "default", use_cache: bool = True,
+                   semantic_text: Optional[str] = None) -> str:
+        """
+        Single-shot completion. `cache_tag` names the call site for
+        per-site hit-rate metrics (see cache_stats()). `semantic_text` opts
+        the call into the semantic cache tier (see LLMResponseCache).
+        """
+        if use_cache:
+            cached = await self.cache.get(model, messages, tag=cache_tag, semantic_text=semantic_text)
+            if cached is not None:
+                return cached
+
+        content = await self._call_provider(messages, model)
+        if use_cache:
+            self.cache.set(model, messages, content, tag=cache_tag, semantic_text=semantic_text)
+        return content
+
+    async def chat_stream(self, messages: list, model: str = "gpt-4o-mini",
+                          cache_tag: str = "default", use_cache: bool = True,
+                          semantic_text: Optional[str] = None) -> AsyncIterator[str]:
+        """
+        Streaming completion: yields text deltas as the provider produces them.
+        A cache hit is yielded as one chunk; a fully streamed answer is cached
+        like chat() (a stream abandoned part-way is not).
+        """
+        if use_cache:
+            cached = await self.cache.get(model, messages, tag=cache_tag, semantic_text=semantic_text)
+            if cached is not None:
+                yield cached
+                return
+
+        if not hasattr(self.provider, 'chat_stream'):
+            content = await self._call_provider(messages, model)
+            if use_cache:
+                self.cache.set(model, messages, content, tag=cache_tag, semantic_text=semantic_text)
+            yield content
+            return
+
+        parts = []
+        try:
+            async for delta in self.provider.chat_stream(messages=messages, model=model):
+                if delta:
+                    parts.append(delta)
+                    yield delta
+        except Exception as e:
+            print(f"Spoon LLM Stream Error: {e}")
+            raise e
+
+        if use_cache:
+            self.cache.set(model, messages, "".join(parts), tag=cache_tag, semantic_text=semantic_text)
+
+    async def _call_provider(self, messages: list, model: str) -> str:
         try:
             # Attempt unified 'chat' method
             if hasattr(self.provider, 'chat'):
@@ -39,3 +103,6 @@ class SpoonService:
         except Exception as e:
             print(f"Spoon LLM Error: {e}")
             raise e
+
+    def cache_stats(self) -> dict:
+        return self.cache.stats()
@@ -1,17 +1,60 @@
 import os
-import uuid
+import re
 import asyncio
-import httpx
+from typing import AsyncIterator, List
 from dotenv import load_dotenv
 
+from .audio_cache import AudioCache
+from .executors import run_io
+from .http_client import get_http_client
+
 load_dotenv()
 
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+
+def split_sentences(text: str, max_chars: int = 300) -> List[str]:
+    """
+    Split text into sentence-sized TTS requests. Very short sentences are
+    merged into the next one, and overlong ones are cut on word boundaries.
+    """
+    chunks, current = [], ""
+    for sentence in _SENTENCE_END.split(text.strip()):
+        sentence = sentence.strip()
+        while len(sentence) > max_chars:
+            cut = sentence.rfind(" ", 0, max_chars)
+            cut = cut if cut > 0 else max_chars
+            if current:
+                chunks.append(current)
+                current = ""
+            chunks.append(sentence[:cut].strip())
+            sentence = sentence[cut:].strip()
+        if not sentence:
+            continue
+        current = f"{current} {sentence}".strip()
+        if len(current) >= 40: # Tiny fragments ("Hi!") ride along with the next sentence
+            chunks.append(current)
+            current = ""
+    if current:
+        chunks.append(current)
+    return chunks
+
+
 class VoiceService:
     def __init__(self):
         self.api_key = os.getenv("ELEVENLABS_API_KEY")
+        # ELEVENLABS_BASE_URL points at a local stub TTS server in dev/benchmarks
+        self.base_url = os.getenv("ELEVENLABS_BASE_URL", "https://api.elevenlabs.io").rstrip("/")
+        self.voice_id = os.getenv("ELEVENLABS_VOICE_ID", "JBFqnCBsd6RMkjVDRZzb") # George
+        self.model_id = "eleven_monolingual_v1"
+        self.voice_settings = {
+            "stability": 0.5,
+            "similarity_boost": 0.5
+        }
         # Save to src/api/static/audio for frontend access
         self.output_dir = os.path.join(os.getcwd(), "src", "api", "static", "audio")
-        os.makedirs(self.output_dir, exist_ok=True)
+        # Identical (text, voice, model, settings) reuse one file; the directory is LRU-capped
+        self.cache = AudioCache(self.output_dir, max_bytes=int(os.getenv("AUDIO_CACHE_MB", "200")) * 1024 * 1024)
         
         if not self.api_key:
              print("⚠️ WARNING: ELEVENLABS_API_KEY not found. Voice disabled.")
@@ -21,42 +64,99 @@ class VoiceService:
         if not self.api_key:
             return None
 
-        url = "https://api.elevenlabs.io/v1/text-to-speech/JBFqnCBsd6RMkjVDRZzb" # George
-        headers = {
-            "xi-api-key": self.api_key,
-            "Content-Type": "application/json"
-        }
-        payload = {
-            "text": text,
-            "model_id": "eleven_monolingual_v1",
-            "voice_settings": {
-                "stability": 0.5,
-                "similarity_boost": 0.5
-            }
-        }
+        key = self.audio_key(text)
+        cached = self.cache.get(key)
+        if cached:
+            return cached
+
+        url = f"{self.base_url}/v1/text-to-speech/{self.voice_id}"
+        headers, payload = self._request(text)
         
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.post(url, json=payload, headers=headers)
+            # TTS synthesis takes longer than the pool's default read timeout
+            response = await get_http_client().post(url, json=payload, headers=headers, timeout=30.0)
                 
             if response.status_code != 200:
                 print(f"❌ Voice API Error: {response.text}")
                 return None
                 
-            # Save to static/audio file
-            filename = f"response_{uuid.uuid4().hex[:8]}.mp3"
-            filepath = os.path.join(self.output_dir, filename)
-            
-            with open(filepath, "wb") as f:
-                f.write(response.content)
-            
-            # Return relative path for frontend
-            return f"/static/audio/{filename}"
+            # Save to static/audio (content-addressed); returns relative path for frontend
+            return await run_io(self.cache.put, key, response.content)
             
         except Exception as e:
             print(f"❌ Voice Generation Error: {e}")
             return None
 
+    def audio_key(self, text: str) -> str:
+        return AudioCache.key(text, self.voice_id, self.model_id, self.voice_settings)
+
+    def cached_audio(self, text: str) -> str | None:
+        """Web path of already-generated audio for `text`, if any."""
+        if not self.api_key:
+            return None
+        return self.cache.get(self.audio_key(text))
+
+    def cache_stats(self) -> dict:
+        return self.cache.stats()
+
+    def _request(self, text: str):
+        headers = {
+            "xi-api-key": self.api_key,
+            "Content-Type": "application/json"
+        }
+        payload = {
+            "text": text,
+            "model_id": self.model_id,
+            "voice_settings": self.voice_settings
+        }
+        return headers, payload
+
+    async def stream_speech(self, text: str) -> AsyncIterator[bytes]:
+        """
+        Yield MP3 bytes as they are synthesized, one TTS request per sentence
+        (see split_sentences) so playback can start after the first one.
+        The next sentence is requested while the current one streams, and
+        MP3 is frame-based, so the concatenated parts play as one stream.
+        """
+        if not self.api_key:
+            return
+
+        sentences = split_sentences(text)
+        queues = [asyncio.Queue() for _ in sentences]
+        tasks = {}
+
+        def start(i: int):
+            if i < len(sentences) and i not in tasks:
+                tasks[i] = asyncio.create_task(self._pump(sentences[i], queues[i]))
+
+        try:
+            start(0)
+            for i in range(len(sentences)):
+                start(i + 1)
+                while (item := await queues[i].get()) is not None:
+                    if isinstance(item, Exception):
+                        raise item
+                    yield item
+        finally:
+            for task in tasks.values():
+                task.cancel()
+
+    async def _pump(self, sentence: str, queue: asyncio.Queue):
+        """Stream one sentence's audio into `queue`, ending with None (or the exception)."""
+        url = f"{self.base_url}/v1/text-to-speech/{self.voice_id}/stream"
+        headers, payload = self._request(sentence)
+        try:
+            async with get_http_client().stream("POST", url, json=payload, headers=headers, timeout=30.0) as response:
+                if response.status_code != 200:
+                    body = await response.aread()
+                    raise RuntimeError(f"Voice API Error {response.status_code}: {body[:200]!r}")
+                async for chunk in response.aiter_bytes():
+                    await queue.put(chunk)
+        except Exception as e:
+            await queue.put(e)
+            return
+        await queue.put(None)
+
     async def speak(self, text: str) -> str | None:
         """Async wrapper to generate."""
         return await self.generate_and_save(text)
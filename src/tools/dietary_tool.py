@@ -1,7 +1,7 @@
 
 from typing import Any
 from spoon_ai.tools.base import BaseTool
-from ..rag.dietary_store import DietaryVectorStore
+from ..services.registry import registry
 
 class DietaryTool(BaseTool):
     """
@@ -25,7 +25,7 @@ class DietaryTool(BaseTool):
 
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
-        self._store = DietaryVectorStore()
+        self._store = registry.get("dietary_store")
         
     @property
     def store(self):
@@ -6,6 +6,7 @@ Searches the nutrition knowledge base for relevant information.
 from typing import Any
 from spoon_ai.tools.base import BaseTool
 from ..rag.store import NutritionVectorStore
+from ..services.registry import registry
 
 
 class RAGTool(BaseTool):
@@ -31,7 +32,7 @@ class RAGTool(BaseTool):
     
     def __init__(self, **data: Any):
         super().__init__(**data)
-        self._vector_store = NutritionVectorStore()
+        self._vector_store = registry.get("knowledge_store")
     
     async def execute(self, query: str) -> str:
         """Search nutrition knowledge and return relevant information."""
@@ -1,7 +1,7 @@
 
 from typing import Any
 from spoon_ai.tools.base import BaseTool
-from ..services.serper import SerperService
+from ..services.registry import registry
 import asyncio
 
 class RestaurantTool(BaseTool):
@@ -24,7 +24,7 @@ class RestaurantTool(BaseTool):
 
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
-        self._service = SerperService()
+        self._service = registry.get("serper")
 
     async def execute(self, cuisine_query: str, location: str = "London") -> str:
         """Find restaurants."""
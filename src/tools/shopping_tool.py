@@ -1,7 +1,7 @@
 
 from typing import Any
 from spoon_ai.tools.base import BaseTool
-from ..services.serper import SerperService
+from ..services.registry import registry
 import asyncio
 
 class ShoppingTool(BaseTool):
@@ -24,7 +24,7 @@ class ShoppingTool(BaseTool):
 
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
-        self._service = SerperService() # Private attr
+        self._service = registry.get("serper") # Private attr
 
     async def execute(self, product_query: str, location: str = "London") -> str:
         """Find products."""
@@ -0,0 +1,59 @@
+"""
+Keyset cursors: a cursor whose key has the wrong shape or element types is
+rejected with ValueError (a 400 from the API) by both profile backends.
+
+Usage:
+    python -m pytest tests/test_pagination.py
+"""
+import os
+import sys
+
+import pytest
+
+# Add project root to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from src.memory.pagination import decode_cursor, encode_cursor
+from src.memory.sql_profile_store import SQLProfileStore
+from src.memory.user_profile import UserProfileStore
+
+BAD_SUMMARY_CURSORS = [encode_cursor(1, 2), encode_cursor("2026-01-01T00:00:00"), encode_cursor(None, "x"),
+                       encode_cursor(["x"], "y"), "not base64!"]
+BAD_MESSAGE_CURSORS = [encode_cursor("3"), encode_cursor(True), encode_cursor(), encode_cursor(1, 2)]
+
+
+def test_decode_cursor_checks_types():
+    assert decode_cursor(encode_cursor("a", 3), str, int) == ["a", 3]
+    for bad in (encode_cursor(3, "a"), encode_cursor("a"), encode_cursor(True, 1)):
+        with pytest.raises(ValueError):
+            decode_cursor(bad, int, int)
+
+
+@pytest.fixture(params=["json", "sql"])
+def store(request, tmp_path):
+    if request.param == "json":
+        return UserProfileStore(str(tmp_path / "user_profile.json"))
+    engine = create_engine(f"sqlite:///{tmp_path / 'profile.db'}")
+    return SQLProfileStore(user_id=1, session_factory=sessionmaker(bind=engine), bind=engine, json_file=None)
+
+
+def test_bad_cursors_are_rejected(store):
+    for i in range(3):
+        store.create_session(f"session {i}")
+    first = store.get_session_summaries(2)
+    assert len(store.get_session_summaries(2, first["next_cursor"])["items"]) == 1
+    for bad in BAD_SUMMARY_CURSORS:
+        with pytest.raises(ValueError):
+            store.get_session_summaries(2, bad)
+
+    sid = store.create_session("chat")
+    for i in range(5):
+        store.add_message(sid, "user", f"message {i}")
+    page = store.get_session_messages_page(sid, 2)
+    assert len(store.get_session_messages_page(sid, 2, page["next_cursor"])["items"]) == 2
+    for bad in BAD_MESSAGE_CURSORS:
+        with pytest.raises(ValueError):
+            store.get_session_messages_page(sid, 2, bad)
@@ -0,0 +1,101 @@
+"""
+migrate_json_profile with several workers starting at once: exactly one
+imports the legacy JSON profile, and none of them crash.
+
+Usage:
+    python -m pytest tests/test_profile_migration.py
+"""
+import json
+import os
+import sqlite3
+import sys
+import threading
+
+# Add project root to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from src.db.database import set_sqlite_pragmas
+from src.memory.sql_profile_store import SQLProfileStore, ensure_schema, migrate_json_profile
+
+HISTORY = 2000
+
+
+def make_engine(db_path: str, busy_timeout_ms: int = None):
+    # Same pragmas as the app's engine (WAL, busy_timeout)
+    engine = create_engine(f"sqlite:///{db_path}", connect_args={"check_same_thread": False})
+    event.listen(engine, "connect", set_sqlite_pragmas)
+    if busy_timeout_ms is not None:
+        event.listen(engine, "connect", lambda conn, _: conn.execute(f"PRAGMA busy_timeout={busy_timeout_ms}"))
+    return engine
+
+
+def make_store(db_path: str, busy_timeout_ms: int = None) -> SQLProfileStore:
+    engine = make_engine(db_path, busy_timeout_ms)
+    return SQLProfileStore(user_id=0, session_factory=sessionmaker(bind=engine), bind=engine,
+                           json_file=None, create_schema=False)
+
+
+def write_profile(path: str):
+    profile = {
+        "history": [{"date": "2026-01-01", "food": f"food {i}", "nutrients": {"calories": 100}} for i in range(HISTORY)],
+        "facts": ["I am vegetarian"],
+        "sessions": {},
+    }
+    with open(path, "w") as f:
+        json.dump(profile, f)
+
+
+def food_logs(db_path: str) -> int:
+    with sqlite3.connect(db_path) as conn:
+        return conn.execute("SELECT COUNT(*) FROM food_logs").fetchone()[0]
+
+
+def test_concurrent_migrations_import_once(tmp_path):
+    db_path, json_file = str(tmp_path / "profile.db"), str(tmp_path / "user_profile.json")
+    write_profile(json_file)
+    ensure_schema(make_engine(db_path))
+
+    stores = [make_store(db_path) for _ in range(4)]
+    barrier = threading.Barrier(len(stores))
+    results, errors = [], []
+
+    def worker(store):
+        barrier.wait()
+        try:
+            results.append(migrate_json_profile(json_file, store))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker, args=(store,)) for store in stores]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert errors == []
+    assert sorted(results) == [False, False, False, True]
+    assert food_logs(db_path) == HISTORY
+
+
+def test_locked_database_backs_off_instead_of_crashing(tmp_path):
+    db_path, json_file = str(tmp_path / "profile.db"), str(tmp_path / "user_profile.json")
+    write_profile(json_file)
+    ensure_schema(make_engine(db_path))
+    store = make_store(db_path, busy_timeout_ms=100)
+
+    # Another process mid-migration: holds the write lock past our busy_timeout
+    holder = sqlite3.connect(db_path, isolation_level=None)
+    holder.execute("BEGIN IMMEDIATE")
+    try:
+        assert migrate_json_profile(json_file, store) is False
+    finally:
+        holder.execute("ROLLBACK")
+        holder.close()
+    assert food_logs(db_path) == 0
+
+    # Next start: the lock is gone and nothing was recorded, so it migrates
+    assert migrate_json_profile(json_file, store) is True
+    assert food_logs(db_path) == HISTORY